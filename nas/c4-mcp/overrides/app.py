@@ -2,17 +2,24 @@
 
 from __future__ import annotations
 
-from collections import Counter
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from array import array
+import atexit
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait as futures_wait
+import hashlib
+import heapq
+import inspect
 import json
 import logging
 from logging.handlers import RotatingFileHandler
 import os
+import re
 import sys
+import threading
 import time
 import uuid
 
-from flask import Flask, jsonify, request, g, has_request_context
+from flask import Flask, Response, jsonify, request, g, has_request_context, stream_with_context
 from werkzeug.exceptions import HTTPException
 from flask_mcp_server import Mcp, mount_mcp
 from flask_mcp_server.http_integrated import mw_auth, mw_cors, mw_ratelimit
@@ -220,6 +227,99 @@ def _current_session_id(explicit: str | None = None) -> str:
     return _PROCESS_SESSION_ID
 
 
+def _id_list(value: object) -> list[str]:
+    """Normalize an id or list of ids from tool args ("12", 12, ["12", 13], "12,13") to digit strings."""
+
+    if value is None:
+        return []
+    items = value if isinstance(value, (list, tuple, set)) else str(value).split(",")
+    return [str(v).strip() for v in items if v is not None and str(v).strip().isdigit()]
+
+
+class _SessionHistory:
+    """Recent device/room references from remembered tool calls across sessions, persisted under logs/.
+
+    Session memory itself is in-process and starts empty; this keeps the references it records
+    (args plus the lights/TV it extracted) so start-up prewarm can favour what sessions actually use.
+    """
+
+    def __init__(self, path: str, max_entries: int = 2000, save_every_s: float = 60.0) -> None:
+        self.path = path
+        self.save_every_s = float(save_every_s)
+        self._lock = threading.Lock()
+        self.entries: deque = deque(maxlen=max(1, int(max_entries)))
+        self._dirty = False
+        self._saving = False
+        self._saved_at = time.monotonic()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return
+        for e in (data.get("entries") or []) if isinstance(data, dict) else []:
+            if isinstance(e, dict):
+                self.entries.append({"tool": str(e.get("tool") or ""), "devices": _id_list(e.get("devices")), "rooms": _id_list(e.get("rooms")), "at": e.get("at")})
+
+    def record(self, session_id: str, tool_name: str, args: dict, lights: object, tv: object) -> None:
+        devices = [*_id_list(args.get("device_id")), *_id_list(args.get("source_device_id")), *_id_list(args.get("device_ids"))]
+        rooms = [*_id_list(args.get("room_id")), *_id_list(args.get("room_ids"))]
+        for row in lights if isinstance(lights, list) else []:
+            if isinstance(row, dict):
+                devices.extend(_id_list(row.get("device_id")))
+        if isinstance(tv, dict):
+            rooms.extend(_id_list(tv.get("room_id")))
+            devices.extend(_id_list(tv.get("device_id")))
+        if not devices and not rooms:
+            return
+        with self._lock:
+            self.entries.append({"session_id": str(session_id), "tool": tool_name, "devices": devices, "rooms": rooms, "at": round(time.time(), 3)})
+            self._dirty = True
+            due = not self._saving and time.monotonic() - self._saved_at >= self.save_every_s
+            if due:
+                self._saving = True
+        if due:
+            # Never write the file on the request thread; one writer at a time, at most every save_every_s.
+            threading.Thread(target=self._save_in_background, name="c4-session-history", daemon=True).start()
+
+    def _save_in_background(self) -> None:
+        try:
+            self.save()
+        finally:
+            with self._lock:
+                self._saving = False
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"entries": [{k: v for k, v in e.items() if k != "session_id"} for e in self.entries], "saved_at": time.time()}
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            _log.warning(_safe_json({"event": "session_history_save_failed", "error": repr(e)}))
+
+    def top(self, kind: str, n: int) -> list[int]:
+        field = "rooms" if kind == "rooms" else "devices"
+        counts: Counter = Counter()
+        with self._lock:
+            for e in self.entries:
+                counts.update(set(e.get(field) or []))
+        return [int(k) for k, _ in counts.most_common(max(0, int(n)))]
+
+
+_SESSION_HISTORY = _SessionHistory(os.path.join("logs", "session_history.json"))
+atexit.register(_SESSION_HISTORY.save)
+
+
 def _remember_tool_call(tool_name: str, args: dict | None, result: Any) -> None:
     try:
         sid = _current_session_id(None)
@@ -235,6 +335,8 @@ def _remember_tool_call(tool_name: str, args: dict | None, result: Any) -> None:
         tv = extract_tv_from_call(str(tool_name or ""), dict(args or {}), result)
         if tv:
             mem.set_last_tv(tv)
+
+        _SESSION_HISTORY.record(sid, str(tool_name or ""), dict(args or {}), lights, tv)
     except Exception:
         # Never let memory tracking break tools.
         return
@@ -245,17 +347,21 @@ def _remember_tool_call(tool_name: str, args: dict | None, result: Any) -> None:
 _WRITE_TOOL_NAMES = {
     # Generic / debug
     "c4_item_send_command",
+    "c4_debug_trace_command",
     "c4_item_execute_command",
     # Lighting
     "c4_light_set_level",
     "c4_light_ramp",
     "c4_light_set_by_name",
     "c4_room_lights_set",
+    "c4_rooms_lights_set",
+    "c4_room_shades_set",
     "c4_lights_set_last",
     # Locks
     "c4_lock_lock",
     "c4_lock_unlock",
     "c4_lock_set_by_name",
+    "c4_locks_lock_all",
     # Thermostat
     "c4_thermostat_set_target_f",
     "c4_thermostat_set_heat_setpoint_f",
@@ -263,15 +369,19 @@ _WRITE_TOOL_NAMES = {
     "c4_thermostat_set_hvac_mode",
     "c4_thermostat_set_fan_mode",
     "c4_thermostat_set_hold_mode",
+    "c4_thermostats_set_many",
+    "c4_thermostat_apply",
     # Room / UI actions
     "c4_room_send_command",
     "c4_room_remote",
     "c4_room_off",
+    "c4_house_av_off",
     "c4_room_select_video_device",
     "c4_tv_watch_by_name",
     "c4_room_select_audio_device",
     "c4_room_listen",
     "c4_room_listen_by_name",
+    "c4_rooms_listen",
     "c4_uibutton_activate",
     "c4_scene_activate",
     "c4_scene_activate_by_name",
@@ -305,12 +415,20 @@ _WRITE_TOOL_NAMES = {
 }
 
 
+# Read-only tools whose names happen to match the write prefixes below.
+_READ_TOOL_NAMES = {
+    "c4_media_remote_sequence_status",
+}
+
+
 def _is_write_tool(tool_name: str) -> bool:
     if not tool_name:
         return False
     name = str(tool_name)
     if name in _WRITE_TOOL_NAMES:
         return True
+    if name in _READ_TOOL_NAMES:
+        return False
     # Heuristic fallback for common write naming patterns.
     lowered = name.lower()
     return any(
@@ -366,12 +484,79 @@ def _write_allowed(tool_name: str) -> tuple[bool, str | None]:
     return True, None
 
 
+def _write_guard_response(tool_name: str):
+    """(json_response, 403) when guardrails block this tool call, else None.
+
+    Shared by the /mcp/call hook and the custom HTTP routes so every entry point enforces the same policy.
+    """
+
+    if not _write_guardrails_enabled() or not _is_write_tool(tool_name):
+        return None
+
+    if not _writes_enabled():
+        _log.warning(
+            _safe_json(
+                {
+                    "event": "write_blocked",
+                    "request_id": getattr(g, "request_id", None),
+                    "reason": "C4_WRITES_ENABLED is not true",
+                    "tool": tool_name,
+                }
+            )
+        )
+        # Match our general JSON error shape; keep it simple.
+        return (
+            jsonify(
+                {
+                    "ok": False,
+                    "error": "writes_disabled",
+                    "details": "Write tools are blocked (set C4_WRITES_ENABLED=true or disable C4_WRITE_GUARDRAILS).",
+                    "request_id": getattr(g, "request_id", None),
+                }
+            ),
+            403,
+        )
+
+    allowed, why = _write_allowed(tool_name)
+    if not allowed:
+        _log.warning(
+            _safe_json(
+                {
+                    "event": "write_blocked",
+                    "request_id": getattr(g, "request_id", None),
+                    "reason": why,
+                    "tool": tool_name,
+                }
+            )
+        )
+        return (
+            jsonify(
+                {
+                    "ok": False,
+                    "error": "write_not_allowed",
+                    "details": why,
+                    "request_id": getattr(g, "request_id", None),
+                }
+            ),
+            403,
+        )
+    return None
+
+
 @app.before_request
 def _c4_before_request() -> None:
     g._c4_start = time.perf_counter()
     g.request_id = request.headers.get("X-Request-Id") or str(uuid.uuid4())
     g.session_id = _current_session_id(None)
 
+    # kind="batch" on /mcp/call fans out to per-item /mcp/call dispatches (guardrails apply per item).
+    # before_request runs ahead of the middlewares mount_mcp wraps around /mcp/call, so the outer request goes
+    # through the same auth/rate-limit wrapper as /mcp/batch before any item is dispatched.
+    if request.path.endswith("/mcp/call") and request.method.upper() == "POST" and request.is_json:
+        body = request.get_json(silent=True)
+        if isinstance(body, dict) and body.get("kind") == "batch":
+            return _MCP_BATCH_VIEW()
+
     # Opt-in: allow operators to run the server in a safe, read-only mode.
     # This is enforced at the HTTP boundary so we don't have to thread flags through tool code.
     try:
@@ -381,55 +566,7 @@ def _c4_before_request() -> None:
         if request.path.endswith("/mcp/call") and request.method.upper() == "POST" and request.is_json:
             body = request.get_json(silent=True) or {}
             if isinstance(body, dict) and body.get("kind") == "tool":
-                tool_name = str(body.get("name") or "")
-                if _is_write_tool(tool_name):
-                    if not _writes_enabled():
-                        _log.warning(
-                            _safe_json(
-                                {
-                                    "event": "write_blocked",
-                                    "request_id": getattr(g, "request_id", None),
-                                    "reason": "C4_WRITES_ENABLED is not true",
-                                    "tool": tool_name,
-                                }
-                            )
-                        )
-                        # Match our general JSON error shape; keep it simple.
-                        return (
-                            jsonify(
-                                {
-                                    "ok": False,
-                                    "error": "writes_disabled",
-                                    "details": "Write tools are blocked (set C4_WRITES_ENABLED=true or disable C4_WRITE_GUARDRAILS).",
-                                    "request_id": getattr(g, "request_id", None),
-                                }
-                            ),
-                            403,
-                        )
-
-                    allowed, why = _write_allowed(tool_name)
-                    if not allowed:
-                        _log.warning(
-                            _safe_json(
-                                {
-                                    "event": "write_blocked",
-                                    "request_id": getattr(g, "request_id", None),
-                                    "reason": why,
-                                    "tool": tool_name,
-                                }
-                            )
-                        )
-                        return (
-                            jsonify(
-                                {
-                                    "ok": False,
-                                    "error": "write_not_allowed",
-                                    "details": why,
-                                    "request_id": getattr(g, "request_id", None),
-                                }
-                            ),
-                            403,
-                        )
+                return _write_guard_response(str(body.get("name") or ""))
     except Exception:
         # Never break requests due to guardrails parsing.
         return
@@ -462,6 +599,9 @@ def _c4_after_request(resp):
                 fields["mcp_kind"] = body.get("kind")
                 fields["mcp_name"] = body.get("name")
                 args = body.get("args")
+                if isinstance(args, dict) and body.get("kind") == "tool" and int(getattr(resp, "status_code", 0) or 0) < 400:
+                    if _is_write_tool(str(body.get("name") or "")):
+                        _invalidate_after_write(args, resp.get_json(silent=True) if resp.is_json else None)
                 if isinstance(args, dict):
                     lowered = {str(k).lower() for k in args.keys()}
                     fields["arg_count"] = len(args)
@@ -476,8 +616,330 @@ def _c4_after_request(resp):
         pass
     return resp
 
-# Locks can block (cloud/driver latency); run them in a small thread pool
-_lock_pool = ThreadPoolExecutor(max_workers=4)
+# ---------- Per-device execution lanes ----------
+
+
+class _LaneQueueFull(RuntimeError):
+    pass
+
+
+def _lane_busy_reply(device_id: object, err: BaseException) -> dict:
+    """Tool response for a write rejected because the device's lane is already full."""
+
+    return {"ok": False, "device_id": str(device_id), "error": "device_busy", "busy": True, "details": str(err)}
+
+
+class _LaneJob:
+    __slots__ = (
+        "key",
+        "op",
+        "fn",
+        "args",
+        "kwargs",
+        "future",
+        "enqueued_at",
+        "started_at",
+        "abandoned",
+        "coalesce_key",
+        "detail",
+    )
+
+    def __init__(
+        self,
+        key: str,
+        op: str,
+        fn,
+        args: tuple,
+        kwargs: dict,
+        coalesce_key: str | None = None,
+        detail: dict | None = None,
+    ) -> None:
+        self.key = key
+        self.op = op
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+        self.started_at: float | None = None
+        self.abandoned = False
+        self.coalesce_key = coalesce_key
+        self.detail = dict(detail or {})
+
+
+class _Coalesced:
+    """Result handed to a queued write that was superseded by a newer write of the same kind."""
+
+    __slots__ = ("job", "superseded_by")
+
+    def __init__(self, job: _LaneJob, superseded_by: _LaneJob) -> None:
+        self.job = job
+        self.superseded_by = superseded_by
+
+    def reply(self, device_id: object) -> dict:
+        return {
+            "ok": True,
+            "accepted": False,
+            "coalesced": True,
+            "device_id": str(device_id),
+            "op": self.job.op,
+            "requested": dict(self.job.detail),
+            "superseded_by": {"op": self.superseded_by.op, **dict(self.superseded_by.detail)},
+            "details": "A newer command for this device replaced this one before it was sent (last write wins).",
+        }
+
+
+class _DeviceLaneExecutor:
+    """Run blocking Director calls in per-device FIFO lanes.
+
+    Each device gets its own queue drained by at most max_inflight_per_device worker threads, so a
+    slow device (e.g., a cloud-backed lock) only ever blocks its own lane instead of a shared pool.
+    Work is handed out as Futures: queued work can be cancelled and is then skipped, and a caller that
+    times out cancels its job if it has not started yet. A job that is already running cannot be
+    interrupted from Python; it is marked abandoned and stays confined to its device's lane.
+
+    Writes may pass a coalesce_key (e.g., "level"): a newer write with the same key replaces any
+    still-queued one (last write wins) and the superseded caller receives a _Coalesced result.
+    """
+
+    def __init__(self, name: str, max_inflight_per_device: int = 1, max_queue_per_device: int = 8) -> None:
+        self.name = str(name)
+        self._max_inflight = max(1, int(max_inflight_per_device))
+        self._max_queue = max(1, int(max_queue_per_device))
+        self._lock = threading.Lock()
+        self._lanes: dict[str, dict] = {}
+        self._totals = Counter()
+
+    def _lane(self, key: str) -> dict:
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = {"queue": deque(), "running": [], "workers": 0, "completed": 0, "failed": 0, "cancelled": 0}
+            self._lanes[key] = lane
+        return lane
+
+    def _enqueue(
+        self,
+        key: object,
+        fn,
+        *args,
+        op: str = "",
+        coalesce_key: str | None = None,
+        detail: dict | None = None,
+        **kwargs,
+    ) -> _LaneJob:
+        k = str(key)
+        job = _LaneJob(k, str(op or getattr(fn, "__name__", "call")), fn, args, kwargs, coalesce_key, detail)
+        start_worker = False
+        superseded: list[_LaneJob] = []
+        with self._lock:
+            lane = self._lane(k)
+            if coalesce_key:
+                for old in list(lane["queue"]):
+                    if old.coalesce_key == coalesce_key:
+                        lane["queue"].remove(old)
+                        superseded.append(old)
+                lane["coalesced"] = lane.get("coalesced", 0) + len(superseded)
+                self._totals["coalesced"] += len(superseded)
+            if len(lane["queue"]) >= self._max_queue:
+                self._totals["rejected"] += 1
+                job.future.set_exception(
+                    _LaneQueueFull(f"{self.name} {k} busy: {len(lane['queue'])} operations already queued")
+                )
+                return job
+            lane["queue"].append(job)
+            self._totals["submitted"] += 1
+            if lane["workers"] < self._max_inflight:
+                lane["workers"] += 1
+                start_worker = True
+        for old in superseded:
+            if old.future.set_running_or_notify_cancel():
+                old.future.set_result(_Coalesced(old, job))
+        if start_worker:
+            threading.Thread(target=self._drain, args=(k,), name=f"c4-{self.name}-{k}", daemon=True).start()
+        return job
+
+    def submit(
+        self,
+        key: object,
+        fn,
+        *args,
+        op: str = "",
+        coalesce_key: str | None = None,
+        detail: dict | None = None,
+        **kwargs,
+    ) -> _LaneJob:
+        """Queue without waiting; the job's future carries the result and the job can be passed to cancel()."""
+
+        return self._enqueue(key, fn, *args, op=op, coalesce_key=coalesce_key, detail=detail, **kwargs)
+
+    def run(
+        self,
+        key: object,
+        fn,
+        *args,
+        timeout_s: float,
+        op: str = "",
+        coalesce_key: str | None = None,
+        detail: dict | None = None,
+        **kwargs,
+    ):
+        """Submit and wait; on timeout the job is cancelled if still queued and FutureTimeout is raised."""
+
+        job = self.submit(key, fn, *args, op=op, coalesce_key=coalesce_key, detail=detail, **kwargs)
+        try:
+            return job.future.result(timeout=float(timeout_s))
+        except FutureTimeout:
+            self.cancel(job)
+            raise
+
+    def cancel(self, job: _LaneJob) -> bool:
+        if job.future.cancel():
+            with self._lock:
+                lane = self._lanes.get(job.key)
+                if lane is not None:
+                    try:
+                        lane["queue"].remove(job)
+                    except ValueError:
+                        pass
+                    lane["cancelled"] += 1
+                self._totals["cancelled"] += 1
+            return True
+        job.abandoned = True
+        with self._lock:
+            self._totals["abandoned"] += 1
+        return False
+
+    def _drain(self, key: str) -> None:
+        while True:
+            with self._lock:
+                lane = self._lanes.get(key)
+                if lane is None:
+                    return
+                if not lane["queue"]:
+                    lane["workers"] -= 1
+                    if lane["workers"] <= 0 and not lane["running"]:
+                        self._lanes.pop(key, None)
+                    return
+                job = lane["queue"].popleft()
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                job.started_at = time.monotonic()
+                lane["running"].append(job)
+
+            ok = False
+            try:
+                job.future.set_result(job.fn(*job.args, **job.kwargs))
+                ok = True
+            except BaseException as e:  # noqa: BLE001 - surfaced to the caller via the Future
+                job.future.set_exception(e)
+            finally:
+                with self._lock:
+                    try:
+                        lane["running"].remove(job)
+                    except ValueError:
+                        pass
+                    lane["completed" if ok else "failed"] += 1
+                    self._totals["completed" if ok else "failed"] += 1
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            lanes = []
+            for key, lane in self._lanes.items():
+                queued = list(lane["queue"])
+                lanes.append(
+                    {
+                        "device_id": key,
+                        "queue_depth": len(queued),
+                        "oldest_queued_age_s": (round(now - queued[0].enqueued_at, 3) if queued else None),
+                        "in_flight": len(lane["running"]),
+                        "coalesced": int(lane.get("coalesced", 0)),
+                        "running": [
+                            {
+                                "op": j.op,
+                                "age_s": round(now - float(j.started_at or now), 3),
+                                "abandoned": bool(j.abandoned),
+                            }
+                            for j in lane["running"]
+                        ],
+                    }
+                )
+            lanes.sort(key=lambda r: (-(r["queue_depth"] + r["in_flight"]), r["device_id"]))
+            return {
+                "name": self.name,
+                "max_inflight_per_device": self._max_inflight,
+                "max_queue_per_device": self._max_queue,
+                "active_lanes": len(lanes),
+                "queued_total": sum(r["queue_depth"] for r in lanes),
+                "in_flight_total": sum(r["in_flight"] for r in lanes),
+                "totals": dict(self._totals),
+                "lanes": lanes,
+            }
+
+
+# Locks can block (cloud/driver latency); each lock gets its own lane so one slow lock can't starve the rest.
+_LOCK_ENGINE = _DeviceLaneExecutor(
+    "lock",
+    max_inflight_per_device=int(os.getenv("C4_LOCK_MAX_INFLIGHT", "1") or "1"),
+    max_queue_per_device=int(os.getenv("C4_LOCK_MAX_QUEUE", "4") or "4"),
+)
+_LOCK_TIMEOUT_S = float(os.getenv("C4_LOCK_TIMEOUT_S", "20") or "20")
+
+
+def _lock_timeout_error() -> str:
+    return f"tool timeout ({_LOCK_TIMEOUT_S:g}s)"
+
+
+def _lock_coalesce_key(locked: bool) -> str:
+    # Only a queued command for the same target state may be replaced; a queued unlock is never
+    # swallowed by a later lock (or vice versa), so every caller's command is either sent or matched.
+    return "lock_state:locked" if locked else "lock_state:unlocked"
+
+
+# Other device writes (light levels, shade positions, thermostat setpoints, room remotes) are serialized
+# per device so bursts reach the Director in order, and superseded levels/setpoints/positions collapse.
+_DEVICE_QUEUE = _DeviceLaneExecutor(
+    "device",
+    max_inflight_per_device=1,
+    max_queue_per_device=int(os.getenv("C4_DEVICE_QUEUE_MAX", "16") or "16"),
+)
+_DEVICE_QUEUE_TIMEOUT_S = float(os.getenv("C4_DEVICE_QUEUE_TIMEOUT_S", "30") or "30")
+
+
+def _device_write(
+    key: object,
+    fn,
+    *args,
+    coalesce: str | None = None,
+    detail: dict | None = None,
+    **kwargs,
+) -> tuple[object, dict | None]:
+    """Run a write in the device's lane.
+
+    Returns (result, None) normally, or (None, reply) when the write was coalesced into a newer one,
+    timed out waiting for the lane or was rejected because the lane is full; reply is then the tool
+    response to return as-is.
+    """
+
+    try:
+        result = _DEVICE_QUEUE.run(
+            key,
+            fn,
+            *args,
+            timeout_s=_DEVICE_QUEUE_TIMEOUT_S,
+            op=getattr(fn, "__name__", "call"),
+            coalesce_key=coalesce,
+            detail=detail,
+            **kwargs,
+        )
+    except FutureTimeout:
+        return None, {"ok": False, "device_id": str(key), "error": f"device queue timeout ({_DEVICE_QUEUE_TIMEOUT_S:g}s)"}
+    except _LaneQueueFull as e:
+        return None, _lane_busy_reply(key, e)
+    _VARS.invalidate(key)
+    if isinstance(result, _Coalesced):
+        return None, result.reply(key)
+    return result, None
 
 
 def _augment_lock_result(result: dict, desired_locked: bool | None = None) -> dict:
@@ -504,6 +966,519 @@ def _augment_lock_result(result: dict, desired_locked: bool | None = None) -> di
 
     return result
 
+# ---------- Fan-out helpers ----------
+
+
+def _fan_out(fn, items: list, max_workers: int, deadline_s: float | None = None) -> list[dict]:
+    """Run fn(item) for every item concurrently and return one row per item, in input order.
+
+    Rows look like {"ok": bool, "result"|"error": ..., "elapsed_ms": float}. Work still running when
+    deadline_s expires is reported as timed out and abandoned; the caller never blocks past the deadline.
+    """
+
+    if not items:
+        return []
+
+    workers = max(1, min(int(max_workers or 1), len(items)))
+    pool = ThreadPoolExecutor(max_workers=workers)
+    started = time.perf_counter()
+
+    def _run(item) -> dict:
+        t0 = time.perf_counter()
+        try:
+            res = fn(item)
+            return {"ok": True, "result": res, "elapsed_ms": round((time.perf_counter() - t0) * 1000.0, 2)}
+        except Exception as e:
+            return {"ok": False, "error": repr(e), "elapsed_ms": round((time.perf_counter() - t0) * 1000.0, 2)}
+
+    futs = {pool.submit(_run, item): idx for idx, item in enumerate(items)}
+    try:
+        done, pending = futures_wait(list(futs.keys()), timeout=(float(deadline_s) if deadline_s is not None else None))
+    finally:
+        # Never block on stragglers; queued items are dropped, running ones finish in the background.
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    rows: list[dict] = [{} for _ in items]
+    for f in done:
+        rows[futs[f]] = f.result()
+    for f in pending:
+        rows[futs[f]] = {
+            "ok": False,
+            "error": "deadline exceeded",
+            "timed_out": True,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000.0, 2),
+        }
+    return rows
+
+
+def _confirm_all(
+    keys: list,
+    read_fn,
+    check_fn,
+    timeout_s: float,
+    *,
+    poll_interval_s: float = 0.5,
+    max_workers: int = 6,
+) -> dict:
+    """Shared confirmation phase for many devices/rooms.
+
+    Each round reads every still-unconfirmed key concurrently (read_fn(key)) and asks check_fn(key, value)
+    whether it reached its target (True/False; None = cannot tell). One deadline covers all keys instead of
+    a confirm_timeout_s wait per call. Returns {key: {confirmed, last, confirmed_after_ms, error?}}.
+    """
+
+    started = time.perf_counter()
+    deadline = started + max(0.0, float(timeout_s))
+    status: dict = {k: {"confirmed": False, "last": None} for k in keys}
+    pending = list(keys)
+
+    while pending:
+        remaining = deadline - time.perf_counter()
+        rows = _fan_out(read_fn, pending, max_workers, deadline_s=max(0.05, remaining))
+        still: list = []
+        for key, row in zip(pending, rows):
+            st = status[key]
+            if not row.get("ok"):
+                st["error"] = row.get("error")
+                still.append(key)
+                continue
+            st.pop("error", None)
+            st["last"] = row.get("result")
+            try:
+                verdict = check_fn(key, row.get("result"))
+            except Exception:
+                verdict = None
+            if verdict is True:
+                st["confirmed"] = True
+                st["confirmed_after_ms"] = round((time.perf_counter() - started) * 1000.0, 2)
+            else:
+                st["unknown"] = verdict is None
+                still.append(key)
+        pending = still
+        if not pending or time.perf_counter() + float(poll_interval_s) > deadline:
+            break
+        time.sleep(float(poll_interval_s))
+
+    return status
+
+
+# ---- Shared room status poller ----
+
+
+class _RoomStatusPoller:
+    """One Watch/Listen status stream per (room, kind), shared by readers and confirmation waits.
+
+    Readers get the freshest cached snapshot plus its age; concurrent fetches for the same room are
+    single-flight. Confirmation waits subscribe to the stream, which polls on its own thread only while
+    it has subscribers, so N concurrent waits on one room cost one poll per interval instead of N.
+    """
+
+    def __init__(self, poll_interval_s: float = 0.5, max_age_s: float = 1.0) -> None:
+        self.poll_interval_s = max(0.05, float(poll_interval_s))
+        self.max_age_s = max(0.0, float(max_age_s))
+        self._lock = threading.Lock()
+        self._streams: dict[tuple[int, str], dict] = {}
+
+    @staticmethod
+    def _fetcher(kind: str):
+        return room_listen_status if kind == "listen" else room_watch_status
+
+    def _stream(self, room_id: int, kind: str) -> dict:
+        key = (int(room_id), str(kind))
+        with self._lock:
+            st = self._streams.get(key)
+            if st is None:
+                st = {
+                    "cond": threading.Condition(),
+                    "snapshot": None,
+                    "at": None,
+                    "fetch_started": None,
+                    "fetching": False,
+                    "seq": 0,
+                    "fetches": 0,
+                    "subscribers": 0,
+                    "thread": None,
+                }
+                self._streams[key] = st
+            return st
+
+    def _fetch(self, room_id: int, kind: str, st: dict) -> None:
+        cond = st["cond"]
+        with cond:
+            if st["fetching"]:
+                seq = st["seq"]
+                while st["fetching"] and st["seq"] == seq:
+                    cond.wait(timeout=5.0)
+                return
+            st["fetching"] = True
+        started = time.monotonic()
+        try:
+            snap = self._fetcher(kind)(int(room_id))
+        except Exception as e:
+            snap = {"ok": False, "error": f"{kind}_status_failed", "details": repr(e)}
+        with cond:
+            st["snapshot"] = snap
+            st["at"] = time.monotonic()
+            st["fetch_started"] = started
+            st["fetching"] = False
+            st["seq"] += 1
+            st["fetches"] += 1
+            cond.notify_all()
+
+    def read(self, room_id: int, kind: str, max_age_s: float | None = None) -> tuple[object, float]:
+        """(snapshot, age_s); fetches when the cached snapshot is older than max_age_s (default: max_age_s)."""
+
+        limit = self.max_age_s if max_age_s is None else max(0.0, float(max_age_s))
+        st = self._stream(room_id, kind)
+        with st["cond"]:
+            if st["at"] is not None and time.monotonic() - st["at"] < limit:
+                return st["snapshot"], time.monotonic() - st["at"]
+        self._fetch(room_id, kind, st)
+        with st["cond"]:
+            age = time.monotonic() - st["at"] if st["at"] is not None else 0.0
+            return st["snapshot"], age
+
+    def _run(self, room_id: int, kind: str, st: dict) -> None:
+        while True:
+            with st["cond"]:
+                if st["subscribers"] <= 0:
+                    st["thread"] = None
+                    return
+            self._fetch(room_id, kind, st)
+            time.sleep(self.poll_interval_s)
+
+    def wait_for(self, room_id: int, kind: str, check_fn, timeout_s: float, *, stop_on_unknown: bool = False) -> dict:
+        """Wait until check_fn(snapshot) is True on a snapshot fetched after this call started.
+
+        check_fn returns True/False, or None when the snapshot cannot tell (stop_on_unknown returns right
+        away then). Returns the same row shape as _confirm_all: {confirmed, last, confirmed_after_ms?, unknown?, age_s}.
+        """
+
+        st = self._stream(room_id, kind)
+        cond = st["cond"]
+        started = time.monotonic()
+        deadline = started + max(0.0, float(timeout_s))
+        out: dict = {"confirmed": False, "last": None}
+        with cond:
+            st["subscribers"] += 1
+            if st["thread"] is None:
+                t = threading.Thread(
+                    target=self._run,
+                    args=(int(room_id), str(kind), st),
+                    name=f"c4-room-status-{room_id}-{kind}",
+                    daemon=True,
+                )
+                st["thread"] = t
+                t.start()
+        try:
+            seen = -1
+            while True:
+                with cond:
+                    fresh = st["fetch_started"] is not None and st["fetch_started"] >= started
+                    if fresh and st["seq"] != seen:
+                        seen = st["seq"]
+                        snap = st["snapshot"]
+                        out["last"] = snap
+                        out["age_s"] = round(time.monotonic() - st["at"], 3)
+                        try:
+                            verdict = check_fn(snap)
+                        except Exception:
+                            verdict = None
+                        if verdict is True:
+                            out["confirmed"] = True
+                            out["confirmed_after_ms"] = round((time.monotonic() - started) * 1000.0, 2)
+                            out.pop("unknown", None)
+                            return out
+                        out["unknown"] = verdict is None
+                        if verdict is None and stop_on_unknown:
+                            return out
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return out
+                    cond.wait(timeout=remaining)
+        finally:
+            with cond:
+                st["subscribers"] -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            items = list(self._streams.items())
+        now = time.monotonic()
+        return {
+            "streams": len(items),
+            "subscribers": sum(int(st["subscribers"]) for _, st in items),
+            "polling": sum(1 for _, st in items if st["thread"] is not None),
+            "fetches": sum(int(st["fetches"]) for _, st in items),
+            "oldest_snapshot_age_s": (
+                round(max(now - st["at"] for _, st in items if st["at"] is not None), 3)
+                if any(st["at"] is not None for _, st in items)
+                else None
+            ),
+            "poll_interval_s": self.poll_interval_s,
+            "max_age_s": self.max_age_s,
+        }
+
+
+_ROOM_STATUS = _RoomStatusPoller(
+    poll_interval_s=float(os.getenv("C4_ROOM_STATUS_POLL_S", "0.5") or "0.5"),
+    max_age_s=float(os.getenv("C4_ROOM_STATUS_MAX_AGE_S", "1.0") or "1.0"),
+)
+
+
+def _room_status_view(room_id: int, kind: str, max_age_s: float | None = None) -> dict:
+    """Poller snapshot as a tool response (a copy, so callers may annotate it) with status_age_s."""
+
+    snap, age = _ROOM_STATUS.read(int(room_id), kind, max_age_s)
+    out = dict(snap) if isinstance(snap, dict) else {"ok": True, "result": snap}
+    out["status_age_s"] = round(age, 3)
+    return out
+
+
+def _room_wait_session(room_id: int, kind: str, active: bool, timeout_s: float) -> dict:
+    """Shared-stream wait for a room's Watch/Listen session to become active/inactive."""
+
+    def _check(snap: object) -> bool | None:
+        if isinstance(snap, dict) and snap.get("ok") is False:
+            return False  # transient read failure: keep polling
+        cur = _room_session_active(snap, kind)
+        return None if cur is None else cur is bool(active)
+
+    # A payload that does not report the session flag will not start to, so stop early rather than time out.
+    return _ROOM_STATUS.wait_for(int(room_id), kind, _check, float(timeout_s), stop_on_unknown=True)
+
+
+def _room_wait_off(room_id: int, timeout_s: float) -> dict:
+    """Wait for both the Watch and the Listen session of a room to end (side by side, on the shared streams)."""
+
+    started = time.monotonic()
+    rows = _fan_out(lambda kind: _room_wait_session(int(room_id), kind, False, float(timeout_s)), ["watch", "listen"], 2)
+    waits = [r.get("result") if r.get("ok") else {"confirmed": False, "error": r.get("error")} for r in rows]
+    known_on = any(not w.get("confirmed") and not w.get("unknown") for w in waits)
+    confirmed = not known_on and any(w.get("confirmed") for w in waits)
+    out = {
+        "confirmed": confirmed,
+        "unknown": not confirmed and all(w.get("unknown") for w in waits),
+        "last": {"watch": waits[0].get("last"), "listen": waits[1].get("last")},
+    }
+    if confirmed:
+        out["confirmed_after_ms"] = round((time.monotonic() - started) * 1000.0, 2)
+    return out
+
+
+def _room_wait_listen_source(room_id: int, source_device_id: int, timeout_s: float) -> dict:
+    """Wait until the room's Listen session is active on source_device_id (not merely active)."""
+
+    def _check(snap: object) -> bool | None:
+        if isinstance(snap, dict) and snap.get("ok") is False:
+            return False  # transient read failure: keep polling
+        if _room_session_active(snap, "listen") is False:
+            return False
+        current = _room_session_source(snap, "listen")
+        if current is None:
+            return None
+        return int(current) == int(source_device_id)
+
+    return _ROOM_STATUS.wait_for(int(room_id), "listen", _check, float(timeout_s), stop_on_unknown=True)
+
+
+def _confirmed_write(result: object, confirmation: dict | None) -> dict:
+    out = dict(result) if isinstance(result, dict) else {"ok": True, "result": result}
+    if confirmation is None:
+        return out
+    out["confirmed"] = bool(confirmation.get("confirmed"))
+    out["confirmation"] = {
+        "source": "room_status_poller",
+        "confirmed_after_ms": confirmation.get("confirmed_after_ms"),
+        "unknown": bool(confirmation.get("unknown")) if not confirmation.get("confirmed") else False,
+        "age_s": confirmation.get("age_s"),
+        "last": confirmation.get("last"),
+    }
+    return out
+
+
+def _room_off_shared(room_id: int, confirm_timeout_s: float) -> dict:
+    """ROOM_OFF without the adapter's private poll loop; confirmation rides the shared room stream."""
+
+    result, reply = _device_write(f"room:{int(room_id)}", room_off, int(room_id), 0.0)
+    if reply is not None:
+        return reply
+    accepted = bool(result.get("ok")) if isinstance(result, dict) else True
+    conf = None
+    if accepted and float(confirm_timeout_s) > 0:
+        conf = _room_wait_off(int(room_id), float(confirm_timeout_s))
+    return _confirmed_write(result, conf)
+
+
+def _room_listen_shared(room_id: int, source_device_id: int, confirm_timeout_s: float) -> dict:
+    result, reply = _device_write(f"room:{int(room_id)}", room_listen, int(room_id), int(source_device_id), 0.0)
+    if reply is not None:
+        return reply
+    accepted = bool(result.get("ok")) if isinstance(result, dict) else True
+    conf = None
+    if accepted and float(confirm_timeout_s) > 0:
+        conf = _room_wait_listen_source(int(room_id), int(source_device_id), float(confirm_timeout_s))
+    return _confirmed_write(result, conf)
+
+
+def _room_wait_watch_source(room_id: int, device_id: int, selected: bool, timeout_s: float) -> dict:
+    """Wait until the room's Watch session is on device_id (selected) or no longer on it (deselected)."""
+
+    def _check(snap: object) -> bool | None:
+        if isinstance(snap, dict) and snap.get("ok") is False:
+            return False  # transient read failure: keep polling
+        active = _room_session_active(snap, "watch")
+        if active is False:
+            return not selected
+        current = _room_session_source(snap, "watch")
+        if current is None:
+            return None if active is None else (True if selected else None)
+        return (int(current) == int(device_id)) is bool(selected)
+
+    return _ROOM_STATUS.wait_for(int(room_id), "watch", _check, float(timeout_s), stop_on_unknown=True)
+
+
+def _room_select_video_send(room_id: int, device_id: int, deselect: bool) -> object:
+    # Ask the adapter not to confirm on its own (zero timeout) when its signature takes one.
+    try:
+        takes_timeout = len(inspect.signature(room_select_video_device).parameters) >= 4
+    except (TypeError, ValueError):
+        takes_timeout = False
+    if takes_timeout:
+        return room_select_video_device(int(room_id), int(device_id), bool(deselect), 0.0)
+    return room_select_video_device(int(room_id), int(device_id), bool(deselect))
+
+
+def _room_select_video_shared(room_id: int, device_id: int, deselect: bool, confirm_timeout_s: float) -> dict:
+    """SELECT_VIDEO_DEVICE on the room's lane; confirmation rides the shared room stream."""
+
+    result, reply = _device_write(f"room:{int(room_id)}", _room_select_video_send, int(room_id), int(device_id), bool(deselect))
+    if reply is not None:
+        return reply
+    accepted = bool(result.get("ok")) if isinstance(result, dict) else True
+    conf = None
+    if accepted and float(confirm_timeout_s) > 0:
+        conf = _room_wait_watch_source(int(room_id), int(device_id), not bool(deselect), float(confirm_timeout_s))
+    return _confirmed_write(result, conf)
+
+
+_ALL_ROOMS_TOKENS = {"all", "house", "whole house", "everywhere", "home", "entire house"}
+
+
+def _resolve_area_rooms(area: str) -> dict:
+    """Resolve a floor/area token (e.g., 'downstairs', 'Main Floor', 'all') to the rooms it contains.
+
+    Control4 inventory nests rooms under floor items (room.parentId -> floor.id), so an area is any
+    floor/building item. Returns {ok, area_id, area_name, rooms: [{room_id, name}]}.
+    """
+
+    token = str(area or "").strip()
+    if not token:
+        return {"ok": False, "error": "missing_area"}
+
+    items = get_all_items()
+    rooms = [i for i in items if isinstance(i, dict) and i.get("typeName") == "room" and i.get("id") is not None]
+
+    if token.lower() in _ALL_ROOMS_TOKENS:
+        return {
+            "ok": True,
+            "area_id": None,
+            "area_name": "all",
+            "rooms": [{"room_id": str(r.get("id")), "name": r.get("name")} for r in rooms],
+        }
+
+    areas = [
+        {"id": i.get("id"), "name": i.get("name")}
+        for i in items
+        if isinstance(i, dict) and i.get("typeName") in {"floor", "building"} and i.get("id") is not None
+    ]
+    if not areas:
+        return {"ok": False, "error": "no floors/areas found in inventory", "area": token}
+
+    resolved = resolve_named_candidates(token, areas, entity="area", name_key="name", id_key="id", max_candidates=10)
+    if not isinstance(resolved, dict) or not resolved.get("ok") or resolved.get("id") is None:
+        return {"ok": False, "error": "could not resolve area", "area": token, "details": resolved}
+
+    area_id = str(resolved.get("id"))
+    in_area = [
+        {"room_id": str(r.get("id")), "name": r.get("name")}
+        for r in rooms
+        if str(r.get("parentId")) == area_id
+    ]
+    return {"ok": True, "area_id": area_id, "area_name": resolved.get("name"), "rooms": in_area}
+
+
+def _resolve_room_targets(
+    room_ids: list | None,
+    room_names: list | None,
+    area: str | None,
+    *,
+    require_unique: bool = True,
+    include_candidates: bool = True,
+) -> dict:
+    """Resolve a multi-room target (ids, names and/or an area token) to a de-duplicated room list.
+
+    Any name that fails to resolve makes the whole result not-ok so write tools never act on a partial set.
+    """
+
+    targets: list[dict] = []
+    seen: set[int] = set()
+    errors: list[dict] = []
+    area_res: dict | None = None
+
+    def _add(rid: int, name: object, source: str) -> None:
+        if rid in seen:
+            return
+        seen.add(rid)
+        targets.append({"room_id": int(rid), "room_name": (str(name) if name is not None else None), "source": source})
+
+    for raw in list(room_ids or []):
+        try:
+            _add(int(str(raw).strip()), None, "room_id")
+        except Exception:
+            errors.append({"room_id": raw, "error": "invalid_room_id"})
+
+    for raw in list(room_names or []):
+        rr = resolve_room(str(raw or ""), require_unique=bool(require_unique), include_candidates=bool(include_candidates))
+        if not isinstance(rr, dict) or not rr.get("ok") or rr.get("room_id") is None:
+            errors.append({"room_name": raw, "error": "could not resolve room", "details": rr})
+            continue
+        try:
+            _add(int(rr.get("room_id")), rr.get("name"), "room_name")
+        except Exception:
+            errors.append({"room_name": raw, "error": "resolve_room_invalid_room_id", "details": rr})
+
+    if area is not None and str(area).strip():
+        area_res = _resolve_area_rooms(str(area))
+        if not area_res.get("ok"):
+            errors.append({"area": area, "error": area_res.get("error"), "details": area_res.get("details")})
+        else:
+            for r in area_res.get("rooms") or []:
+                try:
+                    _add(int(r.get("room_id")), r.get("name"), "area")
+                except Exception:
+                    continue
+
+    # Backfill display names for rooms given by id.
+    if any(t.get("room_name") is None for t in targets):
+        try:
+            names = {str(r.get("id")): r.get("name") for r in (list_rooms() or []) if isinstance(r, dict)}
+            for t in targets:
+                if t.get("room_name") is None:
+                    t["room_name"] = names.get(str(t["room_id"]))
+        except Exception:
+            pass
+
+    out: dict = {"ok": not errors and bool(targets), "rooms": targets}
+    if area_res is not None:
+        out["area"] = {k: area_res.get(k) for k in ("area_id", "area_name")}
+    if errors:
+        out["error"] = "could not resolve rooms"
+        out["errors"] = errors
+    elif not targets:
+        out["error"] = "no rooms matched"
+    return out
+
+
 # Return JSON errors, but preserve correct HTTP status codes (e.g., 404).
 @app.errorhandler(HTTPException)
 def _handle_http_exception(e: HTTPException):
@@ -595,8 +1570,7 @@ def c4_tv_off_last_tool(confirm_timeout_s: float = 10.0, session_id: str | None
     if room_id is None:
         return {"ok": False, "error": "no remembered TV/media room in this session yet", "session_id": sid}
 
-    result = room_off(int(room_id), float(confirm_timeout_s))
-    out = result if isinstance(result, dict) else {"ok": True, "result": result}
+    out = _room_off_shared(int(room_id), float(confirm_timeout_s))
     _remember_tool_call("c4_tv_off_last", {"confirm_timeout_s": confirm_timeout_s}, out)
     return out
 
@@ -644,10 +1618,20 @@ def c4_lights_set_last_tool(
             continue
         try:
             if ramp_ms is not None:
-                rr = light_ramp(int(did_i), int(target_level), int(ramp_ms))
+                rr, coalesced = _device_write(
+                    did_i, light_ramp, int(did_i), int(target_level), int(ramp_ms), coalesce="level", detail={"level": int(target_level)}
+                )
+                if coalesced is not None:
+                    results.append({**coalesced, "device_id": did_i, "name": row.get("name")})
+                    continue
                 results.append({"device_id": did_i, "ok": True, "ramped": True, "result": rr, "name": row.get("name")})
             else:
-                rr = light_set_level(int(did_i), int(target_level))
+                rr, coalesced = _device_write(
+                    did_i, light_set_level, int(did_i), int(target_level), coalesce="level", detail={"level": int(target_level)}
+                )
+                if coalesced is not None:
+                    results.append({**coalesced, "device_id": did_i, "name": row.get("name")})
+                    continue
                 results.append({"device_id": did_i, "ok": True, "state": bool(rr), "name": row.get("name")})
         except Exception as e:
             results.append({"device_id": did_i, "ok": False, "error": repr(e), "name": row.get("name")})
@@ -699,6 +1683,15 @@ def c4_server_info_tool() -> dict:
             "sample_tools": tool_names[:50],
         },
         "control4_config": config_diagnostics(),
+        "lock_engine": _LOCK_ENGINE.stats(),
+        "device_queue": _DEVICE_QUEUE.stats(),
+        "room_status": _ROOM_STATUS.stats(),
+        "events": _EVENTS.stats(),
+        "variable_cache": _VARS.stats(),
+        "history": _HISTORY.stats(),
+        "command_catalog": _COMMANDS.stats(),
+        "resolution_tokens": _RESOLUTIONS.stats(),
+        "prewarm": _PREWARM.view(),
     }
 
 
@@ -709,72 +1702,394 @@ def c4_director_methods() -> dict:
     return {"ok": True, "methods": names}
 
 
-@Mcp.tool(name="c4_item_variables", description="Get raw Director variables for an item (debug).")
-def c4_item_variables(device_id: str) -> dict:
-    vars_ = item_get_variables(int(device_id))
-    return {"ok": True, "device_id": str(device_id), "variables": vars_}
-
-
-@Mcp.tool(name="c4_item_bindings", description="Get Director bindings for an item (debug).")
-def c4_item_bindings(device_id: str) -> dict:
-    result = item_get_bindings(int(device_id))
-    return result if isinstance(result, dict) else {"ok": True, "result": result}
-
-
-@Mcp.tool(name="c4_item_commands", description="Get available Director commands for an item (debug).")
-def c4_item_commands(device_id: str) -> dict:
-    result = item_get_commands(int(device_id))
-    return result if isinstance(result, dict) else {"ok": True, "result": result}
-
-
-@Mcp.tool(name="c4_item_execute_command", description="Execute a specific Director command by command_id (debug).")
-def c4_item_execute_command(device_id: str, command_id: int) -> dict:
-    result = item_execute_command(int(device_id), int(command_id))
-    return result if isinstance(result, dict) else {"ok": True, "result": result}
+# Appended to descriptions of reads served by _VARS, so callers know the value can be stale.
+_TTL_CACHE_NOTE = (
+    "TTL-cached per device: the value may be up to max_age_s old (default C4_VARCACHE_MAX_AGE_S, 5s) and nothing "
+    "refreshes it in between unless C4_VARCACHE_BACKGROUND is enabled; cache.age_s reports its age and "
+    "refresh=true forces a live read."
+)
 
 
 @Mcp.tool(
-    name="c4_item_send_command",
-    description="Send a named Director command to an item (debug). Example: command='UNLOCK' or 'CLOSE'.",
+    name="c4_item_variables",
+    description="Get raw Director variables for an item (debug). " + _TTL_CACHE_NOTE,
 )
-def c4_item_send_command(device_id: str, command: str, params: dict | None = None) -> dict:
-    result = item_send_command(int(device_id), str(command or ""), params)
-    return result if isinstance(result, dict) else {"ok": True, "result": result}
+def c4_item_variables(device_id: str, refresh: bool = False, max_age_s: float | None = None) -> dict:
+    vars_, age, source = _VARS.read_variables(int(device_id), max_age_s=max_age_s, refresh=bool(refresh))
+    return {"ok": True, "device_id": str(device_id), "variables": vars_, "cache": _cache_meta(age, source)}
+
 
 @Mcp.tool(
-    name="c4_room_select_video_device",
+    name="c4_device_history",
     description=(
-        "Select a room's active video device (i.e., trigger the Control4 Watch flow for a given HDMI/source device). "
-        "This is often required before launching Roku apps so the TV is on the correct input."
+        "Recent state changes for a device from in-memory ring buffers (no Director round-trip). "
+        "Fed by reads the server already does: variable polls, lock state, contact/motion and light level reads. "
+        "Optional variable filter (e.g. 'lock_state', 'contact_state', 'motion', 'light_level' or a Director variable name); "
+        "value returns when that value was last entered (e.g. value='unlocked'). current_for_s answers 'how long has it been open'."
     ),
 )
-def c4_room_select_video_device(room_id: str, device_id: str, deselect: bool = False) -> dict:
-    result = room_select_video_device(int(room_id), int(device_id), bool(deselect))
-    return result if isinstance(result, dict) else {"ok": True, "result": result}
+def c4_device_history_tool(
+    device_id: str,
+    variable: str | None = None,
+    value: str | None = None,
+    limit: int = 20,
+    since_s: float | None = None,
+) -> dict:
+    series = _HISTORY.query(int(device_id), variable=variable, limit=int(limit), since_s=since_s)
+    out: dict = {"ok": True, "device_id": str(device_id), "count": len(series), "series": series}
+    if not series:
+        out["note"] = "no history yet; state is recorded as this server reads the device"
+    if value is not None and str(value).strip():
+        needle = str(value).strip().lower()
+        last: dict | None = None
+        for s in series:
+            for row in s.get("changes") or []:
+                if str(row.get("value")).strip().lower() == needle and (last is None or row["ts"] > last["ts"]):
+                    last = {"variable": s.get("variable"), "ts": row["ts"], "ago_s": round(time.time() - row["ts"], 1)}
+        out["last_entered"] = last
+    return out
 
 
-@Mcp.tool(
-    name="c4_room_off",
-    description=(
-        "Turn off all Audio/Video in a room (ROOM_OFF) and best-effort confirm Watch becomes inactive. "
-        "Returns accepted/confirmed semantics."
+# ---- Command catalogs ----
+
+
+_INVENTORY_CHECK_S = float(os.getenv("C4_INVENTORY_CHECK_S", "60") or "60")
+_INVENTORY_LOCK = threading.Lock()
+_INVENTORY_STATE: dict = {"generation": None, "drivers": {}, "room_members": {}, "checked_at": 0.0}
+
+
+def _inventory_generation(force: bool = False) -> tuple[str, dict]:
+    """(generation, {device_id: driver_key}) from get_all_items(), recomputed at most every C4_INVENTORY_CHECK_S.
+
+    The generation changes whenever a device is added/removed or its driver (control/proxy/protocol file)
+    changes, so anything derived from driver behaviour can be keyed by it.
+    """
+
+    with _INVENTORY_LOCK:
+        if not force and _INVENTORY_STATE["generation"] is not None and time.monotonic() - _INVENTORY_STATE["checked_at"] < _INVENTORY_CHECK_S:
+            return _INVENTORY_STATE["generation"], _INVENTORY_STATE["drivers"]
+
+    drivers: dict[int, tuple] = {}
+    members: dict[int, list] = {}
+    for i in get_all_items() or []:
+        if not isinstance(i, dict) or i.get("id") is None:
+            continue
+        try:
+            did = int(i.get("id"))
+        except Exception:
+            continue
+        drivers[did] = (str(i.get("control") or ""), str(i.get("proxy") or ""), str(i.get("protocolFilename") or ""), str(i.get("typeName") or ""))
+        room = next((i.get(k) for k in ("roomId", "room_id", "parentId") if i.get(k) is not None), None)
+        if room is not None and str(room).isdigit() and int(room) != did:
+            members.setdefault(int(room), []).append((did, drivers[did]))
+    digest = hashlib.blake2b(repr(sorted(drivers.items())).encode("utf-8"), digest_size=6).hexdigest()
+    room_members = {rid: tuple(sorted(rows)) for rid, rows in members.items()}
+
+    with _INVENTORY_LOCK:
+        _INVENTORY_STATE.update({"generation": digest, "drivers": drivers, "room_members": room_members, "checked_at": time.monotonic()})
+    return digest, drivers
+
+
+def _filter_commands(payload: object, search: str | None) -> object | None:
+    """Locally filter a command listing by a case-insensitive substring; None when the shape is unknown."""
+
+    needle = str(search or "").strip().lower()
+    if not needle:
+        return payload
+
+    def _match(row: object) -> bool:
+        if isinstance(row, dict):
+            for k in ("command", "name", "display", "label", "id"):
+                if needle in str(row.get(k) or "").lower():
+                    return True
+            return False
+        return needle in str(row).lower()
+
+    if isinstance(payload, list):
+        return [r for r in payload if _match(r)]
+    if isinstance(payload, dict):
+        for k in ("commands", "result", "items"):
+            if isinstance(payload.get(k), list):
+                out = dict(payload)
+                out[k] = [r for r in payload[k] if _match(r)]
+                if "count" in out:
+                    out["count"] = len(out[k])
+                out["search"] = str(search)
+                return out
+    return None
+
+
+class _CommandCatalog:
+    """Per-device and per-room command listings keyed by driver and inventory generation.
+
+    Command sets only change with driver updates, so listings are kept until the device's driver key (for a
+    room: the devices bound to it and their drivers) or the inventory generation changes, or max_age_s passes
+    as a safety net. Error results are not cached.
+    """
+
+    def __init__(self, max_age_s: float = 6 * 60 * 60) -> None:
+        self.max_age_s = float(max_age_s)
+        self._lock = threading.Lock()
+        self._rows: dict[tuple[str, int], dict] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _key_for(self, kind: str, ident: int) -> tuple[str, object]:
+        generation, drivers = _inventory_generation()
+        if kind == "room":
+            with _INVENTORY_LOCK:
+                return generation, _INVENTORY_STATE["room_members"].get(int(ident), ())
+        return generation, drivers.get(int(ident))
+
+    def get(self, kind: str, ident: int, fetch, refresh: bool = False) -> tuple[object, float, str]:
+        """(listing, age_s, 'cache'|'live') for kind 'item' (device) or 'room'."""
+
+        generation, driver = self._key_for(kind, ident)
+        key = (kind, int(ident))
+        if not refresh:
+            with self._lock:
+                row = self._rows.get(key)
+                if row is not None and row["generation"] == generation and row["driver"] == driver:
+                    age = time.monotonic() - row["at"]
+                    if age <= self.max_age_s:
+                        self.hits += 1
+                        return row["payload"], age, "cache"
+        with self._lock:
+            self.misses += 1
+        payload = fetch()
+        if not (isinstance(payload, dict) and payload.get("ok") is False):
+            with self._lock:
+                self._rows[key] = {"payload": payload, "generation": generation, "driver": driver, "at": time.monotonic()}
+        return payload, 0.0, "live"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            kinds = Counter(k[0] for k in self._rows)
+            return {
+                "devices": kinds.get("item", 0),
+                "rooms": kinds.get("room", 0),
+                "hits": self.hits,
+                "misses": self.misses,
+                "generation": _INVENTORY_STATE.get("generation"),
+            }
+
+
+_COMMANDS = _CommandCatalog(max_age_s=float(os.getenv("C4_COMMAND_CATALOG_MAX_AGE_S", str(6 * 60 * 60)) or str(6 * 60 * 60)))
+
+
+def _item_commands(device_id: int, refresh: bool = False) -> tuple[object, float, str]:
+    return _COMMANDS.get("item", int(device_id), lambda: item_get_commands(int(device_id)), refresh)
+
+
+def _room_commands(room_id: int, search: str | None = None, refresh: bool = False) -> tuple[object, float, str]:
+    payload, age, source = _COMMANDS.get("room", int(room_id), lambda: room_list_commands(int(room_id), None), refresh)
+    filtered = _filter_commands(payload, search)
+    if filtered is None:
+        # Unknown listing shape: let the adapter apply its own search.
+        return room_list_commands(int(room_id), str(search)), 0.0, "live"
+    return filtered, age, source
+
+
+@Mcp.tool(name="c4_item_bindings", description="Get Director bindings for an item (debug).")
+def c4_item_bindings(device_id: str) -> dict:
+    result = item_get_bindings(int(device_id))
+    return result if isinstance(result, dict) else {"ok": True, "result": result}
+
+
+@Mcp.tool(
+    name="c4_item_commands",
+    description=(
+        "Get available Director commands for an item (debug). Cached per device until its driver or the inventory "
+        "changes; search filters locally (case-insensitive substring), refresh=true forces a live read."
     ),
 )
-def c4_room_off_tool(room_id: str, confirm_timeout_s: float = 10.0) -> dict:
-    result = room_off(int(room_id), float(confirm_timeout_s))
+def c4_item_commands(device_id: str, search: str | None = None, refresh: bool = False) -> dict:
+    result, age, source = _item_commands(int(device_id), bool(refresh))
+    filtered = _filter_commands(result, search)
+    out = filtered if filtered is not None else result
+    out = dict(out) if isinstance(out, dict) else {"ok": True, "result": out}
+    out["cache"] = _cache_meta(age, source)
+    return out
+
+
+@Mcp.tool(name="c4_item_execute_command", description="Execute a specific Director command by command_id (debug).")
+def c4_item_execute_command(device_id: str, command_id: int) -> dict:
+    result = item_execute_command(int(device_id), int(command_id))
+    return result if isinstance(result, dict) else {"ok": True, "result": result}
+
+
+@Mcp.tool(
+    name="c4_item_send_command",
+    description="Send a named Director command to an item (debug). Example: command='UNLOCK' or 'CLOSE'.",
+)
+def c4_item_send_command(device_id: str, command: str, params: dict | None = None) -> dict:
+    result = item_send_command(int(device_id), str(command or ""), params)
     return result if isinstance(result, dict) else {"ok": True, "result": result}
 
+@Mcp.tool(
+    name="c4_room_select_video_device",
+    description=(
+        "Select a room's active video device (i.e., trigger the Control4 Watch flow for a given HDMI/source device). "
+        "This is often required before launching Roku apps so the TV is on the correct input."
+    ),
+)
+def c4_room_select_video_device(room_id: str, device_id: str, deselect: bool = False, confirm_timeout_s: float = 10.0) -> dict:
+    return _room_select_video_shared(int(room_id), int(device_id), bool(deselect), float(confirm_timeout_s))
+
+
+@Mcp.tool(
+    name="c4_room_off",
+    description=(
+        "Turn off all Audio/Video in a room (ROOM_OFF) and best-effort confirm Watch becomes inactive. "
+        "Returns accepted/confirmed semantics."
+    ),
+)
+def c4_room_off_tool(room_id: str, confirm_timeout_s: float = 10.0) -> dict:
+    return _room_off_shared(int(room_id), float(confirm_timeout_s))
+
+
+def _room_av_status(room_id: int, max_age_s: float | None = None) -> dict:
+    """Watch and Listen status for a room, read together; active is None when neither payload says."""
+
+    watch, _ = _ROOM_STATUS.read(int(room_id), "watch", max_age_s)
+    listen, _ = _ROOM_STATUS.read(int(room_id), "listen", max_age_s)
+    flags = [_room_session_active(watch, "watch"), _room_session_active(listen, "listen")]
+    active = True if True in flags else (False if False in flags else None)
+    return {"active": active, "watch_active": flags[0], "listen_active": flags[1]}
+
+
+@Mcp.tool(
+    name="c4_house_av_off",
+    description=(
+        "Turn off Audio/Video (ROOM_OFF) in every room with an active Watch or Listen session, concurrently, "
+        "and confirm all rooms in one shared wait. Defaults to the whole house; scope with area (e.g. a floor), "
+        "room_ids or room_names. Rooms already off are skipped."
+    ),
+)
+def c4_house_av_off_tool(
+    area: str | None = None,
+    room_ids: list[str] | None = None,
+    room_names: list[str] | None = None,
+    confirm_timeout_s: float = 10.0,
+    concurrency: int = 8,
+    require_unique: bool = True,
+    include_candidates: bool = True,
+    dry_run: bool = False,
+) -> dict:
+    scoped = bool(room_ids) or bool(room_names) or (area is not None and str(area).strip())
+    targets = _resolve_room_targets(
+        room_ids,
+        room_names,
+        (area if scoped else "house"),
+        require_unique=bool(require_unique),
+        include_candidates=bool(include_candidates),
+    )
+    if not targets.get("ok"):
+        return targets
+
+    rooms = list(targets.get("rooms") or [])
+    workers = max(1, int(concurrency))
+    started = time.perf_counter()
+
+    status_rows = _fan_out(lambda r: _room_av_status(int(r["room_id"])), rooms, workers)
+    to_off: list[dict] = []
+    already_off: list[dict] = []
+    for room, row in zip(rooms, status_rows):
+        entry = {"room_id": str(room["room_id"]), "room_name": room.get("room_name")}
+        st = row.get("result") if row.get("ok") else None
+        if isinstance(st, dict) and st.get("active") is False:
+            already_off.append(entry)
+            continue
+        # Rooms whose status cannot be read are turned off anyway; ROOM_OFF on an idle room is harmless.
+        entry["status"] = st if st is not None else {"error": row.get("error")}
+        to_off.append(entry)
+
+    planned = {
+        "rooms": to_off,
+        "already_off": already_off,
+        "confirm_timeout_s": float(confirm_timeout_s),
+        "concurrency": workers,
+    }
+    if bool(dry_run):
+        return {"ok": True, "dry_run": True, "planned": planned, "area": targets.get("area")}
+
+    def _off(entry: dict) -> dict:
+        rid = int(entry["room_id"])
+        res, reply = _device_write(f"room:{rid}", room_off, rid, 0.0)
+        if reply is not None:
+            return reply
+        return res if isinstance(res, dict) else {"ok": True, "result": res}
+
+    off_rows = _fan_out(_off, to_off, workers)
+
+    results: list[dict] = []
+    accepted: list[int] = []
+    for entry, row in zip(to_off, off_rows):
+        res = row.get("result") if row.get("ok") else None
+        item = {"room_id": entry["room_id"], "room_name": entry.get("room_name"), "elapsed_ms": row.get("elapsed_ms")}
+        if res is None:
+            item.update({"ok": False, "accepted": False, "error": row.get("error")})
+        else:
+            item.update({"ok": bool(res.get("ok")), "accepted": bool(res.get("ok")), "room_off": res})
+            if res.get("ok"):
+                accepted.append(int(entry["room_id"]))
+        results.append(item)
+
+    def _wait_off(rid: int) -> dict:
+        return _room_wait_off(rid, float(confirm_timeout_s))
+
+    wait_rows = _fan_out(_wait_off, accepted, max(1, len(accepted)), deadline_s=float(confirm_timeout_s) + 5.0)
+    confirmation = {
+        rid: (row.get("result") if row.get("ok") else {"confirmed": False, "last": None, "error": row.get("error")})
+        for rid, row in zip(accepted, wait_rows)
+    }
+    for item in results:
+        st = confirmation.get(int(item["room_id"]))
+        if st is None:
+            continue
+        item["confirmed"] = bool(st.get("confirmed"))
+        item["confirmed_after_ms"] = st.get("confirmed_after_ms")
+        if not st.get("confirmed"):
+            item["confirm_error"] = st.get("error") or ("unknown" if st.get("unknown") else "timeout")
+            item["last_status"] = st.get("last")
+
+    failed = [r["room_id"] for r in results if not r.get("ok")]
+    out = {
+        "ok": not failed,
+        "room_count": len(rooms),
+        "turned_off": len(accepted),
+        "confirmed": sum(1 for r in results if r.get("confirmed")),
+        "already_off": already_off,
+        "failed_room_ids": failed,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000.0, 2),
+        "area": targets.get("area"),
+        "results": results,
+    }
+    _remember_tool_call(
+        "c4_house_av_off",
+        {"area": area, "room_ids": room_ids, "room_names": room_names},
+        out,
+    )
+    return out
+
 
 @Mcp.tool(
     name="c4_room_list_commands",
     description=(
         "List available room-level commands (GET /rooms/{room_id}/commands). "
-        "This is the most universal way to control AV/TV, audio, and navigation in Control4 rooms."
+        "This is the most universal way to control AV/TV, audio, and navigation in Control4 rooms. "
+        "Cached per room until the inventory changes; search filters locally, refresh=true forces a live read."
     ),
 )
-def c4_room_list_commands_tool(room_id: str, search: str | None = None) -> dict:
-    result = room_list_commands(int(room_id), (str(search) if search is not None else None))
-    return result if isinstance(result, dict) else {"ok": True, "result": result}
+def c4_room_list_commands_tool(room_id: str, search: str | None = None, refresh: bool = False) -> dict:
+    result, age, source = _room_commands(int(room_id), (str(search) if search is not None else None), bool(refresh))
+    out = dict(result) if isinstance(result, dict) else {"ok": True, "result": result}
+    out["cache"] = _cache_meta(age, source)
+    return out
 
 
 @Mcp.tool(
@@ -796,9 +2111,8 @@ def c4_room_list_video_devices_tool(room_id: str) -> dict:
         "Returns active flag and the current configured sources when available."
     ),
 )
-def c4_room_watch_status_tool(room_id: str) -> dict:
-    result = room_watch_status(int(room_id))
-    return result if isinstance(result, dict) else {"ok": True, "result": result}
+def c4_room_watch_status_tool(room_id: str, max_age_s: float | None = None) -> dict:
+    return _room_status_view(int(room_id), "watch", max_age_s)
 
 
 @Mcp.tool(
@@ -883,13 +2197,13 @@ def c4_room_presence_report_tool(
 
     if bool(include_watch_status):
         try:
-            report["watch_status"] = room_watch_status(int(rid))
+            report["watch_status"] = _room_status_view(int(rid), "watch")
         except Exception as e:
             report["watch_status"] = {"ok": False, "error": "watch_status_failed", "details": str(e)}
 
     if bool(include_listen_status):
         try:
-            report["listen_status"] = room_listen_status(int(rid))
+            report["listen_status"] = _room_status_view(int(rid), "listen")
         except Exception as e:
             report["listen_status"] = {"ok": False, "error": "listen_status_failed", "details": str(e)}
 
@@ -918,7 +2232,9 @@ def c4_room_send_command_tool(room_id: str, command: str, params: dict | None =
     name="c4_debug_trace_command",
     description=(
         "Force-send a named Director command and poll for variable/state changes (debug). "
-        "Useful when cached lock state is stale."
+        "Useful when cached lock state is stale. settle_s switches to diff mode on the shared variable watcher: "
+        "only changes are returned and the trace ends once watched variables are quiet for settle_s. "
+        "For a live stream, POST the same arguments to /mcp/trace (NDJSON, or SSE with Accept: text/event-stream)."
     ),
 )
 def c4_debug_trace_command(
@@ -928,7 +2244,34 @@ def c4_debug_trace_command(
     watch_var_names: list[str] | None = None,
     poll_interval_s: float = 0.5,
     timeout_s: float = 30.0,
+    settle_s: float | None = None,
 ) -> dict:
+    if settle_s is not None:
+        records = list(
+            _trace_events(
+                int(device_id),
+                str(command or ""),
+                params,
+                watch_var_names,
+                float(timeout_s),
+                float(settle_s),
+                float(poll_interval_s),
+            )
+        )
+        start = next((r for r in records if r.get("type") == "start"), {})
+        sent = next((r for r in records if r.get("type") == "sent"), {})
+        end = next((r for r in records if r.get("type") == "end"), {})
+        return {
+            "ok": bool((sent.get("result") or {}).get("ok", True)) if isinstance(sent.get("result"), dict) else True,
+            "device_id": str(device_id),
+            "command": str(command or ""),
+            "mode": "diff",
+            "baseline": start.get("baseline"),
+            "send": sent.get("result"),
+            "changes": [r for r in records if r.get("type") == "change"],
+            "end_reason": end.get("reason"),
+            "elapsed_ms": end.get("elapsed_ms"),
+        }
     result = debug_trace_command(
         int(device_id),
         str(command or ""),
@@ -954,11 +2297,13 @@ def c4_find_rooms_tool(search: str, limit: int = 10, include_raw: bool = False)
     name="c4_resolve_room",
     description=(
         "Resolve a room name to a single room_id (best-effort). Returns candidates when ambiguous. "
-        "Use c4_find_rooms if you want to pick manually."
+        "Use c4_find_rooms if you want to pick manually. On success also returns a resolution_token that the "
+        "*_by_name tools accept in place of the room name."
     ),
 )
 def c4_resolve_room_tool(name: str, require_unique: bool = True, include_candidates: bool = True) -> dict:
-    return resolve_room(str(name or ""), require_unique=bool(require_unique), include_candidates=bool(include_candidates))
+    result = resolve_room(str(name or ""), require_unique=bool(require_unique), include_candidates=bool(include_candidates))
+    return _with_resolution_token(result, room=_resolved_room_part(result, str(name or "")))
 
 
 @Mcp.tool(name="c4_list_typenames", description="List Control4 item typeName values and counts (discovery).")
@@ -1071,22 +2416,30 @@ def c4_scene_activate_tool(device_id: str, command: str | None = None, dry_run:
     name="c4_scene_activate_by_name",
     description=(
         "Resolve and activate a scene by name (best-effort). Uses UI Button devices as a proxy for scenes. "
-        "Optionally scope the search by room_name."
+        "Optionally scope the search by room_name. Pass resolution_token from c4_resolve/c4_resolve_device/c4_resolve_room instead of names to skip re-resolution."
     ),
 )
 def c4_scene_activate_by_name_tool(
-    scene_name: str,
+    scene_name: str | None = None,
     room_name: str | None = None,
     require_unique: bool = True,
     include_candidates: bool = True,
     command: str | None = None,
     dry_run: bool = False,
+    resolution_token: str | None = None,
 ) -> dict:
+    tok, tok_err = _resolution_from_token(resolution_token, category="scenes", device_name=scene_name, room_name=room_name)
+    if tok_err is not None:
+        return tok_err
+    scene_name = scene_name or (tok.get("device") or {}).get("name")
+    if not str(scene_name or "").strip():
+        return {"ok": False, "error": "scene_name or resolution_token is required"}
+
     resolved_room_id: int | None = None
     resolved_room_name: str | None = None
 
-    if room_name is not None and str(room_name).strip():
-        rr = resolve_room(
+    if tok.get("room") is not None or (room_name is not None and str(room_name).strip()):
+        rr = tok.get("room") or resolve_room(
             str(room_name),
             require_unique=bool(require_unique),
             include_candidates=bool(include_candidates),
@@ -1099,7 +2452,7 @@ def c4_scene_activate_by_name_tool(
             resolved_room_id = None
         resolved_room_name = str(rr.get("name")) if rr.get("name") is not None else None
 
-    rd = resolve_device(
+    rd = tok.get("device") or resolve_device(
         str(scene_name),
         category="scenes",
         room_id=resolved_room_id,
@@ -1193,26 +2546,35 @@ def c4_alarm_arm_stay_tool(device_id: str, code: str | None = None, confirm_time
         "Fast-path: resolve a scene (UI Button) by name and set its on/off state in a single call. "
         "This is ideal for devices like 'Space Heater' that expose SetState(State=On|Off). "
         "Optionally scope the search by room_name. Best-effort confirmation polls the STATE variable."
+        " Pass resolution_token from c4_resolve/c4_resolve_device/c4_resolve_room instead of names to skip re-resolution."
     ),
 )
 def c4_scene_set_state_by_name_tool(
-    scene_name: str,
-    state: str,
+    scene_name: str | None = None,
+    state: str | None = None,
     room_name: str | None = None,
     require_unique: bool = True,
     include_candidates: bool = True,
     confirm_timeout_s: float = 2.0,
     dry_run: bool = False,
+    resolution_token: str | None = None,
 ) -> dict:
     state_norm = str(state or "").strip().lower()
     if state_norm not in {"on", "off"}:
         return {"ok": False, "error": "state must be 'on' or 'off'"}
 
+    tok, tok_err = _resolution_from_token(resolution_token, category="scenes", device_name=scene_name, room_name=room_name)
+    if tok_err is not None:
+        return tok_err
+    scene_name = scene_name or (tok.get("device") or {}).get("name")
+    if not str(scene_name or "").strip():
+        return {"ok": False, "error": "scene_name or resolution_token is required"}
+
     resolved_room_id: int | None = None
     resolved_room_name: str | None = None
 
-    if room_name is not None and str(room_name).strip():
-        rr = resolve_room(
+    if tok.get("room") is not None or (room_name is not None and str(room_name).strip()):
+        rr = tok.get("room") or resolve_room(
             str(room_name),
             require_unique=bool(require_unique),
             include_candidates=bool(include_candidates),
@@ -1225,7 +2587,7 @@ def c4_scene_set_state_by_name_tool(
             resolved_room_id = None
         resolved_room_name = str(rr.get("name")) if rr.get("name") is not None else None
 
-    rd = resolve_device(
+    rd = tok.get("device") or resolve_device(
         str(scene_name),
         category="scenes",
         room_id=resolved_room_id,
@@ -1320,6 +2682,8 @@ def c4_contact_list_tool() -> dict:
 )
 def c4_contact_get_state_tool(device_id: str, timeout_s: float = 6.0) -> dict:
     result = contact_get_state(int(device_id), float(timeout_s))
+    if isinstance(result, dict) and result.get("ok") is not False:
+        _record_sensor_history(device_id, _sensor_fields(result))
     return result if isinstance(result, dict) else {"ok": True, "result": result}
 
 
@@ -1345,9 +2709,207 @@ def c4_motion_list_tool() -> dict:
 )
 def c4_motion_get_state_tool(device_id: str, timeout_s: float = 6.0) -> dict:
     result = motion_get_state(int(device_id), float(timeout_s))
+    if isinstance(result, dict) and result.get("ok") is not False:
+        _record_sensor_history(device_id, _sensor_fields(result, "motion"))
     return result if isinstance(result, dict) else {"ok": True, "result": result}
 
 
+_OPEN_WORDS = {"open", "opened", "true", "1", "on", "yes", "fault", "faulted"}
+_CLOSED_WORDS = {"closed", "close", "false", "0", "off", "no", "normal", "secure"}
+
+
+def _sensor_fields(payload: object, kind: str = "contact") -> dict:
+    """Compact parsed fields from a contact_get_state / motion_get_state payload (shapes vary by driver).
+
+    open is only derived for kind "contact": a motion sensor's generic state ("on"/"active") means motion,
+    not an open door or window.
+    """
+
+    sources: list[dict] = []
+    if isinstance(payload, dict):
+        for k in ("parsed", "fields", "state"):
+            if isinstance(payload.get(k), dict):
+                sources.append({_norm_key(kk): vv for kk, vv in payload[k].items()})
+        sources.append({_norm_key(kk): vv for kk, vv in payload.items() if not isinstance(vv, (dict, list))})
+        for k in ("variables", "vars", "raw"):
+            if payload.get(k) is not None:
+                sources.append(_flatten_state(payload.get(k)))
+
+    def _pick(*keys: str) -> object:
+        for src in sources:
+            for k in keys:
+                if src.get(k) is not None:
+                    return src.get(k)
+        return None
+
+    def _as_bool(v: object, yes: set, no: set) -> bool | None:
+        if isinstance(v, bool):
+            return v
+        t = str(v).strip().lower() if v is not None else ""
+        if t in yes:
+            return True
+        if t in no:
+            return False
+        return None
+
+    def _as_num(v: object) -> float | int | None:
+        try:
+            f = float(v)  # type: ignore[arg-type]
+        except Exception:
+            return None
+        return int(f) if f.is_integer() else round(f, 1)
+
+    is_open = None
+    if kind == "contact":
+        is_open = _as_bool(_pick("isopen", "open"), {"true", "1", "yes"}, {"false", "0", "no"})
+        if is_open is None:
+            is_open = _as_bool(_pick("contactstate", "contact", "state", "sensorstate"), _OPEN_WORDS, _CLOSED_WORDS)
+    motion_keys = ("motiondetected", "motion", "occupied", "motionstate") + (("state", "sensorstate") if kind == "motion" else ())
+    motion = _as_bool(_pick(*motion_keys), _OPEN_WORDS | {"detected", "active"}, _CLOSED_WORDS | {"clear", "inactive"})
+
+    return {
+        "open": is_open,
+        "motion": motion,
+        "battery_level": _as_num(_pick("batterylevel", "battery", "batterypercent")),
+        "temperature": _as_num(_pick("temperature", "temperaturef", "temp")),
+        "last_changed": _pick("lastchanged", "lastupdate", "updated", "timestamp"),
+    }
+
+
+def _record_sensor_history(device_id: object, fields: dict) -> None:
+    if fields.get("open") is not None:
+        _HISTORY.record(device_id, "contact_state", "open" if fields["open"] else "closed")
+    if fields.get("motion") is not None:
+        _HISTORY.record(device_id, "motion", "detected" if fields["motion"] else "clear")
+    if fields.get("battery_level") is not None:
+        _HISTORY.record(device_id, "battery_level", fields["battery_level"])
+
+
+@Mcp.tool(
+    name="c4_sensors_get_states",
+    description=(
+        "Read many contact and/or motion sensors at once (e.g. 'which doors and windows are open?'). "
+        "Devices come from c4_contact_list / c4_motion_list, optionally filtered by kinds, room, name or device ids; "
+        "reads run with bounded concurrency under one overall deadline_s. Returns a compact table "
+        "(open, motion, battery_level, temperature) with per-device freshness."
+    ),
+)
+def c4_sensors_get_states_tool(
+    kinds: list[str] | None = None,
+    room_id: str | None = None,
+    room_name: str | None = None,
+    name_filter: str | None = None,
+    device_ids: list[str] | None = None,
+    only_open: bool = False,
+    concurrency: int = 8,
+    deadline_s: float = 8.0,
+    timeout_s: float = 4.0,
+) -> dict:
+    wanted = {str(k or "").strip().lower() for k in (kinds or ["contacts", "motion"])}
+    wanted = {"contacts" if k in {"contact", "contacts"} else k for k in wanted}
+    if not wanted or not wanted <= {"contacts", "motion"}:
+        return {"ok": False, "error": "kinds must be a subset of: contacts, motion"}
+
+    room_key = str(room_id).strip() if room_id is not None and str(room_id).strip() else None
+    room_needle = str(room_name or "").strip().lower() if room_key is None else ""
+    needle = str(name_filter or "").strip().lower()
+    id_set = {str(d).strip() for d in (device_ids or []) if str(d).strip()}
+
+    candidates: list[dict] = []
+    if "contacts" in wanted:
+        for d in (c4_contact_list_tool().get("contacts") or []):
+            if isinstance(d, dict):
+                candidates.append({**d, "kind": "contact"})
+    if "motion" in wanted:
+        listed = motion_list()
+        rows: list = []
+        if isinstance(listed, dict):
+            for k in ("motion_sensors", "sensors", "devices", "motion", "items"):
+                if isinstance(listed.get(k), list):
+                    rows = listed[k]
+                    break
+        elif isinstance(listed, list):
+            rows = listed
+        for d in rows:
+            if not isinstance(d, dict):
+                continue
+            did = d.get("device_id") if d.get("device_id") is not None else d.get("id")
+            if did is None:
+                continue
+            candidates.append(
+                {
+                    "device_id": str(did),
+                    "name": d.get("name"),
+                    "room_id": (str(d.get("room_id") or d.get("roomId")) if (d.get("room_id") or d.get("roomId")) is not None else None),
+                    "room_name": d.get("room_name") or d.get("roomName"),
+                    "kind": "motion",
+                }
+            )
+
+    seen: set[tuple[str, str]] = set()
+    sensors: list[dict] = []
+    for d in candidates:
+        key = (str(d.get("device_id")), str(d.get("kind")))
+        if key in seen:
+            continue
+        if id_set and key[0] not in id_set:
+            continue
+        if room_key is not None and str(d.get("room_id")) != room_key:
+            continue
+        if room_needle and room_needle not in str(d.get("room_name") or "").lower():
+            continue
+        if needle and needle not in str(d.get("name") or "").lower():
+            continue
+        seen.add(key)
+        sensors.append(d)
+
+    if not sensors:
+        return {"ok": True, "count": 0, "sensors": [], "note": "no sensors matched"}
+
+    def _read(d: dict) -> tuple[object, float]:
+        reader = motion_get_state if d["kind"] == "motion" else contact_get_state
+        payload = reader(int(d["device_id"]), float(timeout_s))
+        return payload, time.time()  # wall clock when this read completed, not when the fan-out started
+
+    started = time.perf_counter()
+    rows = _fan_out(_read, sensors, max(1, int(concurrency)), deadline_s=max(0.1, float(deadline_s)))
+    now = time.time()
+
+    table: list[dict] = []
+    for d, row in zip(sensors, rows):
+        entry: dict = {
+            "device_id": str(d.get("device_id")),
+            "name": d.get("name"),
+            "room_name": d.get("room_name"),
+            "kind": d.get("kind"),
+            "elapsed_ms": row.get("elapsed_ms"),
+        }
+        payload, read_at = row.get("result") if row.get("ok") else (None, now)
+        if payload is None or (isinstance(payload, dict) and payload.get("ok") is False):
+            entry.update({"ok": False, "error": row.get("error") or (payload or {}).get("error")})
+            if row.get("timed_out"):
+                entry["timed_out"] = True
+        else:
+            fields = _sensor_fields(payload, str(d.get("kind")))
+            _record_sensor_history(entry["device_id"], fields)
+            entry.update({"ok": True, **fields, "read_at": round(read_at, 3), "age_s": round(now - read_at, 3)})
+        table.append(entry)
+
+    if bool(only_open):
+        table = [r for r in table if r.get("open") is True or r.get("motion") is True or not r.get("ok")]
+
+    return {
+        "ok": True,
+        "count": len(table),
+        "open_count": sum(1 for r in table if r.get("open") is True),
+        "motion_count": sum(1 for r in table if r.get("motion") is True),
+        "failed_device_ids": [r["device_id"] for r in table if not r.get("ok")],
+        "timed_out_device_ids": [r["device_id"] for r in table if r.get("timed_out")],
+        "elapsed_ms": round((time.perf_counter() - started) * 1000.0, 2),
+        "sensors": table,
+    }
+
+
 # ---- Intercom (best-effort) ----
 
 
@@ -1640,10 +3202,17 @@ def c4_fan_list_tool() -> dict:
     return result if isinstance(result, dict) else {"ok": True, "result": result}
 
 
-@Mcp.tool(name="c4_fan_get_state", description="Get current fan power/speed (best-effort).")
-def c4_fan_get_state_tool(device_id: str) -> dict:
-    result = fan_get_state(int(device_id))
-    return result if isinstance(result, dict) else {"ok": True, "result": result}
+@Mcp.tool(
+    name="c4_fan_get_state",
+    description="Get current fan power/speed (best-effort). " + _TTL_CACHE_NOTE,
+)
+def c4_fan_get_state_tool(device_id: str, refresh: bool = False, max_age_s: float | None = None) -> dict:
+    result, age, source = _VARS.read_derived(
+        int(device_id), "fan_state", lambda: fan_get_state(int(device_id)), max_age_s=max_age_s, refresh=bool(refresh)
+    )
+    out = dict(result) if isinstance(result, dict) else {"ok": True, "result": result}
+    out["cache"] = _cache_meta(age, source)
+    return out
 
 
 @Mcp.tool(
@@ -1871,9 +3440,19 @@ def c4_shade_list_tool(limit: int = 200) -> dict:
     return shade_list(int(limit))
 
 
-@Mcp.tool(name="c4_shade_get_state", description="Get shade/blind state (best-effort). Returns position 0-100 when available.")
-def c4_shade_get_state_tool(device_id: str) -> dict:
-    return shade_get_state(int(device_id))
+@Mcp.tool(
+    name="c4_shade_get_state",
+    description=(
+        "Get shade/blind state (best-effort). Returns position 0-100 when available. " + _TTL_CACHE_NOTE
+    ),
+)
+def c4_shade_get_state_tool(device_id: str, refresh: bool = False, max_age_s: float | None = None) -> dict:
+    result, age, source = _VARS.read_derived(
+        int(device_id), "shade_state", lambda: shade_get_state(int(device_id)), max_age_s=max_age_s, refresh=bool(refresh)
+    )
+    out = dict(result) if isinstance(result, dict) else {"ok": True, "result": result}
+    out["cache"] = _cache_meta(age, source)
+    return out
 
 
 @Mcp.tool(
@@ -1881,7 +3460,18 @@ def c4_shade_get_state_tool(device_id: str) -> dict:
     description="Open/raise a shade/blind (best-effort). Returns accepted/confirmed semantics when position is available.",
 )
 def c4_shade_open_tool(device_id: str, confirm_timeout_s: float = 6.0, dry_run: bool = False) -> dict:
-    return shade_open(int(device_id), confirm_timeout_s=float(confirm_timeout_s), dry_run=bool(dry_run))
+    if bool(dry_run):
+        return shade_open(int(device_id), confirm_timeout_s=float(confirm_timeout_s), dry_run=True)
+    result, reply = _device_write(
+        int(device_id),
+        shade_open,
+        int(device_id),
+        confirm_timeout_s=float(confirm_timeout_s),
+        dry_run=False,
+        coalesce="position",
+        detail={"position": 100},
+    )
+    return reply if reply is not None else result
 
 
 @Mcp.tool(
@@ -1889,7 +3479,18 @@ def c4_shade_open_tool(device_id: str, confirm_timeout_s: float = 6.0, dry_run:
     description="Close/lower a shade/blind (best-effort). Returns accepted/confirmed semantics when position is available.",
 )
 def c4_shade_close_tool(device_id: str, confirm_timeout_s: float = 6.0, dry_run: bool = False) -> dict:
-    return shade_close(int(device_id), confirm_timeout_s=float(confirm_timeout_s), dry_run=bool(dry_run))
+    if bool(dry_run):
+        return shade_close(int(device_id), confirm_timeout_s=float(confirm_timeout_s), dry_run=True)
+    result, reply = _device_write(
+        int(device_id),
+        shade_close,
+        int(device_id),
+        confirm_timeout_s=float(confirm_timeout_s),
+        dry_run=False,
+        coalesce="position",
+        detail={"position": 0},
+    )
+    return reply if reply is not None else result
 
 
 @Mcp.tool(name="c4_shade_stop", description="Stop shade/blind movement (best-effort).")
@@ -1904,79 +3505,462 @@ def c4_shade_stop_tool(device_id: str, dry_run: bool = False) -> dict:
     ),
 )
 def c4_shade_set_position_tool(device_id: str, position: int, confirm_timeout_s: float = 8.0, dry_run: bool = False) -> dict:
-    return shade_set_position(int(device_id), int(position), confirm_timeout_s=float(confirm_timeout_s), dry_run=bool(dry_run))
-
-
-@Mcp.tool(
-    name="c4_find_devices",
-    description=(
-        "Find devices by name (case-insensitive, fuzzy). Optional filters: category in {lights, locks, thermostat, media, scenes, shades, alarm} and room_id."
-    ),
-)
-def c4_find_devices_tool(
-    search: str | None = None,
-    query: str | None = None,
-    category: str | None = None,
-    room_id: str | None = None,
-    limit: int = 20,
-    include_raw: bool = False,
-) -> dict:
-    if (search is None or not str(search).strip()) and query is not None and str(query).strip():
-        search = query
-    rid = int(room_id) if room_id is not None and str(room_id).strip() else None
-    return find_devices(
-        (str(search) if search is not None else None),
-        (str(category) if category is not None else None),
-        room_id=rid,
-        limit=int(limit),
-        include_raw=bool(include_raw),
+    if bool(dry_run):
+        return shade_set_position(int(device_id), int(position), confirm_timeout_s=float(confirm_timeout_s), dry_run=True)
+    result, reply = _device_write(
+        int(device_id),
+        shade_set_position,
+        int(device_id),
+        int(position),
+        confirm_timeout_s=float(confirm_timeout_s),
+        dry_run=False,
+        coalesce="position",
+        detail={"position": int(position)},
     )
+    return reply if reply is not None else result
 
 
-@Mcp.tool(
-    name="c4_resolve_device",
-    description=(
-        "Resolve a device name to a single device_id (best-effort). Optional filters: category (lights, locks, thermostat, media, scenes, shades, alarm) and room_id. Returns candidates when ambiguous."
-    ),
-)
-def c4_resolve_device_tool(
-    name: str,
-    category: str | None = None,
-    room_id: str | None = None,
-    require_unique: bool = True,
-    include_candidates: bool = True,
-) -> dict:
-    rid = int(room_id) if room_id is not None and str(room_id).strip() else None
-    return resolve_device(
-        str(name or ""),
-        category=(str(category) if category is not None else None),
-        room_id=rid,
-        require_unique=bool(require_unique),
-        include_candidates=bool(include_candidates),
-    )
+def _shade_position(state: object) -> int | None:
+    """Best-effort 0-100 position from a shade_get_state payload (None when the driver does not report one)."""
+
+    if isinstance(state, dict) and isinstance(state.get("position"), (int, float)) and not isinstance(state.get("position"), bool):
+        return int(round(float(state["position"])))
+    flat = _flatten_state(state)
+    for k in ("position", "currentposition", "level", "shadelevel", "percentopen"):
+        v = flat.get(k)
+        try:
+            if v is not None and not isinstance(v, bool):
+                return int(round(float(v)))
+        except Exception:
+            continue
+    return None
 
 
 @Mcp.tool(
-    name="c4_resolve",
+    name="c4_room_shades_set",
     description=(
-        "Resolve room and/or device names to ids in one call (best-effort). "
-        "If room_name is provided, device resolution is scoped to that room."
+        "Move every shade in a room (optionally a named group via name_filter) to a position concurrently. "
+        "Provide position 0-100 or action open/close. Commands are sent in parallel and all shades are confirmed "
+        "in one shared wait (position read back within tolerance)."
     ),
 )
-def c4_resolve_tool(
+def c4_room_shades_set_tool(
+    room_id: str | None = None,
     room_name: str | None = None,
-    device_name: str | None = None,
-    category: str | None = None,
+    name_filter: str | None = None,
+    position: int | None = None,
+    action: str | None = None,
+    confirm_timeout_s: float = 15.0,
+    tolerance: int = 3,
+    concurrency: int = 8,
     require_unique: bool = True,
     include_candidates: bool = True,
+    dry_run: bool = False,
 ) -> dict:
-    return resolve_room_and_device(
-        (str(room_name) if room_name is not None else None),
-        (str(device_name) if device_name is not None else None),
-        (str(category) if category is not None else None),
-        require_unique=bool(require_unique),
+    if (position is None) == (action is None):
+        return {"ok": False, "error": "provide exactly one of: position or action"}
+    action_norm = str(action or "").strip().lower() if action is not None else None
+    if action_norm is not None and action_norm not in {"open", "close"}:
+        return {"ok": False, "error": "action must be 'open' or 'close'"}
+    if position is not None and not 0 <= int(position) <= 100:
+        return {"ok": False, "error": "position must be 0-100"}
+    target = int(position) if position is not None else (100 if action_norm == "open" else 0)
+
+    resolved_room_id: int | None = None
+    rr: dict | None = None
+    if room_id is not None and str(room_id).strip():
+        try:
+            resolved_room_id = int(room_id)
+        except Exception:
+            return {"ok": False, "error": "invalid_room_id", "details": {"room_id": room_id}}
+    elif room_name is not None and str(room_name).strip():
+        rr = resolve_room(
+            str(room_name),
+            require_unique=bool(require_unique),
+            include_candidates=bool(include_candidates),
+        )
+        if not isinstance(rr, dict) or not rr.get("ok"):
+            return {"ok": False, "error": "could not resolve room", "details": rr}
+        try:
+            resolved_room_id = int(rr.get("room_id"))
+        except Exception:
+            return {"ok": False, "error": "resolve_room_invalid_room_id", "details": rr}
+    else:
+        return {"ok": False, "error": "provide room_id or room_name"}
+
+    listed = c4_list_devices("shades")
+    needle = str(name_filter or "").strip().lower()
+    shades: list[dict] = []
+    for d in (listed.get("devices") if isinstance(listed, dict) else None) or []:
+        if not isinstance(d, dict) or d.get("id") is None:
+            continue
+        if str(d.get("roomId")) != str(resolved_room_id):
+            continue
+        if needle and needle not in str(d.get("name") or "").lower():
+            continue
+        shades.append({"device_id": str(d.get("id")), "name": d.get("name")})
+
+    planned = {
+        "room_id": str(resolved_room_id),
+        "name_filter": (str(name_filter) if name_filter is not None else None),
+        "action": action_norm or "set_position",
+        "position": target,
+        "confirm_timeout_s": float(confirm_timeout_s),
+        "tolerance": int(tolerance),
+        "shades": shades,
+    }
+    if not shades:
+        return {"ok": False, "error": "no shades matched", "planned": planned, "resolve_room": rr}
+    if bool(dry_run):
+        return {"ok": True, "dry_run": True, "planned": planned, "resolve_room": rr}
+
+    def _send(shade: dict) -> dict:
+        did = int(shade["device_id"])
+        if action_norm == "open":
+            call = (shade_open, did)
+        elif action_norm == "close":
+            call = (shade_close, did)
+        else:
+            call = (shade_set_position, did, target)
+        # confirm_timeout_s=0: the per-shade poll is replaced by the shared confirmation below.
+        res, reply = _device_write(
+            did,
+            *call,
+            confirm_timeout_s=0.0,
+            dry_run=False,
+            coalesce="position",
+            detail={"position": target},
+        )
+        if reply is not None:
+            return reply
+        return res if isinstance(res, dict) else {"ok": True, "result": res}
+
+    started = time.perf_counter()
+    rows = _fan_out(_send, shades, max(1, int(concurrency)))
+
+    results: list[dict] = []
+    accepted: list[str] = []
+    for shade, row in zip(shades, rows):
+        res = row.get("result") if row.get("ok") else None
+        entry: dict = {**shade, "elapsed_ms": row.get("elapsed_ms")}
+        if res is None:
+            entry.update({"ok": False, "accepted": False, "error": row.get("error")})
+        elif res.get("coalesced"):
+            entry.update({"ok": True, "accepted": False, "coalesced": True, "superseded_by": res.get("superseded_by")})
+        else:
+            entry.update({"ok": bool(res.get("ok")), "accepted": bool(res.get("ok")), "command": res})
+            if res.get("ok"):
+                accepted.append(shade["device_id"])
+        results.append(entry)
+
+    def _check(_did: str, state: object) -> bool | None:
+        pos = _shade_position(state)
+        return None if pos is None else abs(pos - target) <= int(tolerance)
+
+    confirmation = _confirm_all(
+        accepted,
+        lambda did: shade_get_state(int(did)),
+        _check,
+        float(confirm_timeout_s),
+        max_workers=max(1, int(concurrency)),
+    )
+    for entry in results:
+        st = confirmation.get(entry["device_id"])
+        if st is None:
+            continue
+        entry["confirmed"] = bool(st.get("confirmed"))
+        entry["confirmed_after_ms"] = st.get("confirmed_after_ms")
+        entry["position"] = _shade_position(st.get("last"))
+        if not st.get("confirmed"):
+            entry["confirm_error"] = st.get("error") or ("position_unavailable" if st.get("unknown") else "timeout")
+
+    failed = [r["device_id"] for r in results if not r.get("ok")]
+    out = {
+        "ok": not failed,
+        "room_id": str(resolved_room_id),
+        "target_position": target,
+        "count": len(results),
+        "accepted": len(accepted),
+        "confirmed": sum(1 for r in results if r.get("confirmed")),
+        "failed_device_ids": failed,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000.0, 2),
+        "planned": planned,
+        "resolve_room": rr,
+        "results": results,
+    }
+    _remember_tool_call(
+        "c4_room_shades_set",
+        {"room_id": room_id, "room_name": room_name, "name_filter": name_filter, "position": position, "action": action},
+        out,
+    )
+    return out
+
+
+@Mcp.tool(
+    name="c4_find_devices",
+    description=(
+        "Find devices by name (case-insensitive, fuzzy). Optional filters: category in {lights, locks, thermostat, media, scenes, shades, alarm} and room_id."
+    ),
+)
+def c4_find_devices_tool(
+    search: str | None = None,
+    query: str | None = None,
+    category: str | None = None,
+    room_id: str | None = None,
+    limit: int = 20,
+    include_raw: bool = False,
+) -> dict:
+    if (search is None or not str(search).strip()) and query is not None and str(query).strip():
+        search = query
+    rid = int(room_id) if room_id is not None and str(room_id).strip() else None
+    return find_devices(
+        (str(search) if search is not None else None),
+        (str(category) if category is not None else None),
+        room_id=rid,
+        limit=int(limit),
+        include_raw=bool(include_raw),
+    )
+
+
+@Mcp.tool(
+    name="c4_resolve_device",
+    description=(
+        "Resolve a device name to a single device_id (best-effort). Optional filters: category (lights, locks, thermostat, media, scenes, shades, alarm) and room_id. Returns candidates when ambiguous. "
+        "On success also returns a resolution_token that the *_by_name tools accept in place of the device name."
+    ),
+)
+def c4_resolve_device_tool(
+    name: str,
+    category: str | None = None,
+    room_id: str | None = None,
+    require_unique: bool = True,
+    include_candidates: bool = True,
+) -> dict:
+    rid = int(room_id) if room_id is not None and str(room_id).strip() else None
+    result = resolve_device(
+        str(name or ""),
+        category=(str(category) if category is not None else None),
+        room_id=rid,
+        require_unique=bool(require_unique),
         include_candidates=bool(include_candidates),
     )
+    return _with_resolution_token(result, device=_resolved_device_part(result, str(name or "")))
+
+
+@Mcp.tool(
+    name="c4_resolve",
+    description=(
+        "Resolve room and/or device names to ids in one call (best-effort). "
+        "If room_name is provided, device resolution is scoped to that room. On success also returns a resolution_token "
+        "that the *_by_name tools accept in place of room/device names."
+    ),
+)
+def c4_resolve_tool(
+    room_name: str | None = None,
+    device_name: str | None = None,
+    category: str | None = None,
+    require_unique: bool = True,
+    include_candidates: bool = True,
+) -> dict:
+    result = resolve_room_and_device(
+        (str(room_name) if room_name is not None else None),
+        (str(device_name) if device_name is not None else None),
+        (str(category) if category is not None else None),
+        require_unique=bool(require_unique),
+        include_candidates=bool(include_candidates),
+    )
+    room, device = _resolve_both_parts(result, room_name, device_name)
+    return _with_resolution_token(result, room=room, device=device)
+
+
+# ---- Resolution tokens ----
+
+
+class _ResolutionTokens:
+    """Short-lived handles for name resolutions so a follow-up *_by_name call can skip resolving again.
+
+    A token is bound to the inventory generation it was issued under: once a device/room is added, removed
+    or re-driven the token is refused and the caller must resolve again.
+    """
+
+    def __init__(self, ttl_s: float = 900.0, max_entries: int = 1024) -> None:
+        self.ttl_s = float(ttl_s)
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._rows: OrderedDict[str, dict] = OrderedDict()
+        self.issued = 0
+        self.hits = 0
+        self.rejected = 0
+
+    def issue(self, parts: dict) -> str:
+        generation, _ = _inventory_generation()
+        token = "rt_" + uuid.uuid4().hex
+        with self._lock:
+            self._rows[token] = {"parts": parts, "generation": generation, "expires_at": time.monotonic() + self.ttl_s}
+            while len(self._rows) > self.max_entries:
+                self._rows.popitem(last=False)
+            self.issued += 1
+        return token
+
+    def get(self, token: str) -> tuple[dict | None, str | None]:
+        """(parts, None) for a live token, else (None, reason)."""
+
+        with self._lock:
+            row = self._rows.get(str(token))
+            if row is None or row["expires_at"] < time.monotonic():
+                self._rows.pop(str(token), None)
+                self.rejected += 1
+                return None, "resolution_token is unknown or expired; resolve again"
+        if row["generation"] != _inventory_generation()[0]:
+            with self._lock:
+                self._rows.pop(str(token), None)
+                self.rejected += 1
+            return None, "inventory changed since this resolution_token was issued; resolve again"
+        with self._lock:
+            self.hits += 1
+        return row["parts"], None
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "live": sum(1 for r in self._rows.values() if r["expires_at"] >= now),
+                "issued": self.issued,
+                "hits": self.hits,
+                "rejected": self.rejected,
+                "ttl_s": self.ttl_s,
+            }
+
+
+_RESOLUTIONS = _ResolutionTokens(ttl_s=float(os.getenv("C4_RESOLUTION_TOKEN_TTL_S", "900") or "900"))
+
+
+_TOKEN_CATEGORIES = ("lights", "locks", "thermostat", "shades", "scenes", "alarm", "media")
+
+
+_TOKEN_CATEGORY_LOCK = threading.Lock()
+_TOKEN_CATEGORY_INDEX: dict = {"generation": None, "index": {}}
+
+
+def _inventory_categories(device_id: object) -> list[str]:
+    """Categories the inventory actually places a device in (same buckets as c4_list_devices).
+
+    The device -> categories index is built once per inventory generation, so a resolve costs a dict lookup.
+    """
+
+    generation, _ = _inventory_generation()
+    with _TOKEN_CATEGORY_LOCK:
+        if _TOKEN_CATEGORY_INDEX["generation"] == generation:
+            return list(_TOKEN_CATEGORY_INDEX["index"].get(str(device_id), ()))
+
+    index: dict[str, list[str]] = {}
+    for cat in _TOKEN_CATEGORIES:
+        try:
+            listed = c4_list_devices(cat)
+        except Exception:
+            continue
+        for d in (listed.get("devices") if isinstance(listed, dict) else None) or []:
+            if isinstance(d, dict) and d.get("id") is not None:
+                index.setdefault(str(d.get("id")), []).append(cat)
+    with _TOKEN_CATEGORY_LOCK:
+        _TOKEN_CATEGORY_INDEX.update({"generation": generation, "index": index})
+    return list(index.get(str(device_id), ()))
+
+
+def _resolved_room_part(payload: object, query: str | None = None) -> dict | None:
+    if not isinstance(payload, dict) or payload.get("ok") is False or payload.get("room_id") is None:
+        return None
+    return {
+        "ok": True,
+        "room_id": str(payload.get("room_id")),
+        "name": payload.get("name") or payload.get("room_name"),
+        "query": query,
+        "match_type": "resolution_token",
+    }
+
+
+def _resolved_device_part(payload: object, query: str | None = None) -> dict | None:
+    if not isinstance(payload, dict) or payload.get("ok") is False or payload.get("device_id") is None:
+        return None
+    part = {k: v for k, v in payload.items() if k not in {"candidates", "matches"}}
+    part.update({"ok": True, "device_id": str(payload.get("device_id")), "query": query, "match_type": "resolution_token"})
+    # Category comes from the inventory, never from the resolve call's (optional) filter.
+    part["categories"] = _inventory_categories(part["device_id"])
+    if part.get("name") is None and payload.get("device_name") is not None:
+        part["name"] = payload.get("device_name")
+    return part
+
+
+def _with_resolution_token(result: object, *, room: dict | None = None, device: dict | None = None) -> object:
+    """Attach a resolution_token to a successful resolve result (room and/or device parts)."""
+
+    if not isinstance(result, dict) or not result.get("ok") or (room is None and device is None):
+        return result
+    result["resolution_token"] = _RESOLUTIONS.issue({"room": room, "device": device})
+    result["resolution_token_ttl_s"] = _RESOLUTIONS.ttl_s
+    return result
+
+
+def _resolve_both_parts(result: object, room_name: str | None, device_name: str | None) -> tuple[dict | None, dict | None]:
+    """Room/device parts from resolve_room_and_device, which may nest them or return flat ids."""
+
+    if not isinstance(result, dict):
+        return None, None
+    room = _resolved_room_part(result.get("room"), room_name) if isinstance(result.get("room"), dict) else None
+    device = _resolved_device_part(result.get("device"), device_name) if isinstance(result.get("device"), dict) else None
+    if room is None and result.get("room_id") is not None:
+        room = _resolved_room_part({"room_id": result.get("room_id"), "name": result.get("room_name")}, room_name)
+    if device is None and result.get("device_id") is not None:
+        flat = {"device_id": result.get("device_id"), "name": result.get("device_name"), "room_id": result.get("room_id"), "room_name": result.get("room_name")}
+        device = _resolved_device_part(flat, device_name)
+    return room, device
+
+
+def _token_name_conflict(part: dict | None, given: str | None) -> bool:
+    """True when the caller also passed a name that is neither the token's query nor its resolved name."""
+
+    if part is None or given is None or not str(given).strip():
+        return False
+    wanted = str(given).strip().casefold()
+    return wanted not in {str(part.get(k) or "").strip().casefold() for k in ("query", "name")}
+
+
+def _resolution_from_token(
+    resolution_token: str | None,
+    *,
+    category: str | None = None,
+    device_name: str | None = None,
+    room_name: str | None = None,
+) -> tuple[dict, dict | None]:
+    """({"room": rr | None, "device": rd | None}, error) for a by-name tool; ({}, None) when no token was passed.
+
+    category-specific tools refuse device tokens whose inventory categories do not include theirs, and a
+    name passed alongside the token must agree with it.
+    """
+
+    if resolution_token is None or not str(resolution_token).strip():
+        return {}, None
+    parts, why = _RESOLUTIONS.get(str(resolution_token).strip())
+    if parts is None:
+        return {}, {"ok": False, "error": "invalid_resolution_token", "details": why}
+    parts = {k: (dict(v) if isinstance(v, dict) else v) for k, v in parts.items()}
+    device = parts.get("device")
+    if category and device is not None and category not in (device.get("categories") or []):
+        return {}, {
+            "ok": False,
+            "error": "invalid_resolution_token",
+            "details": f"resolution_token device {device.get('device_id')} is not a '{category}' device "
+            f"(inventory categories: {device.get('categories') or 'none'})",
+        }
+    for label, part, given in (("device", device, device_name), ("room", parts.get("room"), room_name)):
+        if _token_name_conflict(part, given):
+            return {}, {
+                "ok": False,
+                "error": "resolution_token_mismatch",
+                "details": f"{label} name '{given}' does not match the resolution_token ({part.get('name')!r}); "
+                "drop the name or resolve again",
+            }
+    return parts, None
 
 
 # ---- TV / Room-level control ----
@@ -2028,7 +4012,10 @@ def c4_tv_list_tool() -> dict:
     ),
 )
 def c4_tv_remote_tool(room_id: str, button: str, press: str | None = None) -> dict:
-    result = room_remote(int(room_id), str(button or ""), press)
+    # Remote presses are relative (volume up, down...), so they are serialized per room but never coalesced.
+    result, reply = _device_write(f"room:{int(room_id)}", room_remote, int(room_id), str(button or ""), press)
+    if reply is not None:
+        return reply
     out = result if isinstance(result, dict) else {"ok": True, "result": result}
     _remember_tool_call(
         "c4_tv_remote",
@@ -2052,7 +4039,9 @@ def c4_tv_remote_last_tool(button: str, press: str | None = None, session_id: st
     if room_id is None:
         return {"ok": False, "error": "no remembered TV/media room in this session yet", "session_id": sid}
 
-    result = room_remote(int(room_id), str(button or ""), press)
+    result, reply = _device_write(f"room:{int(room_id)}", room_remote, int(room_id), str(button or ""), press)
+    if reply is not None:
+        return reply
     out = result if isinstance(result, dict) else {"ok": True, "result": result}
     _remember_tool_call("c4_tv_remote_last", {"button": button, "press": press}, out)
     return out
@@ -2065,9 +4054,8 @@ def c4_tv_remote_last_tool(button: str, press: str | None = None, session_id: st
         "This is the reliable way to 'turn on the TV' in Control4."
     ),
 )
-def c4_tv_watch_tool(room_id: str, source_device_id: str, deselect: bool = False) -> dict:
-    result = room_select_video_device(int(room_id), int(source_device_id), bool(deselect))
-    out = result if isinstance(result, dict) else {"ok": True, "result": result}
+def c4_tv_watch_tool(room_id: str, source_device_id: str, deselect: bool = False, confirm_timeout_s: float = 10.0) -> dict:
+    out = _room_select_video_shared(int(room_id), int(source_device_id), bool(deselect), float(confirm_timeout_s))
     _remember_tool_call(
         "c4_tv_watch",
         {"room_id": room_id, "source_device_id": source_device_id, "deselect": deselect},
@@ -2080,18 +4068,29 @@ def c4_tv_watch_tool(room_id: str, source_device_id: str, deselect: bool = False
     name="c4_tv_watch_by_name",
     description=(
         "Resolve a room by name and a video source device by name, then start/ensure a Watch session in that room. "
-        "If resolution is ambiguous, returns candidates and does not execute."
+        "If resolution is ambiguous, returns candidates and does not execute. Pass resolution_token from c4_resolve/c4_resolve_device/c4_resolve_room instead of names to skip re-resolution. "
+        "The source is still matched against the room's selectable video sources."
     ),
 )
 def c4_tv_watch_by_name_tool(
-    source_device_name: str,
+    source_device_name: str | None = None,
     room_name: str | None = None,
     room_id: str | None = None,
     require_unique: bool = True,
     include_candidates: bool = True,
     deselect: bool = False,
     dry_run: bool = False,
+    resolution_token: str | None = None,
+    confirm_timeout_s: float = 10.0,
 ) -> dict:
+    tok, tok_err = _resolution_from_token(resolution_token, device_name=source_device_name, room_name=room_name)
+    if tok_err is not None:
+        return tok_err
+    source_device_name = source_device_name or (tok.get("device") or {}).get("name")
+    if not str(source_device_name or "").strip():
+        return {"ok": False, "error": "source_device_name or resolution_token is required"}
+    room_name = room_name or (tok.get("room") or {}).get("name")
+
     def _resolve_watch_source_from_room_video_devices(
         rid: int,
         *,
@@ -2169,7 +4168,7 @@ def c4_tv_watch_by_name_tool(
         The room commands endpoint is more universal and often includes enumerated device options.
         """
 
-        rc_raw = room_list_commands(int(rid), "SELECT_VIDEO_DEVICE")
+        rc_raw, _, _ = _room_commands(int(rid), "SELECT_VIDEO_DEVICE")
         rc = rc_raw if isinstance(rc_raw, dict) else {"ok": True, "result": rc_raw}
         if not isinstance(rc, dict) or not rc.get("ok"):
             return None
@@ -2412,7 +4411,7 @@ def c4_tv_watch_by_name_tool(
         except Exception:
             resolved_room_id = None
     else:
-        rr = resolve_room(
+        rr = tok.get("room") or resolve_room(
             str(room_name or ""),
             require_unique=bool(require_unique),
             include_candidates=bool(include_candidates),
@@ -2521,7 +4520,7 @@ def c4_tv_watch_by_name_tool(
             "resolve_source": rd,
         }
 
-    result = room_select_video_device(int(resolved_room_id), int(source_device_id), bool(deselect))
+    result = _room_select_video_shared(int(resolved_room_id), int(source_device_id), bool(deselect), float(confirm_timeout_s))
     out = {
         "ok": bool(result.get("ok")) if isinstance(result, dict) else True,
         "planned": planned,
@@ -2577,8 +4576,7 @@ def c4_tv_off_tool(room_id: str | None = None, room_name: str | None = None, con
         except Exception:
             return {"ok": False, "error": "resolve_room_invalid_room_id", "details": {"room_id": rid_val}, "resolve_room": rr}
 
-    result = room_off(int(resolved_room_id), float(confirm_timeout_s))
-    out = result if isinstance(result, dict) else {"ok": True, "result": result}
+    out = _room_off_shared(int(resolved_room_id), float(confirm_timeout_s))
     if rr is not None and isinstance(out, dict) and "resolve_room" not in out:
         out["resolve_room"] = rr
     return out
@@ -2598,6 +4596,89 @@ def c4_room_select_audio_device_tool(room_id: str, source_device_id: str, desele
     return result if isinstance(result, dict) else {"ok": True, "result": result}
 
 
+def _listen_source_rows(listen_status: object) -> list[dict]:
+    """[{id, name}] Listen sources from a room_listen_status payload (UI configuration shapes vary)."""
+
+    ls = listen_status if isinstance(listen_status, dict) else {}
+    listen = ls.get("listen") if isinstance(ls.get("listen"), dict) else {}
+    sources = listen.get("sources") if isinstance(listen.get("sources"), list) else []
+
+    rows: list[dict] = []
+    for s in sources:
+        if not isinstance(s, dict):
+            continue
+        sid = None
+        for k in ("deviceid", "deviceId", "id"):
+            if s.get(k) is None:
+                continue
+            try:
+                sid = int(s.get(k))
+                break
+            except Exception:
+                continue
+        if sid is None or sid <= 0:
+            continue
+        label = None
+        for k in ("name", "label", "display", "title"):
+            v = s.get(k)
+            if isinstance(v, str) and v.strip():
+                label = v.strip()
+                break
+        rows.append({"id": int(sid), "name": str(label or sid)})
+    return rows
+
+
+def _room_session_active(status: object, kind: str) -> bool | None:
+    """Whether a room watch/listen status reports an active session (None when the payload does not say)."""
+
+    if not isinstance(status, dict):
+        return None
+    nested = status.get(kind) if isinstance(status.get(kind), dict) else {}
+    for src in (nested, status):
+        v = src.get("active")
+        if isinstance(v, bool):
+            return v
+    return None
+
+
+_SESSION_SOURCE_KEYS = (
+    "source_device_id",
+    "sourceDeviceId",
+    "current_source_id",
+    "current_device_id",
+    "deviceid",
+    "deviceId",
+    "device_id",
+    "CURRENT_AUDIO_DEVICE",
+    "CURRENT_VIDEO_DEVICE",
+    "current_source",
+    "currentSource",
+    "source",
+)
+
+
+def _room_session_source(status: object, kind: str) -> int | None:
+    """Device id of the source a room's watch/listen session is on (None when the payload does not say)."""
+
+    if not isinstance(status, dict):
+        return None
+    nested = status.get(kind) if isinstance(status.get(kind), dict) else {}
+    for src in (nested, status):
+        for key in _SESSION_SOURCE_KEYS:
+            v = src.get(key)
+            if isinstance(v, dict):
+                v = v.get("id") if v.get("id") is not None else v.get("deviceid", v.get("device_id"))
+            if v is None or isinstance(v, bool):
+                continue
+            try:
+                sid = int(v)
+            except Exception:
+                continue
+            # 0 / -1 mean "no source selected"; returned as-is so they never match a real device id.
+            return sid
+    return None
+
+
 @Mcp.tool(
     name="c4_room_listen",
     description=(
@@ -2606,8 +4687,7 @@ def c4_room_select_audio_device_tool(room_id: str, source_device_id: str, desele
     ),
 )
 def c4_room_listen_tool(room_id: str, source_device_id: str, confirm_timeout_s: float = 10.0) -> dict:
-    result = room_listen(int(room_id), int(source_device_id), float(confirm_timeout_s))
-    return result if isinstance(result, dict) else {"ok": True, "result": result}
+    return _room_listen_shared(int(room_id), int(source_device_id), float(confirm_timeout_s))
 
 
 @Mcp.tool(
@@ -2615,18 +4695,28 @@ def c4_room_listen_tool(room_id: str, source_device_id: str, confirm_timeout_s:
     description=(
         "Resolve a room by name and a Listen source device by name, then start a room Listen session. "
         "Uses the same safe name resolution as c4_light_set_by_name and c4_media_watch_launch_app_by_name. "
-        "If resolution is ambiguous, returns candidates and does not execute."
+        "If resolution is ambiguous, returns candidates and does not execute. Pass resolution_token from c4_resolve/c4_resolve_device/c4_resolve_room instead of names to skip re-resolution. "
+        "The source is still matched against the room's available Listen sources."
     ),
 )
 def c4_room_listen_by_name_tool(
-    room_name: str,
-    source_device_name: str,
+    room_name: str | None = None,
+    source_device_name: str | None = None,
     room_id: str | None = None,
     require_unique: bool = True,
     include_candidates: bool = True,
     confirm_timeout_s: float = 10.0,
     dry_run: bool = False,
+    resolution_token: str | None = None,
 ) -> dict:
+    tok, tok_err = _resolution_from_token(resolution_token, device_name=source_device_name, room_name=room_name)
+    if tok_err is not None:
+        return tok_err
+    source_device_name = source_device_name or (tok.get("device") or {}).get("name")
+    if not str(source_device_name or "").strip():
+        return {"ok": False, "error": "source_device_name or resolution_token is required"}
+    room_name = room_name or (tok.get("room") or {}).get("name")
+
     resolved_room_id: int | None = None
     rr: dict | None = None
 
@@ -2636,7 +4726,7 @@ def c4_room_listen_by_name_tool(
         except Exception:
             resolved_room_id = None
     else:
-        rr = resolve_room(
+        rr = tok.get("room") or resolve_room(
             str(room_name or ""),
             require_unique=bool(require_unique),
             include_candidates=bool(include_candidates),
@@ -2665,35 +4755,9 @@ def c4_room_listen_by_name_tool(
 
                     # Probe listen sources for that candidate room.
                     try:
-                        ls_raw_try = room_listen_status(int(cid))
-                        ls_try = ls_raw_try if isinstance(ls_raw_try, dict) else {"ok": True, "result": ls_raw_try}
-                        listen_try = ls_try.get("listen") if isinstance(ls_try.get("listen"), dict) else {}
-                        sources_try = listen_try.get("sources") if isinstance(listen_try.get("sources"), list) else []
+                        source_rows_try = _listen_source_rows(_ROOM_STATUS.read(int(cid), "listen")[0])
                     except Exception:
-                        sources_try = []
-
-                    source_rows_try: list[dict] = []
-                    for s in sources_try:
-                        if not isinstance(s, dict):
-                            continue
-                        sid = None
-                        for k in ("deviceid", "deviceId", "id"):
-                            if s.get(k) is None:
-                                continue
-                            try:
-                                sid = int(s.get(k))
-                                break
-                            except Exception:
-                                continue
-                        if sid is None or sid <= 0:
-                            continue
-                        label = None
-                        for k in ("name", "label", "display", "title"):
-                            v = s.get(k)
-                            if isinstance(v, str) and v.strip():
-                                label = v.strip()
-                                break
-                        source_rows_try.append({"id": int(sid), "name": str(label or sid)})
+                        source_rows_try = []
 
                     if not source_rows_try:
                         continue
@@ -2750,33 +4814,9 @@ def c4_room_listen_by_name_tool(
         return {"ok": False, "error": "room_id could not be resolved", "details": rr}
 
     # Resolve the source from the room's actual available Listen sources.
-    ls_raw = room_listen_status(int(resolved_room_id))
+    ls_raw, _ = _ROOM_STATUS.read(int(resolved_room_id), "listen")
     ls = ls_raw if isinstance(ls_raw, dict) else {"ok": True, "result": ls_raw}
-    listen = ls.get("listen") if isinstance(ls.get("listen"), dict) else {}
-    sources = listen.get("sources") if isinstance(listen.get("sources"), list) else []
-
-    source_rows: list[dict] = []
-    for s in sources:
-        if not isinstance(s, dict):
-            continue
-        sid = None
-        for k in ("deviceid", "deviceId", "id"):
-            if s.get(k) is None:
-                continue
-            try:
-                sid = int(s.get(k))
-                break
-            except Exception:
-                continue
-        if sid is None or sid <= 0:
-            continue
-        label = None
-        for k in ("name", "label", "display", "title"):
-            v = s.get(k)
-            if isinstance(v, str) and v.strip():
-                label = v.strip()
-                break
-        source_rows.append({"id": int(sid), "name": str(label or sid)})
+    source_rows = _listen_source_rows(ls)
 
     if not source_rows:
         return {
@@ -2831,7 +4871,7 @@ def c4_room_listen_by_name_tool(
             "listen_status": ls,
         }
 
-    result = room_listen(int(resolved_room_id), int(source_device_id), float(confirm_timeout_s))
+    result = _room_listen_shared(int(resolved_room_id), int(source_device_id), float(confirm_timeout_s))
     return {
         "ok": bool(result.get("ok")) if isinstance(result, dict) else True,
         "planned": planned,
@@ -2852,29 +4892,378 @@ def c4_room_listen_by_name_tool(
         "from UI configuration. Use this to find valid source device ids for c4_room_listen."
     ),
 )
-def c4_room_listen_status_tool(room_id: str) -> dict:
-    result = room_listen_status(int(room_id))
-    return result if isinstance(result, dict) else {"ok": True, "result": result}
+def c4_room_listen_status_tool(room_id: str, max_age_s: float | None = None) -> dict:
+    return _room_status_view(int(room_id), "listen", max_age_s)
 
 
 @Mcp.tool(
-    name="c4_room_now_playing",
+    name="c4_rooms_listen",
     description=(
-        "Read-only: best-effort room-scoped now playing. Probes the room's Listen sources and returns the first "
-        "device that exposes usable now-playing metadata (normalized when available), plus probe diagnostics."
+        "Start the same Listen source in several rooms at once (room_ids, room_names and/or an area like a floor name). "
+        "The source is resolved once across the rooms' Listen catalogs, rooms are switched concurrently, and all rooms "
+        "are confirmed in one shared wait. Rooms that do not offer the source are skipped and reported."
     ),
 )
-def c4_room_now_playing_tool(room_id: str, max_sources: int = 30) -> dict:
-    result = room_now_playing(int(room_id), int(max_sources))
+def c4_rooms_listen_tool(
+    source_device_name: str | None = None,
+    source_device_id: str | None = None,
+    room_ids: list[str] | None = None,
+    room_names: list[str] | None = None,
+    area: str | None = None,
+    confirm_timeout_s: float = 10.0,
+    concurrency: int = 6,
+    require_unique: bool = True,
+    include_candidates: bool = True,
+    dry_run: bool = False,
+) -> dict:
+    if not room_ids and not room_names and not (area is not None and str(area).strip()):
+        return {"ok": False, "error": "provide at least one of: room_ids, room_names, area"}
+    if not str(source_device_name or "").strip() and not str(source_device_id or "").strip():
+        return {"ok": False, "error": "provide source_device_name or source_device_id"}
+
+    targets = _resolve_room_targets(
+        room_ids,
+        room_names,
+        area,
+        require_unique=bool(require_unique),
+        include_candidates=bool(include_candidates),
+    )
+    if not targets.get("ok"):
+        return targets
+
+    rooms = list(targets.get("rooms") or [])
+    workers = max(1, int(concurrency))
+    started = time.perf_counter()
+
+    status_rows = _fan_out(lambda r: _ROOM_STATUS.read(int(r["room_id"]), "listen")[0], rooms, workers)
+    room_sources: dict[int, list[dict] | None] = {}
+    catalog: dict[int, dict] = {}
+    for room, row in zip(rooms, status_rows):
+        if not row.get("ok"):
+            room_sources[int(room["room_id"])] = None
+            continue
+        rows = _listen_source_rows(row.get("result"))
+        room_sources[int(room["room_id"])] = rows
+        for src in rows:
+            catalog.setdefault(int(src["id"]), src)
+
+    resolved_src: dict | None = None
+    if str(source_device_id or "").strip():
+        try:
+            src_id = int(str(source_device_id).strip())
+        except Exception:
+            return {"ok": False, "error": "invalid source_device_id", "source_device_id": source_device_id}
+    else:
+        if not catalog:
+            return {
+                "ok": False,
+                "error": "no listen sources found for rooms",
+                "rooms": [{"room_id": str(r["room_id"]), "room_name": r.get("room_name")} for r in rooms],
+            }
+        resolved_src = resolve_named_candidates(
+            str(source_device_name or ""),
+            list(catalog.values()),
+            entity="listen_source",
+            name_key="name",
+            id_key="id",
+            max_candidates=10,
+        )
+        if not isinstance(resolved_src, dict) or not resolved_src.get("ok") or resolved_src.get("id") is None:
+            return {
+                "ok": False,
+                "error": "could not resolve listen source device",
+                "source_device_name": str(source_device_name or ""),
+                "resolve_source": resolved_src,
+                "listen_sources": list(catalog.values())[:15],
+            }
+        src_id = int(resolved_src.get("id"))
+
+    # Rooms whose catalog could not be read are attempted anyway; the confirmation pass reports the outcome.
+    planned_rooms: list[dict] = []
+    skipped: list[dict] = []
+    for room in rooms:
+        rows = room_sources.get(int(room["room_id"]))
+        entry = {"room_id": str(room["room_id"]), "room_name": room.get("room_name")}
+        if rows is not None and not any(int(r["id"]) == src_id for r in rows):
+            skipped.append({**entry, "reason": "source_not_available_in_room"})
+            continue
+        planned_rooms.append(entry)
+
+    planned = {
+        "source_device_id": str(src_id),
+        "source_name": (catalog.get(src_id) or {}).get("name"),
+        "rooms": planned_rooms,
+        "skipped": skipped,
+        "confirm_timeout_s": float(confirm_timeout_s),
+        "concurrency": workers,
+    }
+    if bool(dry_run):
+        return {"ok": True, "dry_run": True, "planned": planned, "area": targets.get("area"), "resolve_source": resolved_src}
+
+    def _select(entry: dict) -> dict:
+        rid = int(entry["room_id"])
+        # Same LISTEN command as the single-room path; confirmation happens below on the shared streams.
+        res, reply = _device_write(f"room:{rid}", room_listen, rid, int(src_id), 0.0)
+        if reply is not None:
+            return reply
+        return res if isinstance(res, dict) else {"ok": True, "result": res}
+
+    select_rows = _fan_out(_select, planned_rooms, workers)
+
+    results: list[dict] = []
+    accepted: list[int] = []
+    for entry, row in zip(planned_rooms, select_rows):
+        res = row.get("result") if row.get("ok") else None
+        item = {**entry, "elapsed_ms": row.get("elapsed_ms")}
+        if res is None:
+            item.update({"ok": False, "accepted": False, "error": row.get("error")})
+        else:
+            item.update({"accepted": bool(res.get("ok")), "select": res})
+            if res.get("ok"):
+                accepted.append(int(entry["room_id"]))
+            else:
+                item["ok"] = False
+        results.append(item)
+
+    wait_rows = _fan_out(
+        lambda rid: _room_wait_listen_source(rid, int(src_id), float(confirm_timeout_s)),
+        accepted,
+        max(1, len(accepted)),
+        deadline_s=float(confirm_timeout_s) + 5.0,
+    )
+    confirmation = {
+        rid: (row.get("result") if row.get("ok") else {"confirmed": False, "last": None, "error": row.get("error")})
+        for rid, row in zip(accepted, wait_rows)
+    }
+    for item in results:
+        st = confirmation.get(int(item["room_id"]))
+        if st is None:
+            continue
+        item["confirmed"] = bool(st.get("confirmed"))
+        item["confirmed_after_ms"] = st.get("confirmed_after_ms")
+        item["ok"] = True
+        if not st.get("confirmed"):
+            item["confirm_error"] = st.get("error") or ("unknown" if st.get("unknown") else "timeout")
+
+    failed = [r["room_id"] for r in results if not r.get("ok")]
+    out = {
+        "ok": not failed and bool(results),
+        "source_device_id": str(src_id),
+        "room_count": len(results),
+        "accepted": len(accepted),
+        "confirmed": sum(1 for r in results if r.get("confirmed")),
+        "failed_room_ids": failed,
+        "skipped": skipped,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000.0, 2),
+        "area": targets.get("area"),
+        "resolve_source": resolved_src,
+        "planned": planned,
+        "results": results,
+    }
+    _remember_tool_call(
+        "c4_rooms_listen",
+        {
+            "source_device_name": source_device_name,
+            "source_device_id": source_device_id,
+            "room_ids": room_ids,
+            "room_names": room_names,
+            "area": area,
+        },
+        out,
+    )
+    return out
+
+
+@Mcp.tool(
+    name="c4_room_now_playing",
+    description=(
+        "Read-only: best-effort room-scoped now playing. Probes the room's Listen sources and returns the first "
+        "device that exposes usable now-playing metadata (normalized when available), plus probe diagnostics."
+    ),
+)
+def c4_room_now_playing_tool(room_id: str, max_sources: int = 30) -> dict:
+    result = room_now_playing(int(room_id), int(max_sources))
     return result if isinstance(result, dict) else {"ok": True, "result": result}
 
 
 # ---- Media / AV ----
 
-@Mcp.tool(name="c4_media_get_state", description="Get current state for a Control4 media/AV device (best-effort).")
-def c4_media_get_state_tool(device_id: str) -> dict:
-    result = media_get_state(int(device_id))
-    return result if isinstance(result, dict) else {"ok": True, "result": result}
+
+class _RokuAppCatalog:
+    """Per-device Roku app catalog with a normalized name -> app index and TTL refresh.
+
+    Repeated 'watch Netflix' commands resolve the app from memory; the catalog is fetched at most once
+    per TTL per device (single-flight). Failed fetches are only held for failure_ttl_s so a transient
+    error is not served for the full TTL.
+    """
+
+    _LIST_KEYS = ("apps", "items", "results", "matches", "options")
+    _NAME_KEYS = ("name", "app_name", "appName", "title", "label")
+    _ID_KEYS = ("app_id", "appId", "APP_ID", "id")
+
+    def __init__(self, ttl_s: float = 600.0, failure_ttl_s: float = 5.0) -> None:
+        self.ttl_s = float(ttl_s)
+        self.failure_ttl_s = float(failure_ttl_s)
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = {}
+        self._fetch_locks: dict[str, threading.Lock] = {}
+
+    @classmethod
+    def _rows(cls, raw: object) -> tuple[str | None, list[dict]]:
+        if isinstance(raw, list):
+            return None, [r for r in raw if isinstance(r, dict)]
+        if isinstance(raw, dict):
+            for k in cls._LIST_KEYS:
+                if isinstance(raw.get(k), list):
+                    return k, [r for r in raw[k] if isinstance(r, dict)]
+        return None, []
+
+    @classmethod
+    def _row_name(cls, row: dict) -> str | None:
+        for k in cls._NAME_KEYS:
+            v = row.get(k)
+            if isinstance(v, str) and v.strip():
+                return v.strip()
+        return None
+
+    @classmethod
+    def _row_id(cls, row: dict) -> str | None:
+        for k in cls._ID_KEYS:
+            if row.get(k) is not None and str(row.get(k)).strip():
+                return str(row.get(k)).strip()
+        return None
+
+    def _fresh(self, entry: dict | None) -> bool:
+        if entry is None:
+            return False
+        ttl = self.ttl_s if entry.get("ok") else self.failure_ttl_s
+        return time.time() - entry["fetched_at"] <= ttl
+
+    def get(self, device_id: int, refresh: bool = False) -> dict:
+        key = str(int(device_id))
+        with self._lock:
+            entry = self._entries.get(key)
+            fetch_lock = self._fetch_locks.setdefault(key, threading.Lock())
+        if not refresh and self._fresh(entry):
+            return {**entry, "hit": True}
+
+        with fetch_lock:
+            # Another caller may have refreshed while we waited.
+            with self._lock:
+                entry = self._entries.get(key)
+            if not refresh and self._fresh(entry):
+                return {**entry, "hit": True}
+
+            try:
+                raw = media_roku_list_apps(int(device_id), None)
+            except Exception as e:
+                raw = {"ok": False, "error": repr(e)}
+            list_key, rows = self._rows(raw)
+            index: dict[str, dict] = {}
+            for row in rows:
+                name = self._row_name(row)
+                if name:
+                    index.setdefault(_norm_key(name), {"name": name, "app_id": self._row_id(row)})
+            entry = {
+                "device_id": key,
+                "ok": bool(rows) or (isinstance(raw, dict) and bool(raw.get("ok"))),
+                "raw": raw,
+                "list_key": list_key,
+                "index": index,
+                "fetched_at": time.time(),
+            }
+            with self._lock:
+                self._entries[key] = entry
+            return {**entry, "hit": False}
+
+    def resolve(self, device_id: int, app: str) -> dict | None:
+        """Match an app name against the cached index: exact normalized name, then a unique prefix/substring."""
+
+        want = _norm_key(app)
+        if not want:
+            return None
+        entry = self.get(int(device_id))
+        index = entry.get("index") or {}
+        age_s = round(time.time() - float(entry.get("fetched_at") or time.time()), 3)
+        hit = index.get(want)
+        if hit is None:
+            partial = [v for k, v in index.items() if k.startswith(want)] or [v for k, v in index.items() if want in k]
+            hit = partial[0] if len(partial) == 1 else None
+        if hit is None:
+            return None
+        return {**hit, "requested": str(app), "cache_hit": bool(entry.get("hit")), "catalog_age_s": age_s}
+
+    def filtered(self, device_id: int, search: str | None, refresh: bool = False) -> dict:
+        entry = self.get(int(device_id), refresh=bool(refresh))
+        raw = entry.get("raw")
+        cache = {
+            "hit": bool(entry.get("hit")),
+            "age_s": round(time.time() - float(entry.get("fetched_at") or time.time()), 3),
+            "ttl_s": self.ttl_s,
+        }
+        needle = _norm_key(search) if search is not None else ""
+        list_key, rows = self._rows(raw)
+        if needle and rows:
+            rows = [r for r in rows if needle in _norm_key(self._row_name(r) or "")]
+        if isinstance(raw, dict):
+            out = dict(raw)
+            if list_key is not None:
+                out[list_key] = rows
+                if "count" in out:
+                    out["count"] = len(rows)
+        else:
+            out = {"ok": True, "apps": rows}
+        out["cache"] = cache
+        return out
+
+
+_ROKU_APPS = _RokuAppCatalog(
+    ttl_s=float(os.getenv("C4_ROKU_APPS_TTL_S", "600") or "600"),
+    failure_ttl_s=float(os.getenv("C4_ROKU_APPS_FAILURE_TTL_S", "5") or "5"),
+)
+
+
+def _is_roku_device(device_id: int) -> bool:
+    """Whether the inventory's driver key (control/proxy/protocol file) for the device names Roku."""
+
+    try:
+        _, drivers = _inventory_generation()
+    except Exception:
+        return False
+    return "roku" in " ".join(drivers.get(int(device_id)) or ()).lower()
+
+
+def _resolve_launch_app(device_id: int, app: str) -> tuple[str, dict | None]:
+    """App argument for the launch path, plus resolution details (None when not resolved from the catalog).
+
+    For Roku devices a catalog hit returns the app id, which the adapter accepts directly (as it does for ids
+    taken from c4_media_roku_list_apps), so it skips its own app-list lookup. Other drivers go straight through.
+    """
+
+    if not _is_roku_device(int(device_id)):
+        return str(app or ""), None
+    try:
+        hit = _ROKU_APPS.resolve(int(device_id), str(app or ""))
+    except Exception:
+        hit = None
+    if not hit:
+        return str(app or ""), None
+    return str(hit.get("app_id") or hit.get("name") or app or ""), hit
+
+
+@Mcp.tool(
+    name="c4_media_get_state",
+    description=(
+        "Get current state for a Control4 media/AV device (best-effort). " + _TTL_CACHE_NOTE
+    ),
+)
+def c4_media_get_state_tool(device_id: str, refresh: bool = False, max_age_s: float | None = None) -> dict:
+    result, age, source = _VARS.read_derived(
+        int(device_id), "media_state", lambda: media_get_state(int(device_id)), max_age_s=max_age_s, refresh=bool(refresh)
+    )
+    out = dict(result) if isinstance(result, dict) else {"ok": True, "result": result}
+    out["cache"] = _cache_meta(age, source)
+    return out
 
 
 @Mcp.tool(
@@ -2901,18 +5290,170 @@ def c4_media_remote_tool(device_id: str, button: str, press: str = "Tap") -> dic
     return result if isinstance(result, dict) else {"ok": True, "result": result}
 
 
+class _TimerScheduler:
+    """One timer thread that fires callbacks at their due time.
+
+    Callbacks run on a small worker pool, so a slow Director call never delays other timers and no
+    HTTP worker sleeps between steps.
+    """
+
+    def __init__(self, max_workers: int = 4) -> None:
+        self._cond = threading.Condition()
+        self._heap: list[tuple[float, int, object, tuple]] = []
+        self._seq = 0
+        self._thread: threading.Thread | None = None
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix="c4-timer")
+
+    def call_later(self, delay_s: float, fn, *args) -> None:
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._heap, (time.monotonic() + max(0.0, float(delay_s)), self._seq, fn, args))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="c4-timer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                due, _, fn, args = self._heap[0]
+                wait_s = due - time.monotonic()
+                if wait_s > 0:
+                    self._cond.wait(wait_s)
+                    continue
+                heapq.heappop(self._heap)
+            self._pool.submit(fn, *args)
+
+
+_TIMERS = _TimerScheduler(max_workers=int(os.getenv("C4_TIMER_WORKERS", "4") or "4"))
+
+_REMOTE_JOBS: OrderedDict[str, dict] = OrderedDict()
+_REMOTE_JOBS_LOCK = threading.Lock()
+_REMOTE_JOBS_MAX = 200
+
+
+def _remote_job_view(job: dict) -> dict:
+    with _REMOTE_JOBS_LOCK:
+        view = {k: v for k, v in job.items() if k != "steps"}
+        view["steps"] = [dict(st) for st in job.get("steps") or []]
+    view["completed_steps"] = len(view["steps"])
+    view["total_steps"] = len(view.get("buttons") or [])
+    return view
+
+
+def _remote_job_step(job_id: str) -> None:
+    with _REMOTE_JOBS_LOCK:
+        job = _REMOTE_JOBS.get(job_id)
+        if job is None or job.get("status") not in {"queued", "running"}:
+            return
+        idx = len(job["steps"])
+        button = job["buttons"][idx]
+        if job["status"] == "queued":
+            job["status"] = "running"
+            job["started_at"] = time.time()
+
+    step: dict = {"index": idx, "button": button, "at": time.time()}
+    try:
+        res, reply = _device_write(
+            int(job["device_id"]), media_remote, int(job["device_id"]), str(button or ""), str(job["press"] or "Tap")
+        )
+        res = reply if reply is not None else res
+        step["ok"] = bool(res.get("ok", True)) if isinstance(res, dict) else bool(res)
+        step["result"] = res
+    except Exception as e:
+        step["ok"] = False
+        step["error"] = repr(e)
+
+    with _REMOTE_JOBS_LOCK:
+        job["steps"].append(step)
+        done = len(job["steps"]) >= len(job["buttons"])
+        failed = not step["ok"] and bool(job.get("stop_on_error"))
+        if done or failed:
+            job["status"] = "failed" if failed or not all(st.get("ok") for st in job["steps"]) else "done"
+            job["finished_at"] = time.time()
+            return
+    _TIMERS.call_later(float(job["delay_ms"]) / 1000.0, _remote_job_step, job_id)
+
+
+def _start_remote_job(device_id: int, buttons: list[str], press: str, delay_ms: int, stop_on_error: bool) -> dict:
+    job_id = uuid.uuid4().hex[:12]
+    job = {
+        "job_id": job_id,
+        "device_id": str(device_id),
+        "buttons": [str(b or "") for b in buttons],
+        "press": str(press or "Tap"),
+        "delay_ms": max(0, int(delay_ms)),
+        "stop_on_error": bool(stop_on_error),
+        "status": "queued",
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "steps": [],
+    }
+    with _REMOTE_JOBS_LOCK:
+        _REMOTE_JOBS[job_id] = job
+        # Keep memory bounded: evict the oldest finished jobs first.
+        while len(_REMOTE_JOBS) > _REMOTE_JOBS_MAX:
+            victim = next((k for k, j in _REMOTE_JOBS.items() if j.get("status") in {"done", "failed"}), None)
+            _REMOTE_JOBS.pop(victim if victim is not None else next(iter(_REMOTE_JOBS)))
+    _TIMERS.call_later(0.0, _remote_job_step, job_id)
+    return job
+
+
 @Mcp.tool(
     name="c4_media_remote_sequence",
     description=(
         "Send a sequence of remote actions to a media device (e.g., ['home','down','down','select']). "
-        "Useful for navigation macros."
+        "Useful for navigation macros. Pass background=true to return immediately with a job_id; steps then run on a "
+        "server-side timer and c4_media_remote_sequence_status reports progress."
     ),
 )
-def c4_media_remote_sequence_tool(device_id: str, buttons: list[str], press: str = "Tap", delay_ms: int = 250) -> dict:
+def c4_media_remote_sequence_tool(
+    device_id: str,
+    buttons: list[str],
+    press: str = "Tap",
+    delay_ms: int = 250,
+    background: bool = False,
+    stop_on_error: bool = True,
+) -> dict:
+    if bool(background):
+        if not buttons:
+            return {"ok": False, "error": "buttons must not be empty"}
+        job = _start_remote_job(int(device_id), list(buttons), str(press or "Tap"), int(delay_ms), bool(stop_on_error))
+        return {
+            "ok": True,
+            "accepted": True,
+            "background": True,
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "total_steps": len(job["buttons"]),
+            "estimated_duration_ms": max(0, len(job["buttons"]) - 1) * job["delay_ms"],
+        }
+
     result = media_remote_sequence(int(device_id), list(buttons), str(press or "Tap"), int(delay_ms))
     return result if isinstance(result, dict) else {"ok": True, "result": result}
 
 
+@Mcp.tool(
+    name="c4_media_remote_sequence_status",
+    description=(
+        "Read-only: status of a background c4_media_remote_sequence job (queued/running/done/failed) with per-step results."
+    ),
+)
+def c4_media_remote_sequence_status_tool(job_id: str) -> dict:
+    with _REMOTE_JOBS_LOCK:
+        job = _REMOTE_JOBS.get(str(job_id or "").strip())
+    if job is None:
+        return {"ok": False, "error": "unknown job_id", "job_id": job_id}
+    return {"ok": True, "job": _remote_job_view(job)}
+
+
 @Mcp.tool(
     name="c4_media_now_playing",
     description=(
@@ -2932,19 +5473,208 @@ def c4_media_now_playing_tool(device_id: str) -> dict:
     ),
 )
 def c4_media_launch_app_tool(device_id: str, app: str) -> dict:
-    result = media_launch_app(int(device_id), str(app or ""))
-    return result if isinstance(result, dict) else {"ok": True, "result": result}
+    launch_arg, app_resolution = _resolve_launch_app(int(device_id), str(app or ""))
+    result = media_launch_app(int(device_id), launch_arg)
+    out = result if isinstance(result, dict) else {"ok": True, "result": result}
+    if app_resolution is not None and "app" in out:
+        # The adapter echoes what it was sent (the catalog id); report the app as requested.
+        out["app"] = str(app or "")
+    if app_resolution is not None:
+        out["app_resolution"] = app_resolution
+    return out
+
+def _roku_app_snapshot(device_id: int) -> dict:
+    """CURRENT_APP / CURRENT_APP_ID as reported by the device's Director variables (None when absent)."""
+
+    flat = _flatten_state(item_get_variables(int(device_id)))
+    return {"CURRENT_APP": flat.get("currentapp"), "CURRENT_APP_ID": flat.get("currentappid")}
+
+
+def _roku_shows_app(snapshot: object, app_name: str, expected_app_id: object) -> bool | None:
+    """True/False when the snapshot names the current app; None when it reports no app at all."""
+
+    if not isinstance(snapshot, dict):
+        return None
+    cur_id, cur_name = snapshot.get("CURRENT_APP_ID"), snapshot.get("CURRENT_APP")
+    if cur_id is None and not cur_name:
+        return None
+    if expected_app_id is not None and cur_id is not None:
+        return str(cur_id) == str(expected_app_id)
+    return bool(cur_name) and _norm_key(cur_name) == _norm_key(app_name)
+
+
+_WATCH_LAUNCH_CONFIRM_S = float(os.getenv("C4_WATCH_LAUNCH_CONFIRM_S", "6") or "6")
+
+
+def _media_watch_launch_pipelined(
+    device_id: int,
+    app_name: str,
+    room_id: int | None,
+    pre_home: bool,
+    expected_app_id: object,
+    launch_arg: str | None = None,
+) -> dict:
+    """Watch+launch with independent reads run concurrently; same result shape as media_watch_launch_app.
+
+    Phases: before (watch status + Roku app), select_video, then the wait for Watch to go active
+    overlapped with [pre_home, launch], then after (watch status + a wait for the Roku to report the app,
+    up to C4_WATCH_LAUNCH_CONFIRM_S). Writes go through the per-device lanes like every other write.
+    pre_home is skipped when the Roku already reports the target app.
+    app_name is the app as requested and is what the result reports; launch_arg (a resolved
+    catalog id, when there is one) is only what the adapter is sent.
+    """
+
+    timings: dict = {}
+    t_total = time.perf_counter()
+
+    def _phase(name: str, fns: list) -> list[dict]:
+        t0 = time.perf_counter()
+        rows = _fan_out(lambda f: f(), fns, max_workers=len(fns))
+        timings[name] = round((time.perf_counter() - t0) * 1000.0, 1)
+        return rows
+
+    def _value(row: dict) -> object:
+        return row.get("result") if row.get("ok") else {"ok": False, "error": row.get("error")}
+
+    rid = room_id
+    if rid is None:
+        t0 = time.perf_counter()
+        for i in get_all_items() or []:
+            if isinstance(i, dict) and str(i.get("id")) == str(int(device_id)):
+                raw = i.get("roomId") or i.get("parentId")
+                rid = int(raw) if raw is not None and str(raw).strip().isdigit() else None
+                break
+        timings["resolve_room"] = round((time.perf_counter() - t0) * 1000.0, 1)
+    if rid is None:
+        return {
+            "ok": False,
+            "error": "room_id is required (could not infer the device's room from inventory)",
+            "device_id": str(device_id),
+            "app": app_name,
+        }
+
+    before_rows = _phase("before", [lambda: _ROOM_STATUS.read(int(rid), "watch", 0.0)[0], lambda: _roku_app_snapshot(int(device_id))])
+    watch_before = _value(before_rows[0])
+    roku_before = before_rows[1].get("result") if before_rows[1].get("ok") else None
+
+    def _write(key: object, fn, *args) -> dict:
+        res, reply = _device_write(key, fn, *args)
+        if reply is not None:
+            return reply
+        return res if isinstance(res, dict) else {"ok": True, "result": res}
+
+    t0 = time.perf_counter()
+    select_video = _write(f"room:{int(rid)}", room_select_video_device, int(rid), int(device_id), False)
+    timings["select_video"] = round((time.perf_counter() - t0) * 1000.0, 1)
+
+    already_on_target = _roku_shows_app(roku_before, app_name, expected_app_id) is True
+
+    pre_home_info: dict = {"requested": bool(pre_home), "skipped": True}
+    if not pre_home:
+        pre_home_info["reason"] = "not_requested"
+    elif already_on_target:
+        pre_home_info["reason"] = "target_app_already_active"
+
+    def _home_then_launch() -> dict:
+        if pre_home and not already_on_target:
+            t_home = time.perf_counter()
+            try:
+                home_res = _write(int(device_id), media_remote, int(device_id), "home", "Tap")
+            except Exception as e:
+                home_res = {"ok": False, "error": repr(e)}
+            timings["pre_home"] = round((time.perf_counter() - t_home) * 1000.0, 1)
+            pre_home_info.update({"skipped": False, "result": home_res})
+        t_launch = time.perf_counter()
+        res = _write(int(device_id), media_launch_app, int(device_id), launch_arg or app_name)
+        timings["launch"] = round((time.perf_counter() - t_launch) * 1000.0, 1)
+        return res
+
+    def _watch_active() -> dict:
+        if not select_video.get("ok"):
+            return {"confirmed": False, "last": _ROOM_STATUS.read(int(rid), "watch", 0.0)[0]}
+        return _room_wait_session(int(rid), "watch", True, _WATCH_LAUNCH_CONFIRM_S)
+
+    mid_rows = _phase("after_select", [_watch_active, _home_then_launch])
+    watch_wait = mid_rows[0].get("result") if mid_rows[0].get("ok") else {"confirmed": False, "last": _value(mid_rows[0])}
+    watch_after_select = watch_wait.get("last")
+    launch = dict(mid_rows[1].get("result") or {}) if mid_rows[1].get("ok") else {"ok": False, "error": mid_rows[1].get("error")}
+
+    def _roku_settled() -> dict:
+        # Let the launch settle: poll until the Roku reports the target app (or says nothing about apps).
+        deadline = time.monotonic() + (_WATCH_LAUNCH_CONFIRM_S if launch.get("ok") else 0.0)
+        while True:
+            snap = _roku_app_snapshot(int(device_id))
+            shows = _roku_shows_app(snap, app_name, expected_app_id)
+            if shows is not False or time.monotonic() >= deadline:
+                return {"snapshot": snap, "confirmed": shows is True}
+            time.sleep(0.3)
+
+    after_rows = _phase("after", [lambda: _ROOM_STATUS.read(int(rid), "watch", 0.0)[0], _roku_settled])
+    watch_after_launch = _value(after_rows[0])
+    roku_wait = after_rows[1].get("result") if after_rows[1].get("ok") else {}
+    roku_after = roku_wait.get("snapshot")
+
+    if roku_before is not None or roku_after is not None:
+        roku = dict(launch.get("roku")) if isinstance(launch.get("roku"), dict) else {}
+        roku.setdefault("expected_app_id", expected_app_id)
+        roku["before"] = roku_before
+        roku["after"] = roku_after
+        roku["confirmed"] = bool(roku_wait.get("confirmed"))
+        launch["roku"] = roku
+
+    timings["total"] = round((time.perf_counter() - t_total) * 1000.0, 1)
+    return {
+        "ok": bool(select_video.get("ok")) and bool(launch.get("ok")),
+        "mode": "pipelined",
+        "device_id": str(device_id),
+        "room_id": str(rid),
+        "app": app_name,
+        "watch": {
+            "before": watch_before,
+            "after_select_video": watch_after_select,
+            "after_launch": watch_after_launch,
+            "confirmed_active": bool(watch_wait.get("confirmed")),
+            "confirmed_after_ms": watch_wait.get("confirmed_after_ms"),
+        },
+        "select_video": select_video,
+        "pre_home": pre_home_info,
+        "launch": launch,
+        "timings_ms": timings,
+    }
+
 
 @Mcp.tool(
     name="c4_media_watch_launch_app",
     description=(
         "High-level helper: select the room video source for the given media device (Watch/HDMI) and then launch an app. "
-        "This makes app launches reliably visible by ensuring the room is on the correct video input first."
+        "This makes app launches reliably visible by ensuring the room is on the correct video input first. "
+        "pipelined=true runs the independent reads concurrently, skips pre_home when the Roku already shows the app, "
+        "and reports per-phase timings in summary.timings_ms."
     ),
 )
-def c4_media_watch_launch_app(device_id: str, app: str, room_id: str | None = None, pre_home: bool = True) -> dict:
+def c4_media_watch_launch_app(
+    device_id: str,
+    app: str,
+    room_id: str | None = None,
+    pre_home: bool = True,
+    pipelined: bool = False,
+) -> dict:
     rid = int(room_id) if room_id is not None and str(room_id).strip() else None
-    result = media_watch_launch_app(int(device_id), str(app or ""), room_id=rid, pre_home=bool(pre_home))
+    started = time.perf_counter()
+    launch_arg, app_resolution = _resolve_launch_app(int(device_id), str(app or ""))
+    if pipelined:
+        result = _media_watch_launch_pipelined(
+            int(device_id),
+            str(app or ""),
+            rid,
+            bool(pre_home),
+            (app_resolution or {}).get("app_id"),
+            launch_arg,
+        )
+    else:
+        result = media_watch_launch_app(int(device_id), launch_arg, room_id=rid, pre_home=bool(pre_home))
+        if isinstance(result, dict) and app_resolution is not None and "app" in result:
+            result["app"] = str(app or "")
     if not isinstance(result, dict):
         out = {"ok": True, "result": result}
         _remember_tool_call(
@@ -2976,17 +5706,29 @@ def c4_media_watch_launch_app(device_id: str, app: str, room_id: str | None = No
         "watch_active_after_launch": (after_launch.get("active") if isinstance(after_launch, dict) else None),
         "launch_ok": launch_ok,
         "launch_profile": profile,
-        "requested_app": result.get("app"),
+        "requested_app": str(app or ""),
     }
 
     if resolved is not None:
         summary["resolved"] = resolved
 
+    if app_resolution is not None:
+        summary["app_resolution"] = app_resolution
+
+    timings = result.get("timings_ms") if isinstance(result.get("timings_ms"), dict) else None
+    if timings is not None:
+        summary["mode"] = "pipelined"
+        summary["pre_home_skipped"] = bool((result.get("pre_home") or {}).get("skipped"))
+        summary["timings_ms"] = timings
+    else:
+        summary["mode"] = "sequential"
+        summary["timings_ms"] = {"total": round((time.perf_counter() - started) * 1000.0, 1)}
+
     if isinstance(roku, dict):
         before = roku.get("before") if isinstance(roku.get("before"), dict) else None
         after = roku.get("after") if isinstance(roku.get("after"), dict) else None
         summary["roku"] = {
-            "expected_app_id": roku.get("expected_app_id"),
+            "expected_app_id": roku.get("expected_app_id") or (app_resolution or {}).get("app_id"),
             "before_app": (before or {}).get("CURRENT_APP") if isinstance(before, dict) else None,
             "before_app_id": (before or {}).get("CURRENT_APP_ID") if isinstance(before, dict) else None,
             "after_app": (after or {}).get("CURRENT_APP") if isinstance(after, dict) else None,
@@ -3011,7 +5753,7 @@ def c4_media_watch_launch_app(device_id: str, app: str, room_id: str | None = No
     result["summary"] = summary
     _remember_tool_call(
         "c4_media_watch_launch_app",
-        {"device_id": device_id, "app": app, "room_id": room_id, "pre_home": pre_home},
+        {"device_id": device_id, "app": app, "room_id": room_id, "pre_home": pre_home, "pipelined": pipelined},
         result,
     )
     return result
@@ -3023,18 +5765,30 @@ def c4_media_watch_launch_app(device_id: str, app: str, room_id: str | None = No
         "One-call helper: resolve a media device by name (optionally scoped by room) and then run c4_media_watch_launch_app. "
         "Use this to say things like 'Watch Netflix on <Roku Name> in <Room Name>' without looking up ids. "
         "Returns resolution details and preserves accepted/confirmed semantics from the underlying watch+launch flow."
+        " Pass resolution_token from c4_resolve/c4_resolve_device/c4_resolve_room instead of names to skip re-resolution."
     ),
 )
 def c4_media_watch_launch_app_by_name_tool(
-    device_name: str,
-    app: str,
+    device_name: str | None = None,
+    app: str | None = None,
     room_name: str | None = None,
     room_id: str | None = None,
     pre_home: bool = True,
     require_unique: bool = True,
     include_candidates: bool = True,
     dry_run: bool = False,
+    pipelined: bool = False,
+    resolution_token: str | None = None,
 ) -> dict:
+    if not str(app or "").strip():
+        return {"ok": False, "error": "app is required"}
+    tok, tok_err = _resolution_from_token(resolution_token, category="media", device_name=device_name, room_name=room_name)
+    if tok_err is not None:
+        return tok_err
+    device_name = device_name or (tok.get("device") or {}).get("name")
+    if not str(device_name or "").strip():
+        return {"ok": False, "error": "device_name or resolution_token is required"}
+
     resolved_room_id: int | None = None
     resolved_room_name: str | None = None
     rr: dict | None = None
@@ -3044,8 +5798,8 @@ def c4_media_watch_launch_app_by_name_tool(
             resolved_room_id = int(room_id)
         except Exception:
             resolved_room_id = None
-    elif room_name is not None and str(room_name).strip():
-        rr = resolve_room(
+    elif tok.get("room") is not None or (room_name is not None and str(room_name).strip()):
+        rr = tok.get("room") or resolve_room(
             str(room_name),
             require_unique=bool(require_unique),
             include_candidates=bool(include_candidates),
@@ -3118,7 +5872,7 @@ def c4_media_watch_launch_app_by_name_tool(
             resolved_room_id = None
         resolved_room_name = str(rr.get("name")) if rr.get("name") is not None else None
 
-    rd = resolve_device(
+    rd = tok.get("device") or resolve_device(
         str(device_name or ""),
         category="media",
         room_id=resolved_room_id,
@@ -3167,6 +5921,7 @@ def c4_media_watch_launch_app_by_name_tool(
         app=str(app or ""),
         room_id=(str(resolved_room_id) if resolved_room_id is not None else None),
         pre_home=bool(pre_home),
+        pipelined=bool(pipelined),
     )
     ok = bool(res.get("ok")) if isinstance(res, dict) else bool(res)
 
@@ -3202,16 +5957,145 @@ def c4_media_watch_launch_app_by_name_tool(
     name="c4_media_roku_list_apps",
     description=(
         "List Roku app options for the given Roku device by reading universal mini-app variables (APP_NAME/UM_ROKU) in the same room. "
-        "Use this to find the exact app name/id to pass to c4_media_launch_app."
+        "Use this to find the exact app name/id to pass to c4_media_launch_app. "
+        "Served from a per-device catalog cache (TTL C4_ROKU_APPS_TTL_S); pass refresh=true to re-read."
     ),
 )
-def c4_media_roku_list_apps_tool(device_id: str, search: str | None = None) -> dict:
-    result = media_roku_list_apps(int(device_id), (str(search) if search is not None else None))
-    return result if isinstance(result, dict) else {"ok": True, "result": result}
+def c4_media_roku_list_apps_tool(device_id: str, search: str | None = None, refresh: bool = False) -> dict:
+    return _ROKU_APPS.filtered(int(device_id), (str(search) if search is not None else None), refresh=bool(refresh))
 
 
 # ---- Thermostats ----
 
+
+def _norm_key(k: object) -> str:
+    return "".join(ch for ch in str(k or "").lower() if ch.isalnum())
+
+
+def _flatten_state(obj: object, depth: int = 0) -> dict:
+    """Normalized key -> value map from a best-effort state/variables payload (shapes vary by driver)."""
+
+    out: dict = {}
+    if depth > 2:
+        return out
+    if isinstance(obj, list):
+        for row in obj:
+            if isinstance(row, dict):
+                name = row.get("varName") or row.get("name") or row.get("variable")
+                if name is not None and "value" in row:
+                    out.setdefault(_norm_key(name), row.get("value"))
+                else:
+                    for k, v in _flatten_state(row, depth + 1).items():
+                        out.setdefault(k, v)
+        return out
+    if isinstance(obj, dict):
+        nested = []
+        for k, v in obj.items():
+            if isinstance(v, (dict, list)):
+                nested.append(v)
+            else:
+                out.setdefault(_norm_key(k), v)
+        for v in nested:
+            for k2, v2 in _flatten_state(v, depth + 1).items():
+                out.setdefault(k2, v2)
+    return out
+
+
+_THERMOSTAT_FIELD_ALIASES = {
+    "hvac_mode": ("hvacmode", "hvacmodes"),
+    "heat_setpoint_f": ("heatsetpointf", "heatsetpoint", "heatingsetpointf", "heatingsetpoint"),
+    "cool_setpoint_f": ("coolsetpointf", "coolsetpoint", "coolingsetpointf", "coolingsetpoint"),
+    "fan_mode": ("fanmode",),
+    "hold_mode": ("holdmode", "hold"),
+    "temperature_f": ("temperaturef", "temperature", "currenttemperature"),
+}
+
+
+def _thermostat_fields(state: object) -> dict:
+    flat = _flatten_state(state)
+    fields: dict = {}
+    for field, aliases in _THERMOSTAT_FIELD_ALIASES.items():
+        for a in aliases:
+            if flat.get(a) is not None:
+                fields[field] = flat.get(a)
+                break
+    return fields
+
+
+def _thermostat_matches(fields: dict, expected: dict, tolerance_f: float = 0.6) -> bool | None:
+    """True when every expected field is reflected in the thermostat state; None when a field is unreadable."""
+
+    unknown = False
+    for key, want in expected.items():
+        if key == "target_f":
+            got = [fields.get("heat_setpoint_f"), fields.get("cool_setpoint_f")]
+            nums = []
+            for g in got:
+                try:
+                    nums.append(float(g))
+                except Exception:
+                    continue
+            if not nums:
+                unknown = True
+            elif not any(abs(n - float(want)) <= tolerance_f for n in nums):
+                return False
+            continue
+        got = fields.get(key)
+        if got is None:
+            unknown = True
+            continue
+        if key.endswith("_f"):
+            try:
+                if abs(float(got) - float(want)) > tolerance_f:
+                    return False
+            except Exception:
+                unknown = True
+            continue
+        if _norm_key(got) != _norm_key(want):
+            return False
+    return None if unknown else True
+
+
+def _thermostat_issue(device_id: int, changes: dict, deadband_f: float | None = None) -> list[dict]:
+    """Send thermostat changes without waiting for confirmation, in dependency order.
+
+    Mode goes first (a target's meaning depends on it), then setpoints, then fan, then hold last so the
+    hold captures the new setpoints. Each write uses the per-device queue, so bursts coalesce. The first
+    failed step stops the sequence; later steps are reported as skipped rather than sent out of context.
+    """
+
+    steps: list[dict] = []
+    failed_field: str | None = None
+    order = (
+        ("hvac_mode", thermostat_set_hvac_mode, "hvac_mode"),
+        ("heat_setpoint_f", thermostat_set_heat_setpoint_f, "heat_setpoint"),
+        ("cool_setpoint_f", thermostat_set_cool_setpoint_f, "cool_setpoint"),
+        ("target_f", thermostat_set_target_f, "target"),
+        ("fan_mode", thermostat_set_fan_mode, "fan_mode"),
+        ("hold_mode", thermostat_set_hold_mode, "hold_mode"),
+    )
+    for field, fn, coalesce in order:
+        if changes.get(field) is None:
+            continue
+        value = changes[field]
+        if failed_field is not None:
+            steps.append({"field": field, "value": value, "ok": False, "skipped": True, "error": f"skipped: {failed_field} failed"})
+            continue
+        args: tuple = (int(device_id), (float(value) if field.endswith("_f") else str(value)), 0.0)
+        if field == "target_f":
+            args = args + ((float(deadband_f) if deadband_f is not None else None),)
+        try:
+            res, reply = _device_write(int(device_id), fn, *args, coalesce=coalesce, detail={field: value})
+            res = reply if reply is not None else res
+            ok = bool(res.get("ok", True)) if isinstance(res, dict) else bool(res)
+            steps.append({"field": field, "value": value, "ok": ok, "result": res})
+        except Exception as e:
+            steps.append({"field": field, "value": value, "ok": False, "error": repr(e)})
+        if not steps[-1]["ok"]:
+            failed_field = field
+    return steps
+
+
 @Mcp.tool(name="c4_thermostat_get_state", description="Get current state for a Control4 thermostat.")
 def c4_thermostat_get_state_tool(device_id: str) -> dict:
     result = thermostat_get_state(int(device_id))
@@ -3220,31 +6104,81 @@ def c4_thermostat_get_state_tool(device_id: str) -> dict:
 
 @Mcp.tool(name="c4_thermostat_set_hvac_mode", description="Set HVAC mode (Off/Heat/Cool/Auto) on a Control4 thermostat.")
 def c4_thermostat_set_hvac_mode_tool(device_id: str, mode: str, confirm_timeout_s: float = 8.0) -> dict:
-    result = thermostat_set_hvac_mode(int(device_id), str(mode or ""), float(confirm_timeout_s))
+    result, reply = _device_write(
+        int(device_id),
+        thermostat_set_hvac_mode,
+        int(device_id),
+        str(mode or ""),
+        float(confirm_timeout_s),
+        coalesce="hvac_mode",
+        detail={"mode": str(mode or "")},
+    )
+    if reply is not None:
+        return reply
     return result if isinstance(result, dict) else {"ok": True, "result": result}
 
 
 @Mcp.tool(name="c4_thermostat_set_fan_mode", description="Set fan mode (On/Auto/Circulate) on a Control4 thermostat.")
 def c4_thermostat_set_fan_mode_tool(device_id: str, mode: str, confirm_timeout_s: float = 8.0) -> dict:
-    result = thermostat_set_fan_mode(int(device_id), str(mode or ""), float(confirm_timeout_s))
+    result, reply = _device_write(
+        int(device_id),
+        thermostat_set_fan_mode,
+        int(device_id),
+        str(mode or ""),
+        float(confirm_timeout_s),
+        coalesce="fan_mode",
+        detail={"mode": str(mode or "")},
+    )
+    if reply is not None:
+        return reply
     return result if isinstance(result, dict) else {"ok": True, "result": result}
 
 
 @Mcp.tool(name="c4_thermostat_set_hold_mode", description="Set hold mode (Off/2 Hours/Next Event/Permanent/Hold Until) on a Control4 thermostat.")
 def c4_thermostat_set_hold_mode_tool(device_id: str, mode: str, confirm_timeout_s: float = 8.0) -> dict:
-    result = thermostat_set_hold_mode(int(device_id), str(mode or ""), float(confirm_timeout_s))
+    result, reply = _device_write(
+        int(device_id),
+        thermostat_set_hold_mode,
+        int(device_id),
+        str(mode or ""),
+        float(confirm_timeout_s),
+        coalesce="hold_mode",
+        detail={"mode": str(mode or "")},
+    )
+    if reply is not None:
+        return reply
     return result if isinstance(result, dict) else {"ok": True, "result": result}
 
 
 @Mcp.tool(name="c4_thermostat_set_heat_setpoint_f", description="Set heat setpoint (F) on a Control4 thermostat.")
 def c4_thermostat_set_heat_setpoint_f_tool(device_id: str, setpoint_f: float, confirm_timeout_s: float = 8.0) -> dict:
-    result = thermostat_set_heat_setpoint_f(int(device_id), float(setpoint_f), float(confirm_timeout_s))
+    result, reply = _device_write(
+        int(device_id),
+        thermostat_set_heat_setpoint_f,
+        int(device_id),
+        float(setpoint_f),
+        float(confirm_timeout_s),
+        coalesce="heat_setpoint",
+        detail={"setpoint_f": float(setpoint_f)},
+    )
+    if reply is not None:
+        return reply
     return result if isinstance(result, dict) else {"ok": True, "result": result}
 
 
 @Mcp.tool(name="c4_thermostat_set_cool_setpoint_f", description="Set cool setpoint (F) on a Control4 thermostat.")
 def c4_thermostat_set_cool_setpoint_f_tool(device_id: str, setpoint_f: float, confirm_timeout_s: float = 8.0) -> dict:
-    result = thermostat_set_cool_setpoint_f(int(device_id), float(setpoint_f), float(confirm_timeout_s))
+    result, reply = _device_write(
+        int(device_id),
+        thermostat_set_cool_setpoint_f,
+        int(device_id),
+        float(setpoint_f),
+        float(confirm_timeout_s),
+        coalesce="cool_setpoint",
+        detail={"setpoint_f": float(setpoint_f)},
+    )
+    if reply is not None:
+        return reply
     return result if isinstance(result, dict) else {"ok": True, "result": result}
 
 
@@ -3261,16 +6195,213 @@ def c4_thermostat_set_target_f_tool(
     confirm_timeout_s: float = 10.0,
     deadband_f: float | None = None,
 ) -> dict:
-    result = thermostat_set_target_f(
+    result, reply = _device_write(
+        int(device_id),
+        thermostat_set_target_f,
         int(device_id),
         float(target_f),
         float(confirm_timeout_s),
         (float(deadband_f) if deadband_f is not None else None),
+        coalesce="target",
+        detail={"target_f": float(target_f)},
     )
+    if reply is not None:
+        return reply
     return result if isinstance(result, dict) else {"ok": True, "result": result}
 
 
-# ---- Lights ----
+@Mcp.tool(
+    name="c4_thermostat_apply",
+    description=(
+        "Apply a combined thermostat change in one call (e.g., 'set it to heat at 70 and hold'): any of hvac_mode, "
+        "target_f (or explicit heat_setpoint_f/cool_setpoint_f), fan_mode and hold_mode. Commands are sent back-to-back "
+        "in the right order (mode, setpoints, fan, hold) and the final state is confirmed once."
+    ),
+)
+def c4_thermostat_apply_tool(
+    device_id: str,
+    hvac_mode: str | None = None,
+    target_f: float | None = None,
+    heat_setpoint_f: float | None = None,
+    cool_setpoint_f: float | None = None,
+    fan_mode: str | None = None,
+    hold_mode: str | None = None,
+    deadband_f: float | None = None,
+    confirm_timeout_s: float = 10.0,
+    poll_interval_s: float = 0.5,
+    dry_run: bool = False,
+) -> dict:
+    def _s(v: str | None) -> str | None:
+        return str(v) if v is not None and str(v).strip() else None
+
+    changes = {
+        "hvac_mode": _s(hvac_mode),
+        "heat_setpoint_f": (float(heat_setpoint_f) if heat_setpoint_f is not None else None),
+        "cool_setpoint_f": (float(cool_setpoint_f) if cool_setpoint_f is not None else None),
+        "target_f": (float(target_f) if target_f is not None else None),
+        "fan_mode": _s(fan_mode),
+        "hold_mode": _s(hold_mode),
+    }
+    expected = {k: v for k, v in changes.items() if v is not None}
+    if not expected:
+        return {"ok": False, "error": "provide at least one of: hvac_mode, target_f, heat_setpoint_f, cool_setpoint_f, fan_mode, hold_mode"}
+    if changes["target_f"] is not None and (changes["heat_setpoint_f"] is not None or changes["cool_setpoint_f"] is not None):
+        return {"ok": False, "error": "provide target_f or explicit heat/cool setpoints, not both"}
+
+    try:
+        did = int(str(device_id).strip())
+    except Exception:
+        return {"ok": False, "error": "invalid_device_id", "details": {"device_id": device_id}}
+
+    planned = {
+        "device_id": str(did),
+        "order": [k for k in ("hvac_mode", "heat_setpoint_f", "cool_setpoint_f", "target_f", "fan_mode", "hold_mode") if k in expected],
+        "changes": expected,
+        "deadband_f": (float(deadband_f) if deadband_f is not None else None),
+        "confirm_timeout_s": float(confirm_timeout_s),
+    }
+    if bool(dry_run):
+        return {"ok": True, "dry_run": True, "planned": planned}
+
+    started = time.perf_counter()
+    steps = _thermostat_issue(did, expected, deadband_f)
+    issue_ms = round((time.perf_counter() - started) * 1000.0, 2)
+    accepted = bool(steps) and all(st.get("ok") for st in steps)
+
+    confirm: dict = {}
+    if accepted:
+        confirm = _confirm_all(
+            [str(did)],
+            lambda _k: _thermostat_fields(thermostat_get_state(int(did))),
+            lambda _k, fields: _thermostat_matches(fields or {}, expected),
+            float(confirm_timeout_s),
+            poll_interval_s=float(poll_interval_s),
+            max_workers=1,
+        ).get(str(did), {})
+
+    return {
+        "ok": accepted,
+        "device_id": str(did),
+        "accepted": accepted,
+        "confirmed": bool(confirm.get("confirmed")),
+        "state": confirm.get("last"),
+        "confirmed_after_ms": confirm.get("confirmed_after_ms"),
+        "issue_ms": issue_ms,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000.0, 2),
+        "planned": planned,
+        "steps": steps,
+    }
+
+
+@Mcp.tool(
+    name="c4_thermostats_set_many",
+    description=(
+        "Bulk thermostat change (e.g., away/setback routines): apply target_f and/or hvac_mode and/or hold_mode to many "
+        "thermostats concurrently, then run ONE shared confirmation phase (confirm_timeout_s) for all of them. "
+        "Target device_ids, or all_thermostats=true (optionally narrowed by name_filter)."
+    ),
+)
+def c4_thermostats_set_many_tool(
+    device_ids: list[str] | None = None,
+    all_thermostats: bool = False,
+    name_filter: str | None = None,
+    target_f: float | None = None,
+    hvac_mode: str | None = None,
+    hold_mode: str | None = None,
+    deadband_f: float | None = None,
+    confirm_timeout_s: float = 10.0,
+    concurrency: int = 5,
+    dry_run: bool = False,
+) -> dict:
+    changes = {
+        "hvac_mode": (str(hvac_mode) if hvac_mode is not None and str(hvac_mode).strip() else None),
+        "target_f": (float(target_f) if target_f is not None else None),
+        "hold_mode": (str(hold_mode) if hold_mode is not None and str(hold_mode).strip() else None),
+    }
+    if all(v is None for v in changes.values()):
+        return {"ok": False, "error": "provide at least one of: target_f, hvac_mode, hold_mode"}
+
+    listed = c4_list_devices("thermostat")
+    known = {
+        str(d.get("id")): d
+        for d in ((listed.get("devices") if isinstance(listed, dict) else None) or [])
+        if isinstance(d, dict) and d.get("id") is not None
+    }
+    needle = str(name_filter or "").strip().lower()
+    if bool(all_thermostats):
+        ids = [k for k, d in known.items() if not needle or needle in str(d.get("name") or "").lower()]
+    else:
+        ids = []
+        for raw in list(device_ids or []):
+            try:
+                did = str(int(str(raw).strip()))
+            except Exception:
+                return {"ok": False, "error": "invalid_device_id", "details": {"device_id": raw}}
+            if did not in ids:
+                ids.append(did)
+    if not ids:
+        return {"ok": False, "error": "no thermostats selected (pass device_ids or all_thermostats=true)"}
+
+    expected = {k: v for k, v in changes.items() if v is not None}
+    planned = {
+        "thermostats": [{"device_id": i, "name": (known.get(i) or {}).get("name")} for i in ids],
+        "changes": expected,
+        "deadband_f": (float(deadband_f) if deadband_f is not None else None),
+        "confirm_timeout_s": float(confirm_timeout_s),
+        "concurrency": int(concurrency),
+    }
+    if bool(dry_run):
+        return {"ok": True, "dry_run": True, "planned": planned}
+
+    started = time.perf_counter()
+    issue_rows = _fan_out(lambda did: _thermostat_issue(int(did), expected, deadband_f), ids, int(concurrency))
+    issued_ms = round((time.perf_counter() - started) * 1000.0, 2)
+
+    accepted_ids = [
+        did
+        for did, row in zip(ids, issue_rows)
+        if row.get("ok") and all(st.get("ok") for st in (row.get("result") or []))
+    ]
+
+    def _read(did: str) -> dict:
+        return _thermostat_fields(thermostat_get_state(int(did)))
+
+    confirm = _confirm_all(
+        accepted_ids,
+        _read,
+        lambda _did, fields: _thermostat_matches(fields or {}, expected),
+        float(confirm_timeout_s),
+        max_workers=int(concurrency),
+    )
+
+    results: list[dict] = []
+    for did, row in zip(ids, issue_rows):
+        c = confirm.get(did) or {}
+        entry = {
+            "device_id": did,
+            "name": (known.get(did) or {}).get("name"),
+            "accepted": did in accepted_ids,
+            "confirmed": bool(c.get("confirmed")),
+            "state": c.get("last"),
+            "steps": (row.get("result") if row.get("ok") else None),
+        }
+        if not row.get("ok"):
+            entry["error"] = row.get("error")
+        results.append(entry)
+
+    return {
+        "ok": len(accepted_ids) == len(ids),
+        "count": len(ids),
+        "accepted_count": len(accepted_ids),
+        "confirmed_count": sum(1 for r in results if r["confirmed"]),
+        "issue_ms": issued_ms,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000.0, 2),
+        "planned": planned,
+        "results": results,
+    }
+
+
+# ---- Lights ----
 
 @Mcp.tool(name="c4_light_get_state", description="Get current on/off state of a Control4 light.")
 def c4_light_get_state_tool(device_id: str) -> dict:
@@ -3280,14 +6411,23 @@ def c4_light_get_state_tool(device_id: str) -> dict:
     return out
 
 
-@Mcp.tool(name="c4_light_get_level", description="Get current brightness level (0-100) of a Control4 light.")
-def c4_light_get_level_tool(device_id: str) -> dict:
-    result = light_get_level(int(device_id))
+@Mcp.tool(
+    name="c4_light_get_level",
+    description=(
+        "Get current brightness level (0-100) of a Control4 light. " + _TTL_CACHE_NOTE
+    ),
+)
+def c4_light_get_level_tool(device_id: str, refresh: bool = False, max_age_s: float | None = None) -> dict:
+    result, age, source = _VARS.read_derived(
+        int(device_id), "light_level", lambda: light_get_level(int(device_id)), max_age_s=max_age_s, refresh=bool(refresh)
+    )
     if isinstance(result, int):
-        out = {"ok": True, "device_id": str(device_id), "level": result}
+        if source == "live":
+            _HISTORY.record(device_id, "light_level", int(result))
+        out = {"ok": True, "device_id": str(device_id), "level": result, "cache": _cache_meta(age, source)}
         _remember_tool_call("c4_light_get_level", {"device_id": str(device_id)}, out)
         return out
-    out = {"ok": True, "device_id": str(device_id), "variables": result}
+    out = {"ok": True, "device_id": str(device_id), "variables": result, "cache": _cache_meta(age, source)}
     _remember_tool_call("c4_light_get_level", {"device_id": str(device_id)}, out)
     return out
 
@@ -3302,7 +6442,9 @@ def c4_light_set_level_tool(device_id: str, level: int) -> dict:
     if is_last_lights_token(device_id):
         return c4_lights_set_last_tool(level=int(level))
 
-    state = light_set_level(int(device_id), level)
+    state, reply = _device_write(int(device_id), light_set_level, int(device_id), level, coalesce="level", detail={"level": level})
+    if reply is not None:
+        return reply
     out = {"ok": True, "device_id": str(device_id), "level": level, "state": bool(state)}
     _remember_tool_call("c4_light_set_level", {"device_id": device_id, "level": level}, out)
     return out
@@ -3320,7 +6462,11 @@ def c4_light_ramp_tool(device_id: str, level: int, time_ms: int) -> dict:
     if is_last_lights_token(device_id):
         return c4_lights_set_last_tool(level=int(level), ramp_ms=int(time_ms))
 
-    state = light_ramp(int(device_id), level, time_ms)
+    state, reply = _device_write(
+        int(device_id), light_ramp, int(device_id), level, time_ms, coalesce="level", detail={"level": level, "time_ms": time_ms}
+    )
+    if reply is not None:
+        return reply
     out = {"ok": True, "device_id": str(device_id), "level": level, "time_ms": time_ms, "state": bool(state)}
     _remember_tool_call("c4_light_ramp", {"device_id": device_id, "level": level, "time_ms": time_ms}, out)
     return out
@@ -3331,10 +6477,11 @@ def c4_light_ramp_tool(device_id: str, level: int, time_ms: int) -> dict:
     description=(
         "Fast-path: resolve a light by name (optionally scoped by room) and set level/on/off in a single call. "
         "Uses inventory caching for fast resolution. Optionally ramps and best-effort confirms final level."
+        " Pass resolution_token from c4_resolve/c4_resolve_device/c4_resolve_room instead of names to skip re-resolution."
     ),
 )
 def c4_light_set_by_name_tool(
-    device_name: str,
+    device_name: str | None = None,
     level: int | None = None,
     state: str | None = None,
     room_name: str | None = None,
@@ -3346,10 +6493,18 @@ def c4_light_set_by_name_tool(
     confirm_timeout_s: float = 1.5,
     poll_interval_s: float = 0.2,
     dry_run: bool = False,
+    resolution_token: str | None = None,
 ) -> dict:
     if (level is None) == (state is None):
         return {"ok": False, "error": "provide exactly one of: level or state"}
 
+    tok, tok_err = _resolution_from_token(resolution_token, category="lights", device_name=device_name, room_name=room_name)
+    if tok_err is not None:
+        return tok_err
+    device_name = device_name or (tok.get("device") or {}).get("name")
+    if not str(device_name or "").strip():
+        return {"ok": False, "error": "device_name or resolution_token is required"}
+
     target_level: int
     if state is not None:
         state_norm = str(state or "").strip().lower()
@@ -3370,8 +6525,8 @@ def c4_light_set_by_name_tool(
             resolved_room_id = int(room_id)
         except Exception:
             resolved_room_id = None
-    elif room_name is not None and str(room_name).strip():
-        rr = resolve_room(
+    elif tok.get("room") is not None or (room_name is not None and str(room_name).strip()):
+        rr = tok.get("room") or resolve_room(
             str(room_name),
             require_unique=bool(require_unique),
             include_candidates=bool(include_candidates),
@@ -3384,7 +6539,7 @@ def c4_light_set_by_name_tool(
             resolved_room_id = None
         resolved_room_name = str(rr.get("name")) if rr.get("name") is not None else None
 
-    rd = resolve_device(
+    rd = tok.get("device") or resolve_device(
         str(device_name),
         category="lights",
         room_id=resolved_room_id,
@@ -3418,14 +6573,20 @@ def c4_light_set_by_name_tool(
             "dry_run": True,
         }
 
-    exec_res = light_set_level_ex(
+    exec_res, reply = _device_write(
+        int(device_id),
+        light_set_level_ex,
         int(device_id),
         int(target_level),
         (int(ramp_ms) if ramp_ms is not None else None),
         float(confirm_timeout_s),
         float(poll_interval_s),
         1,
+        coalesce="level",
+        detail={"level": int(target_level)},
     )
+    if reply is not None:
+        exec_res = reply
 
     ok = bool(exec_res.get("ok")) if isinstance(exec_res, dict) else bool(exec_res)
     out = {
@@ -3451,11 +6612,246 @@ def c4_light_set_by_name_tool(
     return out
 
 
+class _AimdLimiter:
+    """Adaptive (AIMD) concurrency limit for Director commands.
+
+    The limit grows additively (+1 per `limit` fast successes) while per-command latency stays under
+    the target and is cut multiplicatively on errors or slow commands. State is process-wide so the
+    limit learned on one call carries over to the next.
+    """
+
+    def __init__(
+        self,
+        initial: int = 3,
+        min_limit: int = 1,
+        max_limit: int = 12,
+        latency_target_ms: float = 1200.0,
+        backoff: float = 0.5,
+    ) -> None:
+        self._cond = threading.Condition()
+        self._min = max(1, int(min_limit))
+        self._max = max(self._min, int(max_limit))
+        self._limit = float(max(self._min, min(self._max, int(initial))))
+        self._inflight = 0
+        self._latency_target_ms = float(latency_target_ms)
+        self._backoff = float(backoff)
+        self._last_decrease = 0.0
+
+    @property
+    def limit(self) -> int:
+        return max(self._min, min(self._max, int(self._limit)))
+
+    @property
+    def max_limit(self) -> int:
+        return self._max
+
+    def acquire(self, timeout_s: float | None = None) -> bool:
+        deadline = (time.monotonic() + float(timeout_s)) if timeout_s is not None else None
+        with self._cond:
+            while self._inflight >= self.limit:
+                remaining = (deadline - time.monotonic()) if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            self._inflight += 1
+            return True
+
+    def release(self, latency_ms: float | None, ok: bool) -> None:
+        """Free a slot and feed one sample; latency_ms=None frees the slot without adjusting the limit."""
+
+        with self._cond:
+            self._inflight = max(0, self._inflight - 1)
+            if latency_ms is None:
+                self._cond.notify_all()
+                return
+            now = time.monotonic()
+            if not ok or float(latency_ms) > self._latency_target_ms:
+                # Cut at most once per latency window so one burst of slow replies doesn't collapse to 1.
+                if now - self._last_decrease >= self._latency_target_ms / 1000.0:
+                    self._limit = max(float(self._min), self._limit * self._backoff)
+                    self._last_decrease = now
+            else:
+                self._limit = min(float(self._max), self._limit + 1.0 / max(1.0, self._limit))
+            self._cond.notify_all()
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "limit_raw": round(self._limit, 3),
+                "in_flight": self._inflight,
+                "min_limit": self._min,
+                "max_limit": self._max,
+                "latency_target_ms": self._latency_target_ms,
+            }
+
+
+_LIGHTS_AIMD = _AimdLimiter(
+    initial=int(os.getenv("C4_LIGHTS_AIMD_INITIAL", "3") or "3"),
+    min_limit=1,
+    max_limit=int(os.getenv("C4_LIGHTS_AIMD_MAX", "12") or "12"),
+    latency_target_ms=float(os.getenv("C4_LIGHTS_AIMD_TARGET_MS", "1200") or "1200"),
+)
+
+
+def _room_light_rows(room_id: int, exclude_names: list[str] | None, include_names: list[str] | None) -> list[dict]:
+    """Lights in a room via the adapter's find_devices (the same discovery the dry-run preview shows),
+    filtered by case-insensitive name substrings."""
+
+    found = find_devices(search=None, category="lights", room_id=int(room_id), limit=200, include_raw=False)
+    devices: list = []
+    if isinstance(found, dict):
+        for k in ("matches", "devices", "results", "items"):
+            if isinstance(found.get(k), list):
+                devices = found[k]
+                break
+    elif isinstance(found, list):
+        devices = found
+    include = [str(n).strip().lower() for n in (include_names or []) if str(n or "").strip()]
+    exclude = [str(n).strip().lower() for n in (exclude_names or []) if str(n or "").strip()]
+
+    rows: list[dict] = []
+    for d in devices:
+        did = (d.get("device_id") if d.get("device_id") is not None else d.get("id")) if isinstance(d, dict) else None
+        if did is None:
+            continue
+        name_l = str(d.get("name") or "").lower()
+        if include and not any(t in name_l for t in include):
+            continue
+        if exclude and any(t in name_l for t in exclude):
+            continue
+        rows.append({"device_id": str(did), "name": d.get("name")})
+    return rows
+
+
+def _light_confirm_level(device_id: int, target_level: int, timeout_s: float, poll_interval_s: float, tolerance: int = 1) -> dict:
+    """Poll a light until it reports target_level (within tolerance) or timeout_s passes."""
+
+    deadline = time.monotonic() + max(0.0, float(timeout_s))
+    observed = None
+    while True:
+        try:
+            level = light_get_level(int(device_id))
+        except Exception:
+            level = None
+        if isinstance(level, int):
+            observed = level
+            if abs(level - int(target_level)) <= int(tolerance):
+                return {"confirmed": True, "observed_level": level}
+        if time.monotonic() >= deadline:
+            return {"confirmed": False, "observed_level": observed}
+        time.sleep(max(0.05, float(poll_interval_s)))
+
+
+def _room_lights_execute(
+    room_id: int,
+    target_level: int,
+    *,
+    exclude_names: list[str] | None = None,
+    include_names: list[str] | None = None,
+    ramp_ms: int | None = None,
+    confirm_timeout_s: float = 0.8,
+    poll_interval_s: float = 0.2,
+    max_concurrency: int | None = None,
+    limiter: _AimdLimiter | None = None,
+    gate: threading.Semaphore | None = None,
+) -> dict:
+    """Set every light in a room, pacing commands with the adaptive limiter.
+
+    max_concurrency is a hard ceiling for this call; gate is an optional semaphore shared by several
+    rooms so a multi-room fan-out stays under one global cap. The limiter is fed the command
+    round-trip only (timed inside the lane); lane queueing and the confirm poll happen outside it.
+    """
+
+    limiter = limiter or _LIGHTS_AIMD
+    lights = _room_light_rows(int(room_id), exclude_names, include_names)
+    ceiling = max(1, min(int(max_concurrency or limiter.max_limit), limiter.max_limit))
+    limit_start = limiter.limit
+    observed: list[int] = []
+    peak = {"in_flight": 0, "now": 0}
+    peak_lock = threading.Lock()
+
+    def _set_one(row: dict) -> dict:
+        if gate is not None:
+            gate.acquire()
+        try:
+            limiter.acquire()
+            with peak_lock:
+                peak["now"] += 1
+                peak["in_flight"] = max(peak["in_flight"], peak["now"])
+                observed.append(limiter.limit)
+            did = int(row["device_id"])
+            timing: dict = {}
+
+            def _command() -> object:
+                t0 = time.perf_counter()
+                try:
+                    if ramp_ms is not None:
+                        return light_ramp(did, int(target_level), int(ramp_ms))
+                    return light_set_level(did, int(target_level))
+                finally:
+                    timing["ms"] = (time.perf_counter() - t0) * 1000.0
+
+            _command.__name__ = "light_ramp" if ramp_ms is not None else "light_set_level"
+            ok = False
+            try:
+                res, reply = _device_write(did, _command, coalesce="level", detail={"level": int(target_level)})
+                if reply is not None:
+                    return {"ok": bool(reply.get("ok")), "execute": reply}
+                ok = not (isinstance(res, dict) and res.get("ok") is False)
+            finally:
+                # Coalesced or rejected writes never reached the Director, so they carry no latency sample.
+                limiter.release(timing.get("ms"), ok)
+                with peak_lock:
+                    peak["now"] -= 1
+        finally:
+            if gate is not None:
+                gate.release()
+        if not ok:
+            return {"ok": False, "execute": res}
+        confirm = _light_confirm_level(did, int(target_level), float(confirm_timeout_s), float(poll_interval_s))
+        return {"ok": True, "execute": {"ok": True, "accepted": True, "result": res, **confirm}}
+
+    started = time.perf_counter()
+    rows = _fan_out(_set_one, lights, ceiling)
+
+    results: list[dict] = []
+    for light, row in zip(lights, rows):
+        entry = {"device_id": light["device_id"], "name": light.get("name"), "elapsed_ms": row.get("elapsed_ms")}
+        if row.get("ok"):
+            entry.update(row.get("result") or {})
+        else:
+            entry.update({"ok": False, "error": row.get("error")})
+        results.append(entry)
+
+    failed = [r["device_id"] for r in results if not r.get("ok")]
+    return {
+        "ok": not failed,
+        "room_id": int(room_id),
+        "target_level": int(target_level),
+        "count": len(results),
+        "succeeded": len(results) - len(failed),
+        "failed_device_ids": failed,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000.0, 2),
+        "concurrency": {
+            "mode": "adaptive",
+            "ceiling": ceiling,
+            "limit_start": limit_start,
+            "limit_end": limiter.limit,
+            "limit_avg": (round(sum(observed) / len(observed), 2) if observed else None),
+            "max_in_flight": peak["in_flight"],
+        },
+        "results": results,
+    }
+
+
 @Mcp.tool(
     name="c4_room_lights_set",
     description=(
         "Fast-path: set all lights in a room to a level (or on/off) in a single call. "
-        "Optionally exclude/include by device name, ramp, and best-effort confirm each light."
+        "Optionally exclude/include by device name, ramp, and best-effort confirm each light. "
+        "Parallelism adapts to Director latency (AIMD; concurrency caps it) and is reported in effective_concurrency; "
+        "adaptive=false uses the adapter's fixed pool of concurrency (default 3) workers instead."
     ),
 )
 def c4_room_lights_set_tool(
@@ -3469,7 +6865,8 @@ def c4_room_lights_set_tool(
     ramp_ms: int | None = None,
     confirm_timeout_s: float = 0.8,
     poll_interval_s: float = 0.2,
-    concurrency: int = 3,
+    concurrency: int | None = None,
+    adaptive: bool = True,
     require_unique: bool = True,
     include_candidates: bool = True,
     dry_run: bool = False,
@@ -3524,7 +6921,8 @@ def c4_room_lights_set_tool(
         "confirm_timeout_s": float(confirm_timeout_s),
         "poll_interval_s": float(poll_interval_s),
         "tolerance": 1,
-        "concurrency": int(concurrency),
+        "concurrency": (int(concurrency) if concurrency is not None else None),
+        "adaptive": bool(adaptive),
     }
 
     if bool(dry_run):
@@ -3538,18 +6936,30 @@ def c4_room_lights_set_tool(
             "dry_run": True,
         }
 
-    exec_res = room_lights_set(
-        int(resolved_room_id),
-        int(target_level),
-        exclude_names=list(exclude_names or []),
-        include_names=list(include_names or []),
-        ramp_ms=(int(ramp_ms) if ramp_ms is not None else None),
-        confirm_timeout_s=float(confirm_timeout_s),
-        poll_interval_s=float(poll_interval_s),
-        tolerance=1,
-        concurrency=int(concurrency),
-        dry_run=False,
-    )
+    if bool(adaptive):
+        exec_res = _room_lights_execute(
+            int(resolved_room_id),
+            int(target_level),
+            exclude_names=list(exclude_names or []),
+            include_names=list(include_names or []),
+            ramp_ms=(int(ramp_ms) if ramp_ms is not None else None),
+            confirm_timeout_s=float(confirm_timeout_s),
+            poll_interval_s=float(poll_interval_s),
+            max_concurrency=(int(concurrency) if concurrency is not None else None),
+        )
+    else:
+        exec_res = room_lights_set(
+            int(resolved_room_id),
+            int(target_level),
+            exclude_names=list(exclude_names or []),
+            include_names=list(include_names or []),
+            ramp_ms=(int(ramp_ms) if ramp_ms is not None else None),
+            confirm_timeout_s=float(confirm_timeout_s),
+            poll_interval_s=float(poll_interval_s),
+            tolerance=1,
+            concurrency=int(concurrency if concurrency is not None else 3),
+            dry_run=False,
+        )
     ok = bool(exec_res.get("ok")) if isinstance(exec_res, dict) else bool(exec_res)
     out = {
         "ok": ok,
@@ -3558,6 +6968,10 @@ def c4_room_lights_set_tool(
         "planned": planned,
         "execute": exec_res,
     }
+    if isinstance(exec_res, dict) and isinstance(exec_res.get("concurrency"), dict):
+        out["effective_concurrency"] = exec_res["concurrency"]
+    else:
+        out["effective_concurrency"] = {"mode": "fixed", "limit": int(concurrency if concurrency is not None else 3)}
     _remember_tool_call(
         "c4_room_lights_set",
         {
@@ -3574,6 +6988,163 @@ def c4_room_lights_set_tool(
     return out
 
 
+@Mcp.tool(
+    name="c4_rooms_lights_set",
+    description=(
+        "Fan-out: set all lights in several rooms to a level (or on/off) in a single call. "
+        "Target rooms by room_ids, room_names and/or an area token (a floor name like 'downstairs', or 'all'). "
+        "Rooms run concurrently under one global concurrency cap and return one aggregated report. "
+        "If any room name is ambiguous, returns candidates and does not execute."
+    ),
+)
+def c4_rooms_lights_set_tool(
+    room_ids: list[str] | None = None,
+    room_names: list[str] | None = None,
+    area: str | None = None,
+    level: int | None = None,
+    state: str | None = None,
+    on_level: int = 100,
+    exclude_names: list[str] | None = None,
+    include_names: list[str] | None = None,
+    ramp_ms: int | None = None,
+    confirm_timeout_s: float = 0.8,
+    poll_interval_s: float = 0.2,
+    concurrency: int = 6,
+    adaptive: bool = True,
+    require_unique: bool = True,
+    include_candidates: bool = True,
+    dry_run: bool = False,
+) -> dict:
+    if not room_ids and not room_names and not (area is not None and str(area).strip()):
+        return {"ok": False, "error": "provide at least one of: room_ids, room_names, area"}
+    if (level is None) == (state is None):
+        return {"ok": False, "error": "provide exactly one of: level or state"}
+
+    target_level: int
+    if state is not None:
+        state_norm = str(state or "").strip().lower()
+        if state_norm not in {"on", "off"}:
+            return {"ok": False, "error": "state must be 'on' or 'off'"}
+        on_level = max(0, min(100, int(on_level)))
+        target_level = on_level if state_norm == "on" else 0
+    else:
+        target_level = int(level)  # type: ignore[arg-type]
+        if target_level < 0 or target_level > 100:
+            return {"ok": False, "error": "level must be 0-100"}
+
+    targets = _resolve_room_targets(
+        room_ids,
+        room_names,
+        area,
+        require_unique=bool(require_unique),
+        include_candidates=bool(include_candidates),
+    )
+    if not targets.get("ok"):
+        return targets
+
+    rooms = list(targets.get("rooms") or [])
+    total_cap = max(1, int(concurrency))
+    room_workers = max(1, min(len(rooms), total_cap))
+    # Split the global cap across concurrently running rooms so in-flight light commands never exceed it.
+    per_room_concurrency = max(1, total_cap // room_workers)
+    gate = threading.BoundedSemaphore(total_cap) if bool(adaptive) else None
+
+    planned = {
+        "rooms": [{"room_id": str(r["room_id"]), "room_name": r.get("room_name")} for r in rooms],
+        "target_level": int(target_level),
+        "exclude_names": list(exclude_names or []),
+        "include_names": list(include_names or []),
+        "ramp_ms": (int(ramp_ms) if ramp_ms is not None else None),
+        "confirm_timeout_s": float(confirm_timeout_s),
+        "poll_interval_s": float(poll_interval_s),
+        "tolerance": 1,
+        "concurrency": total_cap,
+        "room_workers": room_workers,
+        "per_room_concurrency": (None if bool(adaptive) else per_room_concurrency),
+        "adaptive": bool(adaptive),
+    }
+
+    if bool(dry_run):
+        return {"ok": True, "dry_run": True, "planned": planned, "area": targets.get("area")}
+
+    def _set_room(room: dict) -> dict:
+        if gate is not None:
+            # Shared AIMD limiter paces Director load; the gate enforces this call's global cap.
+            return _room_lights_execute(
+                int(room["room_id"]),
+                int(target_level),
+                exclude_names=list(exclude_names or []),
+                include_names=list(include_names or []),
+                ramp_ms=(int(ramp_ms) if ramp_ms is not None else None),
+                confirm_timeout_s=float(confirm_timeout_s),
+                poll_interval_s=float(poll_interval_s),
+                max_concurrency=total_cap,
+                gate=gate,
+            )
+        res = room_lights_set(
+            int(room["room_id"]),
+            int(target_level),
+            exclude_names=list(exclude_names or []),
+            include_names=list(include_names or []),
+            ramp_ms=(int(ramp_ms) if ramp_ms is not None else None),
+            confirm_timeout_s=float(confirm_timeout_s),
+            poll_interval_s=float(poll_interval_s),
+            tolerance=1,
+            concurrency=int(per_room_concurrency),
+            dry_run=False,
+        )
+        return res if isinstance(res, dict) else {"ok": bool(res), "result": res}
+
+    started = time.perf_counter()
+    rows = _fan_out(_set_room, rooms, room_workers)
+
+    results: list[dict] = []
+    for room, row in zip(rooms, rows):
+        exec_res = row.get("result") if row.get("ok") else None
+        entry: dict = {
+            "room_id": str(room["room_id"]),
+            "room_name": room.get("room_name"),
+            "ok": bool(row.get("ok")) and bool((exec_res or {}).get("ok")),
+            "elapsed_ms": row.get("elapsed_ms"),
+        }
+        if exec_res is not None:
+            entry["execute"] = exec_res
+        else:
+            entry["error"] = row.get("error")
+        results.append(entry)
+
+    failed = [r["room_id"] for r in results if not r.get("ok")]
+    out = {
+        "ok": not failed,
+        "room_count": len(results),
+        "succeeded": len(results) - len(failed),
+        "failed_room_ids": failed,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000.0, 2),
+        "area": targets.get("area"),
+        "planned": planned,
+        "results": results,
+    }
+    if bool(adaptive):
+        out["effective_concurrency"] = {"mode": "adaptive", "ceiling": total_cap, **_LIGHTS_AIMD.snapshot()}
+    else:
+        out["effective_concurrency"] = {"mode": "fixed", "limit": total_cap, "per_room": per_room_concurrency}
+    _remember_tool_call(
+        "c4_rooms_lights_set",
+        {
+            "room_ids": room_ids,
+            "room_names": room_names,
+            "area": area,
+            "level": level,
+            "state": state,
+            "exclude_names": exclude_names,
+            "include_names": include_names,
+            "ramp_ms": ramp_ms,
+        },
+        out,
+    )
+    return out
+
+
 # ---- Locks ----
 
 
@@ -3585,16 +7156,152 @@ def _parse_lock_desired_locked(state: str | None) -> bool | None:
         return False
     return None
 
-@Mcp.tool(name="c4_lock_get_state", description="Get current lock state (locked/unlocked) for a Control4 lock.")
-def c4_lock_get_state_tool(device_id: str) -> dict:
+class _LockStateCache:
+    """Last confirmed and last commanded state per lock, with timestamps.
+
+    Director lock state is often stale, so reads can be answered from here instantly with an explicit
+    age; a stale entry triggers one background refresh through the lock engine.
+    """
+
+    def __init__(self, stale_after_s: float = 300.0) -> None:
+        self._lock = threading.Lock()
+        self._rows: dict[str, dict] = {}
+        self.stale_after_s = float(stale_after_s)
+
+    def record(self, device_id: object, result: dict, desired_locked: bool | None = None) -> None:
+        """Fold a lock_get_state/lock_lock/lock_unlock result (already augmented) into the cache."""
+
+        if not isinstance(result, dict):
+            return
+        now = time.time()
+        key = str(device_id)
+        with self._lock:
+            row = self._rows.setdefault(key, {"device_id": key})
+            if desired_locked is not None and result.get("accepted"):
+                row["commanded_locked"] = bool(desired_locked)
+                row["commanded_at"] = now
+                # Accepted but not confirmed (e.g. a jammed bolt): never let the command stand in for a reading.
+                row["commanded_unconfirmed"] = not bool(result.get("confirmed"))
+            confirmed: bool | None = None
+            if desired_locked is not None and result.get("confirmed"):
+                confirmed = bool(desired_locked)
+            elif desired_locked is None and result.get("locked") in (True, False):
+                confirmed = bool(result.get("locked"))
+            if confirmed is not None:
+                row["confirmed_locked"] = confirmed
+                row["confirmed_at"] = now
+                if desired_locked is None:
+                    row["commanded_unconfirmed"] = False
+            if result.get("effective_state") in {"locked", "unlocked"}:
+                after = result.get("after") if isinstance(result.get("after"), dict) else {}
+                read = result.get("locked") in (True, False) or after.get("locked") in (True, False)
+                row["effective_state"] = result.get("effective_state")
+                row["effective_at"] = now
+                # _augment_lock_result falls back to the command estimate when nothing was read back.
+                row["effective_source"] = "confirmed" if read or result.get("confirmed") else "commanded"
+        if confirmed is not None:
+            _HISTORY.record(key, "lock_state", "locked" if confirmed else "unlocked", now)
+
+    def get(self, device_id: object) -> dict | None:
+        with self._lock:
+            row = self._rows.get(str(device_id))
+            return dict(row) if row else None
+
+    def view(self, device_id: object) -> dict | None:
+        """Cached answer for c4_lock_get_state, or None when nothing is known yet."""
+
+        row = self.get(device_id)
+        if not row or row.get("effective_at") is None:
+            return None
+        now = time.time()
+
+        def _age(ts: object) -> float | None:
+            return round(now - float(ts), 3) if isinstance(ts, (int, float)) else None
+
+        def _state(v: object) -> str | None:
+            return ("locked" if v else "unlocked") if v in (True, False) else None
+
+        # Serve what was actually read. A newer command that was never confirmed makes the state unknown
+        # rather than assumed: reporting a lock as locked because it was asked to be is not safe.
+        effective = row.get("effective_state")
+        source = row.get("effective_source") or "confirmed"
+        unconfirmed = source == "commanded" or bool(
+            row.get("commanded_unconfirmed")
+            and isinstance(row.get("commanded_at"), (int, float))
+            and float(row["commanded_at"]) >= float(row.get("confirmed_at") or 0)
+        )
+
+        age_s = _age(row.get("effective_at"))
+        return {
+            "ok": True,
+            "device_id": int(device_id),
+            "cached": True,
+            "effective_state": effective,
+            "effective_source": source,
+            "locked": None if unconfirmed else ((effective == "locked") if effective in {"locked", "unlocked"} else None),
+            "unconfirmed": unconfirmed,
+            "age_s": age_s,
+            "stale": bool(age_s is None or age_s > self.stale_after_s),
+            "confirmed_state": _state(row.get("confirmed_locked")),
+            "confirmed_age_s": _age(row.get("confirmed_at")),
+            "commanded_state": _state(row.get("commanded_locked")),
+            "commanded_age_s": _age(row.get("commanded_at")),
+        }
+
+
+_LOCK_STATE = _LockStateCache(stale_after_s=float(os.getenv("C4_LOCK_STATE_STALE_S", "300") or "300"))
+
+
+def _lock_refresh_in_background(device_id: int) -> None:
+    """Queue one live state read; concurrent stale reads collapse into the newest."""
+
+    def _done(fut: Future) -> None:
+        try:
+            res = fut.result()
+        except Exception:
+            return
+        if isinstance(res, dict):
+            _LOCK_STATE.record(device_id, _augment_lock_result(dict(res), desired_locked=None))
+
+    job = _LOCK_ENGINE.submit(int(device_id), lock_get_state, int(device_id), op="lock_get_state", coalesce_key="state_read")
+    job.future.add_done_callback(_done)
+
+
+@Mcp.tool(
+    name="c4_lock_get_state",
+    description=(
+        "Get current lock state (locked/unlocked) for a Control4 lock. Answers instantly from the lock state cache "
+        "(last confirmed/commanded state with age_s and a stale flag; stale entries refresh in the background). "
+        "effective_source says whether effective_state was read back ('confirmed') or only commanded ('commanded'); "
+        "locked stays null until a confirmed read. "
+        "Pass refresh=true (or max_age_s) to force a live Director read."
+    ),
+)
+def c4_lock_get_state_tool(device_id: str, refresh: bool = False, max_age_s: float | None = None) -> dict:
+    if not bool(refresh):
+        cached = _LOCK_STATE.view(device_id)
+        fresh_enough = (
+            cached is not None
+            and (max_age_s is None or (cached.get("age_s") is not None and float(cached["age_s"]) <= float(max_age_s)))
+        )
+        if cached is not None and fresh_enough:
+            if cached.get("stale"):
+                _lock_refresh_in_background(int(device_id))
+                cached["refreshing"] = True
+            return cached
+
     try:
-        fut = _lock_pool.submit(lock_get_state, int(device_id))
-        result = fut.result(timeout=20)
+        result = _LOCK_ENGINE.run(int(device_id), lock_get_state, int(device_id), timeout_s=_LOCK_TIMEOUT_S, op="lock_get_state")
         if isinstance(result, dict):
-            return _augment_lock_result(result, desired_locked=None)
+            out = _augment_lock_result(result, desired_locked=None)
+            _LOCK_STATE.record(device_id, out)
+            out["cached"] = False
+            return out
         return {"ok": True, "result": result}
     except FutureTimeout:
-        return {"ok": False, "device_id": int(device_id), "error": "tool timeout (20s)"}
+        return {"ok": False, "device_id": int(device_id), "error": _lock_timeout_error()}
+    except _LaneQueueFull as e:
+        return _lane_busy_reply(device_id, e)
     except Exception as e:
         return {"ok": False, "device_id": int(device_id), "error": repr(e)}
 
@@ -3602,13 +7309,26 @@ def c4_lock_get_state_tool(device_id: str) -> dict:
 @Mcp.tool(name="c4_lock_unlock", description="Unlock a Control4 lock.")
 def c4_lock_unlock_tool(device_id: str) -> dict:
     try:
-        fut = _lock_pool.submit(lock_unlock, int(device_id))
-        result = fut.result(timeout=20)
+        result = _LOCK_ENGINE.run(
+            int(device_id),
+            lock_unlock,
+            int(device_id),
+            timeout_s=_LOCK_TIMEOUT_S,
+            op="lock_unlock",
+            coalesce_key=_lock_coalesce_key(False),
+            detail={"locked": False},
+        )
+        if isinstance(result, _Coalesced):
+            return result.reply(device_id)
         if isinstance(result, dict):
-            return _augment_lock_result(result, desired_locked=False)
+            out = _augment_lock_result(result, desired_locked=False)
+            _LOCK_STATE.record(device_id, out, desired_locked=False)
+            return out
         return {"ok": True, "result": result}
     except FutureTimeout:
-        return {"ok": False, "device_id": int(device_id), "error": "tool timeout (20s)"}
+        return {"ok": False, "device_id": int(device_id), "error": _lock_timeout_error()}
+    except _LaneQueueFull as e:
+        return _lane_busy_reply(device_id, e)
     except Exception as e:
         return {"ok": False, "device_id": int(device_id), "error": repr(e)}
 
@@ -3616,37 +7336,69 @@ def c4_lock_unlock_tool(device_id: str) -> dict:
 @Mcp.tool(name="c4_lock_lock", description="Lock a Control4 lock.")
 def c4_lock_lock_tool(device_id: str) -> dict:
     try:
-        fut = _lock_pool.submit(lock_lock, int(device_id))
-        result = fut.result(timeout=20)
+        result = _LOCK_ENGINE.run(
+            int(device_id),
+            lock_lock,
+            int(device_id),
+            timeout_s=_LOCK_TIMEOUT_S,
+            op="lock_lock",
+            coalesce_key=_lock_coalesce_key(True),
+            detail={"locked": True},
+        )
+        if isinstance(result, _Coalesced):
+            return result.reply(device_id)
         if isinstance(result, dict):
-            return _augment_lock_result(result, desired_locked=True)
+            out = _augment_lock_result(result, desired_locked=True)
+            _LOCK_STATE.record(device_id, out, desired_locked=True)
+            return out
         return {"ok": True, "result": result}
     except FutureTimeout:
-        return {"ok": False, "device_id": int(device_id), "error": "tool timeout (20s)"}
+        return {"ok": False, "device_id": int(device_id), "error": _lock_timeout_error()}
+    except _LaneQueueFull as e:
+        return _lane_busy_reply(device_id, e)
     except Exception as e:
         return {"ok": False, "device_id": int(device_id), "error": repr(e)}
 
 
+@Mcp.tool(
+    name="c4_lock_engine_status",
+    description=(
+        "Read-only: lock execution engine status. Shows per-lock queue depth, oldest queued age, "
+        "in-flight operations (and whether a timed-out caller abandoned them), plus totals."
+    ),
+)
+def c4_lock_engine_status_tool() -> dict:
+    return {"ok": True, "timeout_s": _LOCK_TIMEOUT_S, "engine": _LOCK_ENGINE.stats()}
+
+
 @Mcp.tool(
     name="c4_lock_set_by_name",
     description=(
         "Fast-path: resolve a lock by name (optionally scoped by room) and lock/unlock in one call. "
-        "Returns accepted/confirmed semantics and includes resolution details."
+        "Returns accepted/confirmed semantics and includes resolution details. Pass resolution_token from c4_resolve/c4_resolve_device/c4_resolve_room instead of names to skip re-resolution."
     ),
 )
 def c4_lock_set_by_name_tool(
-    lock_name: str,
-    state: str,
+    lock_name: str | None = None,
+    state: str | None = None,
     room_name: str | None = None,
     room_id: str | None = None,
     require_unique: bool = True,
     include_candidates: bool = True,
     dry_run: bool = False,
+    resolution_token: str | None = None,
 ) -> dict:
     desired_locked = _parse_lock_desired_locked(state)
     if desired_locked is None:
         return {"ok": False, "error": "state must be lock/unlock (locked/unlocked)", "state": state}
 
+    tok, tok_err = _resolution_from_token(resolution_token, category="locks", device_name=lock_name, room_name=room_name)
+    if tok_err is not None:
+        return tok_err
+    lock_name = lock_name or (tok.get("device") or {}).get("name")
+    if not str(lock_name or "").strip():
+        return {"ok": False, "error": "lock_name or resolution_token is required"}
+
     resolved_room_id: int | None = None
     resolved_room_name: str | None = None
     rr: dict | None = None
@@ -3656,8 +7408,8 @@ def c4_lock_set_by_name_tool(
             resolved_room_id = int(room_id)
         except Exception:
             resolved_room_id = None
-    elif room_name is not None and str(room_name).strip():
-        rr = resolve_room(
+    elif tok.get("room") is not None or (room_name is not None and str(room_name).strip()):
+        rr = tok.get("room") or resolve_room(
             str(room_name),
             require_unique=bool(require_unique),
             include_candidates=bool(include_candidates),
@@ -3670,7 +7422,7 @@ def c4_lock_set_by_name_tool(
             resolved_room_id = None
         resolved_room_name = str(rr.get("name")) if rr.get("name") is not None else None
 
-    rd = resolve_device(
+    rd = tok.get("device") or resolve_device(
         str(lock_name or ""),
         category="locks",
         room_id=resolved_room_id,
@@ -3712,15 +7464,24 @@ def c4_lock_set_by_name_tool(
         }
 
     try:
-        if desired_locked:
-            fut = _lock_pool.submit(lock_lock, int(device_id))
-            result = fut.result(timeout=20)
-        else:
-            fut = _lock_pool.submit(lock_unlock, int(device_id))
-            result = fut.result(timeout=20)
+        op = lock_lock if desired_locked else lock_unlock
+        result = _LOCK_ENGINE.run(
+            int(device_id),
+            op,
+            int(device_id),
+            timeout_s=_LOCK_TIMEOUT_S,
+            op=op.__name__,
+            coalesce_key=_lock_coalesce_key(bool(desired_locked)),
+            detail={"locked": bool(desired_locked)},
+        )
+        if isinstance(result, _Coalesced):
+            out = result.reply(device_id)
+            out.update({"lock_name": str(lock_name), "resolve": rd, "planned": planned})
+            return out
 
         if isinstance(result, dict):
             out = _augment_lock_result(result, desired_locked=bool(desired_locked))
+            _LOCK_STATE.record(device_id, out, desired_locked=bool(desired_locked))
             out["lock_name"] = str(lock_name)
             out["resolve"] = rd
             if rr is not None:
@@ -3742,13 +7503,15 @@ def c4_lock_set_by_name_tool(
         return {
             "ok": False,
             "device_id": int(device_id),
-            "error": "tool timeout (20s)",
+            "error": _lock_timeout_error(),
             "planned": planned,
             "resolve": rd,
             "resolve_room": rr,
             "room_id": planned["room_id"],
             "room_name": resolved_room_name,
         }
+    except _LaneQueueFull as e:
+        return {**_lane_busy_reply(device_id, e), "planned": planned, "resolve": rd, "resolve_room": rr}
     except Exception as e:
         return {
             "ok": False,
@@ -3762,11 +7525,130 @@ def c4_lock_set_by_name_tool(
         }
 
 
-# ✅ In 0.6.1: mount without passing a registry object or Mcp() instance
-mount_mcp(app, url_prefix="/mcp", middlewares=[mw_auth, mw_ratelimit, mw_cors])
-
-
-def _patch_mcp_registry_name_collisions() -> None:
+@Mcp.tool(
+    name="c4_locks_lock_all",
+    description=(
+        "Secure all doors: lock every lock from c4_list_devices('locks') concurrently, optionally scoped by room "
+        "(room_id/room_name) and/or a case-insensitive lock name filter. Each lock reports accepted/confirmed/"
+        "effective_state; the whole call is bounded by one overall deadline_s."
+    ),
+)
+def c4_locks_lock_all_tool(
+    room_id: str | None = None,
+    room_name: str | None = None,
+    name_filter: str | None = None,
+    deadline_s: float = 25.0,
+    require_unique: bool = True,
+    include_candidates: bool = True,
+    dry_run: bool = False,
+) -> dict:
+    resolved_room_id: int | None = None
+    rr: dict | None = None
+
+    if room_id is not None and str(room_id).strip():
+        try:
+            resolved_room_id = int(room_id)
+        except Exception:
+            return {"ok": False, "error": "invalid_room_id", "details": {"room_id": room_id}}
+    elif room_name is not None and str(room_name).strip():
+        rr = resolve_room(
+            str(room_name),
+            require_unique=bool(require_unique),
+            include_candidates=bool(include_candidates),
+        )
+        if not isinstance(rr, dict) or not rr.get("ok"):
+            return {"ok": False, "error": "could not resolve room", "details": rr}
+        try:
+            resolved_room_id = int(rr.get("room_id"))
+        except Exception:
+            return {"ok": False, "error": "resolve_room_invalid_room_id", "details": rr}
+
+    listed = c4_list_devices("locks")
+    needle = str(name_filter or "").strip().lower()
+    locks: list[dict] = []
+    for d in (listed.get("devices") if isinstance(listed, dict) else None) or []:
+        if not isinstance(d, dict) or d.get("id") is None:
+            continue
+        if resolved_room_id is not None and str(d.get("roomId")) != str(resolved_room_id):
+            continue
+        if needle and needle not in str(d.get("name") or "").lower():
+            continue
+        locks.append({"device_id": str(d.get("id")), "name": d.get("name"), "room_id": d.get("roomId"), "room_name": d.get("roomName")})
+
+    planned = {
+        "room_id": (str(resolved_room_id) if resolved_room_id is not None else None),
+        "name_filter": (str(name_filter) if name_filter is not None else None),
+        "deadline_s": float(deadline_s),
+        "locks": locks,
+    }
+    if not locks:
+        return {"ok": False, "error": "no locks matched", "planned": planned, "resolve_room": rr}
+    if bool(dry_run):
+        return {"ok": True, "dry_run": True, "planned": planned, "resolve_room": rr}
+
+    started = time.perf_counter()
+    jobs = [
+        _LOCK_ENGINE.submit(
+            int(lk["device_id"]),
+            lock_lock,
+            int(lk["device_id"]),
+            op="lock_lock",
+            coalesce_key=_lock_coalesce_key(True),
+            detail={"locked": True},
+        )
+        for lk in locks
+    ]
+    futures_wait([j.future for j in jobs], timeout=max(0.0, float(deadline_s)))
+
+    results: list[dict] = []
+    for lk, job in zip(locks, jobs):
+        entry: dict = dict(lk)
+        if not job.future.done():
+            _LOCK_ENGINE.cancel(job)
+            entry.update({"ok": False, "error": f"deadline exceeded ({float(deadline_s):g}s)", "timed_out": True})
+            results.append(entry)
+            continue
+        try:
+            res = job.future.result()
+        except _LaneQueueFull as e:
+            entry.update(_lane_busy_reply(lk["device_id"], e))
+            results.append(entry)
+            continue
+        except Exception as e:
+            entry.update({"ok": False, "error": repr(e)})
+            results.append(entry)
+            continue
+        if isinstance(res, _Coalesced):
+            entry.update(res.reply(lk["device_id"]))
+        elif isinstance(res, dict):
+            augmented = _augment_lock_result(dict(res), desired_locked=True)
+            _LOCK_STATE.record(lk["device_id"], augmented, desired_locked=True)
+            entry.update(augmented)
+        else:
+            entry.update({"ok": True, "result": res})
+        results.append(entry)
+
+    secured = [r["device_id"] for r in results if r.get("effective_state") == "locked"]
+    failed = [r["device_id"] for r in results if r.get("ok") is False]
+    return {
+        "ok": not failed,
+        "all_secure": len(secured) == len(results),
+        "count": len(results),
+        "secured_count": len(secured),
+        "failed_device_ids": failed,
+        "timed_out_device_ids": [r["device_id"] for r in results if r.get("timed_out")],
+        "elapsed_ms": round((time.perf_counter() - started) * 1000.0, 2),
+        "planned": planned,
+        "resolve_room": rr,
+        "results": results,
+    }
+
+
+# ✅ In 0.6.1: mount without passing a registry object or Mcp() instance
+mount_mcp(app, url_prefix="/mcp", middlewares=[mw_auth, mw_ratelimit, mw_cors])
+
+
+def _patch_mcp_registry_name_collisions() -> None:
     """Avoid keyword collisions in flask-mcp-server's registry call helpers.
 
     flask-mcp-server's integrated HTTP handler calls:
@@ -3866,6 +7748,1397 @@ def _patch_mcp_registry_name_collisions() -> None:
 _patch_mcp_registry_name_collisions()
 
 
+# ---------- Change events (SSE) ----------
+
+
+def _variables_map(payload: object) -> dict:
+    """{variable_name: value} from an item_get_variables payload, keeping the Director's variable names."""
+
+    rows = payload
+    if isinstance(payload, dict):
+        rows = payload.get("variables") if payload.get("variables") is not None else payload
+    out: dict = {}
+    if isinstance(rows, list):
+        for row in rows:
+            if not isinstance(row, dict):
+                continue
+            name = row.get("varName") or row.get("name") or row.get("variable")
+            if name is not None and "value" in row:
+                out[str(name)] = row.get("value")
+    elif isinstance(rows, dict):
+        for k, v in rows.items():
+            if not isinstance(v, (dict, list)):
+                out[str(k)] = v
+    return out
+
+
+class _SimulatedDirector:
+    """In-memory variable source for driving the event watcher without a Director (tests/demos).
+
+    Install with _EVENTS.set_source(sim); sim.set(device_id, "LIGHT_LEVEL", 40) then shows up as a change event
+    on the next poll.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._vars: dict[int, dict] = {}
+
+    def set(self, device_id: int, variable: str, value: object) -> None:
+        with self._lock:
+            self._vars.setdefault(int(device_id), {})[str(variable)] = value
+
+    def __call__(self, device_id: int) -> list[dict]:
+        with self._lock:
+            return [{"varName": k, "value": v} for k, v in self._vars.get(int(device_id), {}).items()]
+
+
+class _EventSubscriber:
+    __slots__ = ("device_ids", "queue", "dropped", "cond", "closed", "created_at", "poll_interval_s", "baselines")
+
+    def __init__(self, device_ids: set[int], max_queue: int, poll_interval_s: float | None = None) -> None:
+        self.device_ids = set(device_ids)
+        self.poll_interval_s = poll_interval_s
+        # max_queue=0: the subscriber only widens the watch set (e.g. the variable cache) and takes no events.
+        self.queue: deque | None = deque(maxlen=int(max_queue)) if int(max_queue) > 0 else None
+        self.dropped = 0
+        self.cond = threading.Condition()
+        self.closed = False
+        self.created_at = time.time()
+        # Private diff baselines set by prime(); consumed by the next poll of that device.
+        self.baselines: dict[int, dict] = {}
+
+    def push(self, event: dict) -> None:
+        if self.queue is None:
+            return
+        with self.cond:
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1
+            self.queue.append(event)
+            self.cond.notify_all()
+
+    def pop_all(self, timeout_s: float) -> list[dict]:
+        if self.queue is None:
+            return []
+        with self.cond:
+            if not self.queue and not self.closed:
+                self.cond.wait(timeout=max(0.0, float(timeout_s)))
+            out = list(self.queue)
+            self.queue.clear()
+            return out
+
+
+class _VariableWatcher:
+    """Single internal poller that turns Director variable changes into events for all subscribers.
+
+    Only devices some subscriber asked for are polled, and the thread runs only while there are
+    subscribers, so N clients cost one poll per device per interval. The variable source is pluggable
+    (default item_get_variables) so a simulated Director can drive it.
+    """
+
+    def __init__(self, poll_interval_s: float = 2.0, max_workers: int = 6, max_queue: int = 500) -> None:
+        self.poll_interval_s = max(0.1, float(poll_interval_s))
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(1, int(max_queue))
+        self._source = item_get_variables
+        self._lock = threading.Lock()
+        self._subs: list[_EventSubscriber] = []
+        self._last: dict[int, dict] = {}
+        self._thread: threading.Thread | None = None
+        self._sinks: list = []
+        self._polls = 0
+        self._events = 0
+        self._errors = 0
+
+    def set_source(self, source) -> None:
+        """Swap the variable source (callable(device_id) -> variables payload); resets baselines."""
+
+        with self._lock:
+            self._source = source if source is not None else item_get_variables
+            self._last.clear()
+
+    def add_sink(self, fn) -> None:
+        """Register fn(device_id, variables_payload, monotonic_ts), called for every successful device poll."""
+
+        with self._lock:
+            self._sinks.append(fn)
+
+    def subscribe(self, device_ids: set[int], queue: bool = True, poll_interval_s: float | None = None) -> _EventSubscriber:
+        """Add a subscriber; poll_interval_s asks for faster polling while it is subscribed (floor 0.2s)."""
+
+        interval = max(0.2, float(poll_interval_s)) if poll_interval_s is not None else None
+        sub = _EventSubscriber({int(d) for d in device_ids}, self.max_queue if queue else 0, interval)
+        with self._lock:
+            self._subs.append(sub)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="c4-event-watcher", daemon=True)
+                self._thread.start()
+        return sub
+
+    def update_subscription(self, sub: _EventSubscriber, device_ids: set[int]) -> None:
+        with self._lock:
+            sub.device_ids = {int(d) for d in device_ids}
+            if sub in self._subs and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="c4-event-watcher", daemon=True)
+                self._thread.start()
+
+    def unsubscribe(self, sub: _EventSubscriber) -> None:
+        with sub.cond:
+            sub.closed = True
+            sub.cond.notify_all()
+        with self._lock:
+            if sub in self._subs:
+                self._subs.remove(sub)
+            wanted = set().union(*(s.device_ids for s in self._subs)) if self._subs else set()
+            for did in [d for d in self._last if d not in wanted]:
+                self._last.pop(did, None)
+
+    def prime(self, device_id: int, sub: _EventSubscriber | None = None) -> dict:
+        """Read one device now and make it sub's diff baseline (before a command whose effect should be diffed).
+
+        The baseline is private to sub, so other subscribers of the same device keep diffing against the
+        shared one and miss nothing. Without sub, the read only seeds the shared baseline if there is none.
+        """
+
+        did = int(device_id)
+        with self._lock:
+            source = self._source
+            sinks = list(self._sinks)
+        payload = source(did)
+        current = _variables_map(payload)
+        with self._lock:
+            if sub is not None:
+                sub.baselines[did] = current
+            self._last.setdefault(did, current)
+        for sink in sinks:
+            try:
+                sink(did, payload, time.monotonic())
+            except Exception:
+                pass
+        return current
+
+    def _interval(self) -> float:
+        with self._lock:
+            asked = [s.poll_interval_s for s in self._subs if s.poll_interval_s is not None]
+        return min([self.poll_interval_s, *asked])
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._subs:
+                    self._thread = None
+                    return
+            started = time.monotonic()
+            try:
+                self.poll_once()
+            except Exception as e:
+                self._errors += 1
+                _log.warning(_safe_json({"event": "event_watcher_error", "error": repr(e)}))
+            time.sleep(max(0.0, self._interval() - (time.monotonic() - started)))
+
+    def poll_once(self) -> list[dict]:
+        """Poll every subscribed device once, dispatch change events, and return them."""
+
+        with self._lock:
+            subs = list(self._subs)
+            source = self._source
+            sinks = list(self._sinks)
+            device_ids = sorted(set().union(*(s.device_ids for s in subs)) if subs else set())
+        if not device_ids:
+            return []
+
+        rows = _fan_out(lambda did: source(int(did)), device_ids, self.max_workers)
+        now = time.time()
+        polled_at = time.monotonic()
+
+        def _diff(did: int, previous: dict, current: dict) -> list[dict]:
+            return [
+                {"device_id": str(did), "variable": var, "old": previous.get(var), "new": current.get(var), "ts": round(now, 3)}
+                for var in sorted(set(previous) | set(current))
+                if previous.get(var) != current.get(var)
+            ]
+
+        events: list[dict] = []
+        private: dict[int, list[dict]] = {}  # id(sub) -> events diffed against that subscriber's primed baseline
+        primed: set[tuple[int, int]] = set()
+        with self._lock:
+            self._polls += 1
+            for did, row in zip(device_ids, rows):
+                if not row.get("ok"):
+                    self._errors += 1
+                    continue
+                current = _variables_map(row.get("result"))
+                previous = self._last.get(did)
+                self._last[did] = current
+                for sub in subs:
+                    base = sub.baselines.pop(did, None)
+                    if base is not None:
+                        private.setdefault(id(sub), []).extend(_diff(did, base, current))
+                        primed.add((id(sub), did))
+                if previous is None:
+                    continue  # first sight of this device is the baseline, not a change
+                events.extend(_diff(did, previous, current))
+            self._events += len(events) + sum(len(v) for v in private.values())
+
+        for sink in sinks:
+            for did, row in zip(device_ids, rows):
+                if row.get("ok"):
+                    try:
+                        sink(int(did), row.get("result"), polled_at)
+                    except Exception:
+                        self._errors += 1
+
+        for ev in events:
+            did = int(ev["device_id"])
+            for sub in subs:
+                if did in sub.device_ids and (id(sub), did) not in primed:
+                    sub.push(ev)
+        for sub in subs:
+            for ev in private.get(id(sub), []):
+                sub.push(ev)
+        return events
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "subscribers": len(self._subs),
+                "watched_devices": len(set().union(*(s.device_ids for s in self._subs)) if self._subs else set()),
+                "running": self._thread is not None,
+                "polls": self._polls,
+                "events": self._events,
+                "errors": self._errors,
+                "dropped": sum(s.dropped for s in self._subs),
+                "poll_interval_s": self.poll_interval_s,
+                "source": getattr(self._source, "__name__", type(self._source).__name__),
+            }
+
+
+_EVENTS = _VariableWatcher(
+    poll_interval_s=float(os.getenv("C4_EVENTS_POLL_S", "2.0") or "2.0"),
+    max_workers=int(os.getenv("C4_EVENTS_MAX_WORKERS", "6") or "6"),
+    max_queue=int(os.getenv("C4_EVENTS_MAX_QUEUE", "500") or "500"),
+)
+_EVENTS_MAX_DEVICES = int(os.getenv("C4_EVENTS_MAX_DEVICES", "200") or "200")
+
+
+# ---------- Director variable cache ----------
+
+
+class _VariableCache:
+    """Per-device Director variables plus derived reads (light level, media/fan/shade state), each with an age.
+
+    By default this is a TTL cache: entries are refilled only by reads older than max_age_s. With
+    C4_VARCACHE_BACKGROUND, devices read through the cache join one shared _VariableWatcher set until idle
+    for idle_s; any watcher poll (including /mcp/events subscriptions) also feeds it. When the watcher sees
+    a device's variables change, or any write tool touches the device, its derived reads are dropped;
+    while its variables stay unchanged, derived reads count as fresh as the last poll.
+    """
+
+    def __init__(self, max_age_s: float = 5.0, background: bool = False, idle_s: float = 300.0, max_devices: int = 500) -> None:
+        self.max_age_s = max(0.0, float(max_age_s))
+        self.background = bool(background)
+        self.idle_s = max(1.0, float(idle_s))
+        self.max_devices = max(1, int(max_devices))
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[int, dict] = OrderedDict()
+        self._sub: _EventSubscriber | None = None
+        self._last_prune = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _entry(self, device_id: int) -> dict:
+        # Caller holds self._lock.
+        e = self._entries.get(device_id)
+        if e is None:
+            e = {"variables": None, "map": None, "vars_at": None, "verified_at": None, "derived": {}, "last_read": 0.0}
+            self._entries[device_id] = e
+            while len(self._entries) > self.max_devices:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(device_id)
+        return e
+
+    def ingest(self, device_id: int, payload: object, at: float | None = None) -> None:
+        """Record a variables read (watcher poll or live read); a changed map drops derived reads."""
+
+        vmap = _variables_map(payload)
+        at = time.monotonic() if at is None else float(at)
+        with self._lock:
+            e = self._entry(int(device_id))
+            previous = e["map"]
+            if previous is not None and previous != vmap:
+                e["derived"].clear()
+                e["verified_at"] = None
+            elif previous is not None:
+                e["verified_at"] = at
+            e["variables"], e["map"], e["vars_at"] = payload, vmap, at
+        if previous != vmap:
+            _HISTORY.record_changes(int(device_id), previous, vmap)
+        if at - self._last_prune > 30.0:
+            self._sync_watch()
+
+    def invalidate(self, device_id: object) -> None:
+        try:
+            did = int(device_id)  # type: ignore[arg-type]
+        except Exception:
+            return  # room-keyed lanes ("room:12") have no per-device cache entry
+        with self._lock:
+            e = self._entries.get(did)
+            if e is None:
+                return
+            e["derived"].clear()
+            e["vars_at"] = None
+            e["verified_at"] = None
+            self.invalidations += 1
+
+    def invalidate_all(self) -> None:
+        with self._lock:
+            for e in self._entries.values():
+                e["derived"].clear()
+                e["vars_at"] = None
+                e["verified_at"] = None
+            self.invalidations += 1
+
+    def _sync_watch(self) -> None:
+        if not self.background:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._last_prune = now
+            ids = {d for d, e in self._entries.items() if now - float(e.get("last_read") or 0.0) <= self.idle_s}
+            sub = self._sub
+            if sub is None and ids:
+                sub = self._sub = _EVENTS.subscribe(ids, queue=False)
+                return
+            if sub is not None and not ids:
+                self._sub = None
+        if sub is None:
+            return
+        if ids:
+            _EVENTS.update_subscription(sub, ids)
+        else:
+            _EVENTS.unsubscribe(sub)
+
+    def _touch(self, device_id: int) -> None:
+        with self._lock:
+            e = self._entry(int(device_id))
+            known = e["last_read"] and time.monotonic() - e["last_read"] <= self.idle_s
+            e["last_read"] = time.monotonic()
+        if not known:
+            self._sync_watch()
+
+    def read_variables(self, device_id: int, max_age_s: float | None = None, refresh: bool = False) -> tuple[object, float, str]:
+        """(variables payload, age_s, 'cache'|'live')."""
+
+        did = int(device_id)
+        limit = self.max_age_s if max_age_s is None else max(0.0, float(max_age_s))
+        self._touch(did)
+        if not refresh:
+            with self._lock:
+                e = self._entries.get(did)
+                if e is not None and e["vars_at"] is not None and time.monotonic() - e["vars_at"] <= limit:
+                    self.hits += 1
+                    return e["variables"], time.monotonic() - e["vars_at"], "cache"
+        with self._lock:
+            self.misses += 1
+        payload = item_get_variables(did)
+        self.ingest(did, payload)
+        return payload, 0.0, "live"
+
+    def read_derived(
+        self,
+        device_id: int,
+        kind: str,
+        fetch,
+        max_age_s: float | None = None,
+        refresh: bool = False,
+    ) -> tuple[object, float, str]:
+        """(value, age_s, 'cache'|'live') for a parsed read such as light_get_level(device_id)."""
+
+        did = int(device_id)
+        limit = self.max_age_s if max_age_s is None else max(0.0, float(max_age_s))
+        self._touch(did)
+        if not refresh:
+            with self._lock:
+                e = self._entries.get(did)
+                hit = e["derived"].get(kind) if e is not None else None
+                if hit is not None:
+                    value, at = hit
+                    verified = e["verified_at"]
+                    fresh_at = max(at, verified) if verified is not None and verified >= at else at
+                    age = time.monotonic() - fresh_at
+                    if age <= limit:
+                        self.hits += 1
+                        return value, age, "cache"
+        with self._lock:
+            self.misses += 1
+        value = fetch()
+        with self._lock:
+            self._entry(did)["derived"][kind] = (value, time.monotonic())
+        return value, 0.0, "live"
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "devices": len(self._entries),
+                "watched": len(self._sub.device_ids) if self._sub is not None else 0,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "max_age_s": self.max_age_s,
+                "background": self.background,
+            }
+
+
+_VARS = _VariableCache(
+    max_age_s=float(os.getenv("C4_VARCACHE_MAX_AGE_S", "5.0") or "5.0"),
+    # Opt-in: background watching polls the Director every couple of seconds per watched device.
+    background=_env_truthy("C4_VARCACHE_BACKGROUND", default=False),
+    idle_s=float(os.getenv("C4_VARCACHE_IDLE_S", "300") or "300"),
+)
+_EVENTS.add_sink(_VARS.ingest)
+
+
+_WRITE_DEVICE_KEYS = ("device_id", "source_device_id", "tv_device_id")
+_WRITE_ROOM_KEYS = ("room_id", "room_ids", "room_name", "room_names", "area")
+
+
+def _invalidate_after_write(args: dict, body: object) -> None:
+    """Drop cached reads a write tool call may have changed.
+
+    Called from the after_request hook for every write tool, so fan/media/scene/send-command writes that
+    do not go through a device lane are covered too. Device ids come from the args or the result; room-
+    scoped writes (and writes naming no device) clear every cached device, since their targets are not known.
+    """
+
+    ids: set[str] = set()
+    sources: list[dict] = [args]
+    if isinstance(body, dict):
+        sources.append(body)
+        if isinstance(body.get("result"), dict):
+            sources.append(body["result"])
+    for src in sources:
+        for k in _WRITE_DEVICE_KEYS:
+            if src.get(k) is not None and str(src.get(k)).strip():
+                ids.add(str(src.get(k)).strip())
+        if isinstance(src.get("device_ids"), list):
+            ids.update(str(d).strip() for d in src["device_ids"] if str(d).strip())
+    room_scoped = any(args.get(k) not in (None, "", []) for k in _WRITE_ROOM_KEYS)
+    if room_scoped or not ids:
+        _VARS.invalidate_all()
+        return
+    for did in ids:
+        _VARS.invalidate(did)
+
+
+# ---------- Per-device state history ----------
+
+
+class _RingSeries:
+    """Fixed-capacity ring of (timestamp, value) for one device variable; timestamps live in an array('d')."""
+
+    __slots__ = ("ts", "values", "head", "size", "first_ts")
+
+    def __init__(self, capacity: int) -> None:
+        cap = max(2, int(capacity))
+        self.ts = array("d", bytes(8 * cap))
+        self.values: list = [None] * cap
+        self.head = 0
+        self.size = 0
+        self.first_ts: float | None = None
+
+    def append(self, ts: float, value: object) -> bool:
+        """Append unless value equals the newest entry (the buffer is a change log, not a sample log)."""
+
+        cap = len(self.values)
+        if self.size:
+            newest = (self.head - 1) % cap
+            if self.values[newest] == value:
+                return False
+        else:
+            self.first_ts = float(ts)
+        self.ts[self.head] = float(ts)
+        self.values[self.head] = value
+        self.head = (self.head + 1) % cap
+        self.size = min(self.size + 1, cap)
+        return True
+
+    def newest_first(self) -> list[tuple[float, object]]:
+        cap = len(self.values)
+        return [(self.ts[(self.head - 1 - i) % cap], self.values[(self.head - 1 - i) % cap]) for i in range(self.size)]
+
+
+class _DeviceHistory:
+    """Bounded per-device change history fed by reads the server already does.
+
+    Sources: watcher/cache variable polls, lock state results, contact/motion reads and light level reads.
+    Memory is capped by per-series capacity and an LRU limit on the number of (device, variable) series.
+    """
+
+    _MAX_TEXT = 64
+
+    def __init__(self, per_series: int = 64, max_series: int = 2000) -> None:
+        self.per_series = max(2, int(per_series))
+        self.max_series = max(1, int(max_series))
+        self._lock = threading.Lock()
+        self._series: OrderedDict[tuple[str, str], _RingSeries] = OrderedDict()
+        self._by_device: dict[str, set[str]] = {}
+        self.recorded = 0
+
+    @classmethod
+    def _compact(cls, value: object) -> object:
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        text = value if isinstance(value, str) else _safe_json(value)
+        return text if len(text) <= cls._MAX_TEXT else text[: cls._MAX_TEXT - 1] + "…"
+
+    def record(self, device_id: object, variable: str, value: object, ts: float | None = None) -> None:
+        key = (str(device_id).strip(), str(variable))
+        stamp = time.time() if ts is None else float(ts)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = _RingSeries(self.per_series)
+                self._series[key] = series
+                self._by_device.setdefault(key[0], set()).add(key[1])
+                while len(self._series) > self.max_series:
+                    (old_dev, old_var), _ = self._series.popitem(last=False)
+                    vars_ = self._by_device.get(old_dev)
+                    if vars_ is not None:
+                        vars_.discard(old_var)
+                        if not vars_:
+                            self._by_device.pop(old_dev, None)
+            else:
+                self._series.move_to_end(key)
+            if series.append(stamp, self._compact(value)):
+                self.recorded += 1
+
+    def record_changes(self, device_id: object, previous: dict | None, current: dict, ts: float | None = None) -> None:
+        for var, value in current.items():
+            if previous is None or previous.get(var) != value:
+                self.record(device_id, var, value, ts)
+
+    def query(self, device_id: object, variable: str | None = None, limit: int = 20, since_s: float | None = None) -> list[dict]:
+        dev = str(device_id)
+        wanted = _norm_key(variable) if variable is not None and str(variable).strip() else None
+        now = time.time()
+        cutoff = now - float(since_s) if since_s is not None else None
+        out: list[dict] = []
+        with self._lock:
+            names = sorted(self._by_device.get(dev, set()))
+            picked = [(n, self._series[(dev, n)]) for n in names if wanted is None or _norm_key(n) == wanted]
+            snap = [(n, s.newest_first(), s.first_ts) for n, s in picked]
+        for name, entries, first_ts in snap:
+            if not entries:
+                continue
+            cur_ts, cur_val = entries[0]
+            rows = [{"ts": round(t, 3), "value": v} for t, v in entries if cutoff is None or t >= cutoff]
+            out.append(
+                {
+                    "variable": name,
+                    "current": cur_val,
+                    "current_since_ts": round(cur_ts, 3),
+                    "current_for_s": round(now - cur_ts, 1),
+                    # The oldest entry is when we first looked, not when the value changed.
+                    "current_since_is_lower_bound": len(entries) == 1 and first_ts is not None and cur_ts == first_ts,
+                    "count": len(entries),
+                    "changes": rows[: max(1, int(limit))],
+                }
+            )
+        return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"series": len(self._series), "devices": len(self._by_device), "recorded": self.recorded, "per_series": self.per_series}
+
+
+_HISTORY = _DeviceHistory(
+    per_series=int(os.getenv("C4_HISTORY_PER_SERIES", "64") or "64"),
+    max_series=int(os.getenv("C4_HISTORY_MAX_SERIES", "2000") or "2000"),
+)
+
+
+def _cache_meta(age_s: float, source: str) -> dict:
+    return {"source": source, "age_s": round(float(age_s), 3)}
+
+
+def _event_device_ids(room_id: str | None, room_name: str | None, category: str | None, device_ids: list[str]) -> dict:
+    """Resolve SSE filters (room, category, explicit devices) to a device id set; filters intersect."""
+
+    selected: set[int] | None = None
+    details: dict = {}
+
+    if device_ids:
+        try:
+            selected = {int(str(d).strip()) for d in device_ids if str(d).strip()}
+        except Exception:
+            return {"ok": False, "error": "invalid device_ids"}
+
+    if category is not None and str(category).strip():
+        listed = c4_list_devices(str(category))
+        if not isinstance(listed, dict) or not listed.get("ok"):
+            return {"ok": False, "error": "invalid category", "details": listed}
+        ids = {int(d.get("id")) for d in listed.get("devices") or [] if isinstance(d, dict) and d.get("id") is not None}
+        selected = ids if selected is None else selected & ids
+
+    rid: int | None = None
+    if room_id is not None and str(room_id).strip():
+        try:
+            rid = int(str(room_id).strip())
+        except Exception:
+            return {"ok": False, "error": "invalid room_id"}
+    elif room_name is not None and str(room_name).strip():
+        rr = resolve_room(str(room_name), require_unique=True, include_candidates=True)
+        if not isinstance(rr, dict) or not rr.get("ok") or rr.get("room_id") is None:
+            return {"ok": False, "error": "could not resolve room", "details": rr}
+        rid = int(rr.get("room_id"))
+        details["resolve_room"] = rr
+    if rid is not None:
+        ids = {
+            int(i.get("id"))
+            for i in get_all_items() or []
+            if isinstance(i, dict)
+            and i.get("typeName") == "device"
+            and i.get("id") is not None
+            and str(i.get("roomId") or i.get("parentId")) == str(rid)
+        }
+        selected = ids if selected is None else selected & ids
+        details["room_id"] = str(rid)
+
+    if selected is None:
+        return {"ok": False, "error": "provide at least one filter: room_id, room_name, category or device_ids"}
+    if not selected:
+        return {"ok": False, "error": "no devices matched the filters", **details}
+    if len(selected) > _EVENTS_MAX_DEVICES:
+        return {"ok": False, "error": f"too many devices ({len(selected)} > C4_EVENTS_MAX_DEVICES={_EVENTS_MAX_DEVICES})", **details}
+    return {"ok": True, "device_ids": sorted(selected), **details}
+
+
+def _with_mcp_middlewares(view):
+    """Wrap a plain Flask view with the same auth/rate-limit/CORS middlewares mount_mcp uses."""
+
+    for mw in (mw_cors, mw_ratelimit, mw_auth):
+        try:
+            view = mw(view)
+        except Exception as e:
+            _log.warning(_safe_json({"event": "middleware_wrap_failed", "middleware": getattr(mw, "__name__", str(mw)), "error": repr(e)}))
+    return view
+
+
+def _sse(event: str, data: object) -> str:
+    return f"event: {event}\ndata: {_safe_json(data)}\n\n"
+
+
+def _mcp_events_view():
+    args = request.args
+    raw_ids = [p for p in str(args.get("device_ids") or "").split(",") if p.strip()]
+    resolved = _event_device_ids(args.get("room_id"), args.get("room_name"), args.get("category"), raw_ids)
+    if not resolved.get("ok"):
+        return jsonify({**resolved, "request_id": getattr(g, "request_id", None)}), 400
+
+    try:
+        heartbeat_s = max(1.0, float(args.get("heartbeat_s") or 15.0))
+    except Exception:
+        heartbeat_s = 15.0
+    device_ids = set(resolved["device_ids"])
+
+    def _stream():
+        # Subscribe only once the body is actually being streamed: a client that disconnects before the
+        # first chunk never starts the generator, so its finally (and unsubscribe) would never run.
+        sub = _EVENTS.subscribe(device_ids)
+        try:
+            yield _sse("ready", {"device_ids": [str(d) for d in sorted(device_ids)], "poll_interval_s": _EVENTS.poll_interval_s})
+            while True:
+                events = sub.pop_all(heartbeat_s)
+                if sub.closed:
+                    return
+                if not events:
+                    yield ": keepalive\n\n"
+                    continue
+                for ev in events:
+                    yield _sse("change", ev)
+        finally:
+            _EVENTS.unsubscribe(sub)
+
+    return Response(
+        stream_with_context(_stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+app.add_url_rule("/mcp/events", "c4_mcp_events", _with_mcp_middlewares(_mcp_events_view), methods=["GET"])
+
+
+# ---------- Streaming command trace ----------
+
+
+def _trace_events(
+    device_id: int,
+    command: str,
+    params: dict | None,
+    watch_var_names: list[str] | None,
+    timeout_s: float,
+    settle_s: float,
+    poll_interval_s: float,
+):
+    """Send a command and yield trace records as watched variables change, using the shared watcher.
+
+    Yields {"type": "start"|"sent"|"change"|"end", ...}. Ends early once at least one watched variable
+    changed and nothing changed for settle_s; otherwise at timeout_s.
+    """
+
+    did = int(device_id)
+    wanted = {_norm_key(n) for n in (watch_var_names or []) if str(n or "").strip()}
+
+    def _watched(name: str) -> bool:
+        return not wanted or _norm_key(name) in wanted
+
+    started = time.monotonic()
+    sub = _EVENTS.subscribe({did}, poll_interval_s=float(poll_interval_s))
+    changes = 0
+    try:
+        baseline = _EVENTS.prime(did, sub)
+        yield {
+            "type": "start",
+            "device_id": str(did),
+            "command": str(command or ""),
+            "watch": sorted(wanted) if wanted else None,
+            "baseline": {k: v for k, v in baseline.items() if _watched(k)},
+        }
+        try:
+            sent = item_send_command(did, str(command or ""), params)
+        except Exception as e:
+            sent = {"ok": False, "error": repr(e)}
+        _VARS.invalidate(did)
+        yield {"type": "sent", "result": sent, "t_ms": round((time.monotonic() - started) * 1000.0, 1)}
+        if isinstance(sent, dict) and sent.get("ok") is False:
+            yield {"type": "end", "reason": "send_failed", "changes": 0, "elapsed_ms": round((time.monotonic() - started) * 1000.0, 1)}
+            return
+
+        deadline = started + max(0.0, float(timeout_s))
+        last_change: float | None = None
+        reason = "timeout"
+        while True:
+            now = time.monotonic()
+            if last_change is not None and now - last_change >= float(settle_s):
+                reason = "settled"
+                break
+            if now >= deadline:
+                break
+            wait_s = deadline - now
+            if last_change is not None:
+                wait_s = min(wait_s, float(settle_s) - (now - last_change))
+            for ev in sub.pop_all(max(0.05, wait_s)):
+                if not _watched(str(ev.get("variable"))):
+                    continue
+                changes += 1
+                last_change = time.monotonic()
+                yield {"type": "change", **ev, "t_ms": round((last_change - started) * 1000.0, 1)}
+        yield {"type": "end", "reason": reason, "changes": changes, "elapsed_ms": round((time.monotonic() - started) * 1000.0, 1)}
+    finally:
+        _EVENTS.unsubscribe(sub)
+
+
+def _mcp_trace_view():
+    body = request.get_json(silent=True) if request.is_json else None
+    body = body if isinstance(body, dict) else {}
+    blocked = _write_guard_response("c4_debug_trace_command")
+    if blocked is not None:
+        return blocked
+    try:
+        did = int(str(body.get("device_id") or "").strip())
+    except Exception:
+        return jsonify({"ok": False, "error": "device_id is required", "request_id": getattr(g, "request_id", None)}), 400
+    if not str(body.get("command") or "").strip():
+        return jsonify({"ok": False, "error": "command is required", "request_id": getattr(g, "request_id", None)}), 400
+
+    # Explicit zeros are honoured; only missing values take the defaults.
+    timing: dict[str, float] = {}
+    for key, default in (("timeout_s", 30.0), ("settle_s", 2.0), ("poll_interval_s", 0.5)):
+        raw = body.get(key)
+        try:
+            timing[key] = float(default if raw is None else raw)
+        except Exception:
+            return jsonify({"ok": False, "error": f"{key} must be a number", "request_id": getattr(g, "request_id", None)}), 400
+
+    fmt = str(body.get("format") or request.args.get("format") or "").strip().lower()
+    if not fmt:
+        fmt = "sse" if "text/event-stream" in str(request.headers.get("Accept") or "") else "ndjson"
+    records = _trace_events(
+        did,
+        str(body.get("command")),
+        body.get("params") if isinstance(body.get("params"), dict) else None,
+        body.get("watch_var_names") if isinstance(body.get("watch_var_names"), list) else None,
+        timing["timeout_s"],
+        timing["settle_s"],
+        timing["poll_interval_s"],
+    )
+
+    def _stream():
+        for rec in records:
+            yield _sse(rec["type"], rec) if fmt == "sse" else _safe_json(rec) + "\n"
+
+    return Response(
+        stream_with_context(_stream()),
+        mimetype=("text/event-stream" if fmt == "sse" else "application/x-ndjson"),
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+app.add_url_rule("/mcp/trace", "c4_mcp_trace", _with_mcp_middlewares(_mcp_trace_view), methods=["POST"])
+
+
+# ---------- Batch calls ----------
+
+
+_BATCH_MAX_ITEMS = int(os.getenv("C4_BATCH_MAX_ITEMS", "25") or "25")
+_BATCH_MAX_CONCURRENCY = int(os.getenv("C4_BATCH_MAX_CONCURRENCY", "8") or "8")
+_FORWARD_SKIP_HEADERS = {"content-length", "content-type", "host", "x-request-id"}
+
+
+def _dispatch_tool_call(
+    name: str,
+    args: dict,
+    *,
+    call_path: str,
+    headers: dict,
+    request_id: str,
+    remote_addr: str | None = None,
+) -> dict:
+    """Run one tool call through the full Flask pipeline (before_request guardrails, MCP auth/rate limit, logging).
+
+    Safe to call from worker threads: each call gets its own request context. remote_addr carries the
+    outer caller's address so per-item rate limits and logs are charged to it, not to localhost.
+    """
+
+    started = time.perf_counter()
+    with app.test_request_context(
+        call_path,
+        method="POST",
+        json={"kind": "tool", "name": str(name), "args": dict(args or {})},
+        headers={**headers, "X-Request-Id": request_id},
+        environ_base=({"REMOTE_ADDR": remote_addr} if remote_addr else None),
+    ):
+        resp = app.full_dispatch_request()
+    body = resp.get_json(silent=True)
+    status = int(resp.status_code)
+    # /mcp/call wraps tool output as {"result": {...}}; a tool's own ok=false is the item's failure.
+    result = body.get("result") if isinstance(body, dict) else None
+    failed = (isinstance(body, dict) and body.get("ok") is False) or (isinstance(result, dict) and result.get("ok") is False)
+    ok = status < 400 and not failed
+    return {
+        "name": str(name),
+        "ok": ok,
+        "status": status,
+        "request_id": request_id,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000.0, 2),
+        "response": body if body is not None else resp.get_data(as_text=True)[:2000],
+    }
+
+
+def _batch_context() -> dict:
+    """Call path, forwarded headers, caller address and request id prefix captured from the outer request."""
+
+    path = request.path
+    call_path = path[: -len("/batch")] + "/call" if path.endswith("/batch") else path
+    headers = {k: v for k, v in request.headers.items() if k.lower() not in _FORWARD_SKIP_HEADERS}
+    headers.setdefault("X-Session-Id", getattr(g, "session_id", "") or "")
+    return {
+        "call_path": call_path,
+        "headers": headers,
+        "remote_addr": request.remote_addr,
+        "request_id": getattr(g, "request_id", None) or str(uuid.uuid4()),
+    }
+
+
+def _batch_response(body: dict):
+    calls = body.get("calls") if isinstance(body.get("calls"), list) else body.get("items")
+    if not isinstance(calls, list) or not calls:
+        return jsonify({"ok": False, "error": "calls must be a non-empty list", "request_id": getattr(g, "request_id", None)}), 400
+    if len(calls) > _BATCH_MAX_ITEMS:
+        return jsonify({"ok": False, "error": f"too many calls ({len(calls)} > C4_BATCH_MAX_ITEMS={_BATCH_MAX_ITEMS})", "request_id": getattr(g, "request_id", None)}), 400
+
+    ctx = _batch_context()
+    try:
+        workers = max(1, min(_BATCH_MAX_CONCURRENCY, int(body.get("max_concurrency") or _BATCH_MAX_CONCURRENCY)))
+    except Exception:
+        workers = _BATCH_MAX_CONCURRENCY
+
+    def _one(indexed: tuple[int, object]) -> dict:
+        idx, call = indexed
+        if not isinstance(call, dict):
+            return {"ok": False, "status": 400, "error": "call must be an object"}
+        kind = call.get("kind", "tool")
+        if kind != "tool":
+            return {"ok": False, "status": 400, "name": call.get("name"), "error": "only kind='tool' calls are allowed in a batch (no nesting)"}
+        name = str(call.get("name") or call.get("tool") or "").strip()
+        if not name:
+            return {"ok": False, "status": 400, "error": "missing tool name"}
+        args = call.get("args") if isinstance(call.get("args"), dict) else {}
+        return _dispatch_tool_call(
+            name,
+            args,
+            call_path=ctx["call_path"],
+            headers=ctx["headers"],
+            request_id=f"{ctx['request_id']}.{idx}",
+            remote_addr=ctx.get("remote_addr"),
+        )
+
+    started = time.perf_counter()
+    rows = _fan_out(_one, list(enumerate(calls)), workers)
+    results: list[dict] = []
+    for idx, row in enumerate(rows):
+        entry = row.get("result") if row.get("ok") else {"ok": False, "status": 500, "error": row.get("error")}
+        results.append({"index": idx, **entry})
+
+    return jsonify(
+        {
+            "ok": all(r.get("ok") for r in results),
+            "count": len(results),
+            "failed_indexes": [r["index"] for r in results if not r.get("ok")],
+            "elapsed_ms": round((time.perf_counter() - started) * 1000.0, 2),
+            "request_id": ctx["request_id"],
+            "results": results,
+        }
+    )
+
+
+def _mcp_batch_view():
+    body = request.get_json(silent=True) if request.is_json else None
+    if isinstance(body, list):
+        body = {"calls": body}
+    if not isinstance(body, dict):
+        return jsonify({"ok": False, "error": "expected a JSON object with calls", "request_id": getattr(g, "request_id", None)}), 400
+    return _batch_response(body)
+
+
+# Items are re-dispatched through /mcp/call, which carries the MCP middlewares; the batch entry points
+# (/mcp/batch and kind="batch" on /mcp/call) only need the outer auth/rate-limit check.
+_MCP_BATCH_VIEW = _with_mcp_middlewares(_mcp_batch_view)
+app.add_url_rule("/mcp/batch", "c4_mcp_batch", _MCP_BATCH_VIEW, methods=["POST"])
+
+
+# ---------- Plan execution ----------
+
+
+_PLAN_MAX_STEPS = int(os.getenv("C4_PLAN_MAX_STEPS", "25") or "25")
+_PLAN_REF_PATTERN = re.compile(r"\$\{([A-Za-z0-9_\-]+)((?:\.[A-Za-z0-9_\-]+)*)\}")
+
+
+def _plan_refs(value, out: set[str]) -> set[str]:
+    """Collect the step ids referenced by ${step.path} strings or {"$ref": "step.path"} objects."""
+
+    if isinstance(value, str):
+        for m in _PLAN_REF_PATTERN.finditer(value):
+            out.add(m.group(1))
+    elif isinstance(value, dict):
+        if set(value.keys()) == {"$ref"} and isinstance(value.get("$ref"), str):
+            out.add(value["$ref"].split(".", 1)[0].strip())
+        else:
+            for v in value.values():
+                _plan_refs(v, out)
+    elif isinstance(value, list):
+        for v in value:
+            _plan_refs(v, out)
+    return out
+
+
+def _plan_lookup(outputs: dict, step_id: str, path: str):
+    """Walk a dotted path into a finished step's output; list indexes are numeric segments."""
+
+    if step_id not in outputs:
+        raise KeyError(f"step '{step_id}' has no output")
+    cur = outputs[step_id]
+    walked = step_id
+    for part in [p for p in str(path or "").split(".") if p]:
+        walked = f"{walked}.{part}"
+        if isinstance(cur, dict) and part in cur:
+            cur = cur[part]
+        elif isinstance(cur, list) and part.lstrip("-").isdigit() and -len(cur) <= int(part) < len(cur):
+            cur = cur[int(part)]
+        else:
+            raise KeyError(f"unresolved reference '{walked}'")
+    return cur
+
+
+def _plan_substitute(value, outputs: dict):
+    if isinstance(value, str):
+        whole = _PLAN_REF_PATTERN.fullmatch(value)
+        if whole:
+            # A lone reference keeps the referenced value's type (ints stay ints, lists stay lists).
+            return _plan_lookup(outputs, whole.group(1), whole.group(2))
+
+        def _text(m: re.Match) -> str:
+            found = _plan_lookup(outputs, m.group(1), m.group(2))
+            return found if isinstance(found, str) else json.dumps(found)
+
+        return _PLAN_REF_PATTERN.sub(_text, value)
+    if isinstance(value, dict):
+        if set(value.keys()) == {"$ref"} and isinstance(value.get("$ref"), str):
+            step_id, _, path = value["$ref"].partition(".")
+            return _plan_lookup(outputs, step_id.strip(), path)
+        return {k: _plan_substitute(v, outputs) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_plan_substitute(v, outputs) for v in value]
+    return value
+
+
+def _plan_validate(steps) -> tuple[list[dict] | None, list[str] | None, str | None]:
+    """Normalize steps and compute a topological order; returns (steps, order, error)."""
+
+    if not isinstance(steps, list) or not steps:
+        return None, None, "steps must be a non-empty list"
+    if len(steps) > _PLAN_MAX_STEPS:
+        return None, None, f"too many steps ({len(steps)} > C4_PLAN_MAX_STEPS={_PLAN_MAX_STEPS})"
+
+    normalized: list[dict] = []
+    seen: set[str] = set()
+    for idx, raw in enumerate(steps):
+        if not isinstance(raw, dict):
+            return None, None, f"step {idx} must be an object"
+        step_id = str(raw.get("id") or f"step{idx + 1}").strip()
+        if step_id in seen:
+            return None, None, f"duplicate step id '{step_id}'"
+        seen.add(step_id)
+        tool = str(raw.get("tool") or raw.get("name") or "").strip()
+        if not tool:
+            return None, None, f"step '{step_id}' is missing a tool name"
+        if tool == "c4_execute_plan":
+            return None, None, f"step '{step_id}': plans cannot be nested"
+        args = raw.get("args") if raw.get("args") is not None else {}
+        if not isinstance(args, dict):
+            return None, None, f"step '{step_id}': args must be an object"
+        explicit = raw.get("depends_on") or []
+        if isinstance(explicit, str):
+            explicit = [explicit]
+        depends = {str(d).strip() for d in explicit if str(d).strip()} | _plan_refs(args, set())
+        normalized.append({"index": idx, "id": step_id, "tool": tool, "args": args, "depends_on": depends})
+
+    for step in normalized:
+        unknown = sorted(step["depends_on"] - seen)
+        if unknown:
+            return None, None, f"step '{step['id']}' depends on unknown step(s): {', '.join(unknown)}"
+        if step["id"] in step["depends_on"]:
+            return None, None, f"step '{step['id']}' depends on itself"
+
+    # Kahn's algorithm, tie-broken by input position so the order is stable.
+    remaining = {s["id"]: set(s["depends_on"]) for s in normalized}
+    position = {s["id"]: s["index"] for s in normalized}
+    order: list[str] = []
+    ready = sorted((sid for sid, deps in remaining.items() if not deps), key=position.get)
+    while ready:
+        sid = ready.pop(0)
+        order.append(sid)
+        del remaining[sid]
+        released = [other for other, deps in remaining.items() if sid in deps and len(deps) == 1]
+        for deps in remaining.values():
+            deps.discard(sid)
+        ready = sorted(ready + released, key=position.get)
+    if remaining:
+        return None, None, f"dependency cycle among steps: {', '.join(sorted(remaining, key=position.get))}"
+
+    for step in normalized:
+        step["depends_on"] = sorted(step["depends_on"], key=position.get)
+    return normalized, order, None
+
+
+def _plan_step_output(row: dict):
+    """The tool's own result from a dispatched /mcp/call row (the HTTP body wraps it as {"result": ...})."""
+
+    body = row.get("response")
+    if isinstance(body, dict) and "result" in body and "ok" not in body:
+        return body.get("result")
+    return body
+
+
+@Mcp.tool(
+    name="c4_execute_plan",
+    description=(
+        "Execute a small DAG of tool calls in one request. steps: [{id, tool, args, depends_on?}]. "
+        "Args may reference earlier step outputs with \"${step_id.path}\" (a lone reference keeps its type) or "
+        "{\"$ref\": \"step_id.path\"}; referenced steps become dependencies automatically. Independent steps run in "
+        "parallel (max_concurrency); when a step fails, steps depending on it are skipped while other branches continue "
+        "(fail_fast=true skips everything not yet started). Each step goes through the same guardrails, auth and "
+        "logging as a direct /mcp/call. Steps still running at deadline_s are reported as still_running (outcome "
+        "unknown; the call may yet take effect), not failed. Results are returned in the plan's step order."
+    ),
+)
+def c4_execute_plan_tool(
+    steps: list,
+    max_concurrency: int | None = None,
+    deadline_s: float | None = 60.0,
+    fail_fast: bool = False,
+) -> dict:
+    normalized, order, error = _plan_validate(steps)
+    if error:
+        return {"ok": False, "error": error}
+
+    if has_request_context():
+        ctx = _batch_context()
+        if not ctx["call_path"].endswith("/mcp/call"):
+            ctx["call_path"] = "/mcp/call"
+    else:
+        ctx = {"call_path": "/mcp/call", "headers": {}, "request_id": str(uuid.uuid4())}
+
+    try:
+        workers = max(1, min(_BATCH_MAX_CONCURRENCY, int(max_concurrency or _BATCH_MAX_CONCURRENCY)))
+    except Exception:
+        workers = _BATCH_MAX_CONCURRENCY
+    try:
+        deadline_f = float(deadline_s) if deadline_s is not None else None
+    except Exception:
+        deadline_f = 60.0
+    deadline = None
+    if deadline_f is not None and deadline_f > 0:
+        deadline = time.monotonic() + deadline_f
+
+    by_id = {s["id"]: s for s in normalized}
+    dependents: dict[str, list[str]] = {sid: [] for sid in by_id}
+    for step in normalized:
+        for dep in step["depends_on"]:
+            dependents[dep].append(step["id"])
+
+    outputs: dict[str, object] = {}
+    entries: dict[str, dict] = {}
+    waiting = {sid: set(by_id[sid]["depends_on"]) for sid in order}
+    running: dict[Future, str] = {}
+    started = time.perf_counter()
+
+    def _skip(sid: str, reason: str, because: str | None = None) -> None:
+        if sid in entries:
+            return
+        waiting.pop(sid, None)
+        entries[sid] = {"status": "skipped", "ok": False, "reason": reason}
+        if because:
+            entries[sid]["skipped_because"] = because
+        for child in dependents[sid]:
+            _skip(child, "dependency did not succeed", sid)
+
+    def _run(step: dict, args: dict) -> dict:
+        return _dispatch_tool_call(
+            step["tool"],
+            args,
+            call_path=ctx["call_path"],
+            headers=ctx["headers"],
+            request_id=f"{ctx['request_id']}.{step['id']}",
+            remote_addr=ctx.get("remote_addr"),
+        )
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="c4-plan")
+    try:
+        while waiting or running:
+            halted = fail_fast and any(e.get("status") == "failed" for e in entries.values())
+            for sid in [s for s in order if s in waiting and not waiting[s]]:
+                if len(running) >= workers:
+                    break
+                if halted:
+                    _skip(sid, "fail_fast: an earlier step failed")
+                    continue
+                if deadline is not None and time.monotonic() >= deadline:
+                    _skip(sid, "plan deadline reached before start")
+                    continue
+                step = by_id[sid]
+                try:
+                    args = _plan_substitute(step["args"], outputs)
+                except KeyError as e:
+                    entries[sid] = {"status": "failed", "ok": False, "error": str(e.args[0] if e.args else e)}
+                    waiting.pop(sid, None)
+                    for child in dependents[sid]:
+                        _skip(child, "dependency did not succeed", sid)
+                    continue
+                waiting.pop(sid)
+                entries[sid] = {"status": "running", "args": args}
+                running[pool.submit(_run, step, args)] = sid
+
+            if not running:
+                # Anything still waiting has an unfinished dependency that can no longer run.
+                for sid in [s for s in order if s in waiting]:
+                    _skip(sid, "dependency did not run")
+                break
+
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, _ = futures_wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # A dispatched write cannot be recalled: its outcome is unknown, not failed.
+                for fut, sid in list(running.items()):
+                    entries[sid].update(
+                        {
+                            "status": "still_running",
+                            "ok": None,
+                            "timed_out": True,
+                            "outcome": "unknown",
+                            "error": "plan deadline reached while the step was running",
+                        }
+                    )
+                    for child in dependents[sid]:
+                        _skip(child, "dependency still running at the plan deadline", sid)
+                running.clear()
+                for sid in [s for s in order if s in waiting]:
+                    _skip(sid, "plan deadline reached before start")
+                break
+
+            for fut in done:
+                sid = running.pop(fut)
+                try:
+                    row = fut.result()
+                except Exception as e:
+                    row = {"ok": False, "status": 500, "response": {"ok": False, "error": repr(e)}}
+                output = _plan_step_output(row)
+                ok = bool(row.get("ok")) and not (isinstance(output, dict) and output.get("ok") is False)
+                entries[sid].update(
+                    {
+                        "status": "ok" if ok else "failed",
+                        "ok": ok,
+                        "http_status": row.get("status"),
+                        "request_id": row.get("request_id"),
+                        "elapsed_ms": row.get("elapsed_ms"),
+                        "result": output,
+                    }
+                )
+                if ok:
+                    outputs[sid] = output
+                    for child in dependents[sid]:
+                        if child in waiting:
+                            waiting[child].discard(sid)
+                else:
+                    for child in dependents[sid]:
+                        _skip(child, "dependency did not succeed", sid)
+    finally:
+        # Still-running steps finish in the background (reported above); do not block the response on them.
+        pool.shutdown(wait=False)
+
+    results = [
+        {"id": s["id"], "tool": s["tool"], "depends_on": s["depends_on"], **entries.get(s["id"], {"status": "skipped", "ok": False})}
+        for s in normalized
+    ]
+    return {
+        "ok": all(r.get("ok") is True for r in results),
+        "order": order,
+        "succeeded": [r["id"] for r in results if r.get("status") == "ok"],
+        "failed": [r["id"] for r in results if r.get("status") == "failed"],
+        "skipped": [r["id"] for r in results if r.get("status") == "skipped"],
+        "still_running": [r["id"] for r in results if r.get("status") == "still_running"],
+        "elapsed_ms": round((time.perf_counter() - started) * 1000.0, 2),
+        "request_id": ctx["request_id"],
+        "steps": results,
+    }
+
+
+# ---------- Startup prewarm ----------
+
+
+class _Prewarm:
+    """Populate inventory, room catalogs/status and command catalogs so first requests are not cold.
+
+    Mode comes from C4_PREWARM: off, background (default; runs right after start-up in a thread) or
+    blocking (finishes before the server binds). Rooms/devices referenced most in session history go first.
+    Only main() starts it; when the app is served without main() it stays idle and /mcp/ready reports ready.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.state: dict = {"status": "idle", "steps": {}, "errors": []}
+
+    def _step(self, name: str, **fields) -> None:
+        with self._lock:
+            self.state["steps"].setdefault(name, {}).update(fields)
+
+    def _error(self, where: str, err: object) -> None:
+        with self._lock:
+            if len(self.state["errors"]) < 20:
+                self.state["errors"].append({"where": where, "error": str(err)[:200]})
+
+    def run(self, max_rooms: int, max_devices: int, concurrency: int) -> None:
+        started = time.perf_counter()
+        with self._lock:
+            self.state.update({"status": "running", "started_at": time.time(), "steps": {}, "errors": []})
+        try:
+            t0 = time.perf_counter()
+            generation, drivers = _inventory_generation(force=True)
+            items = get_all_items() or []
+            self._step("inventory", done=True, devices=len(drivers), generation=generation, ms=round((time.perf_counter() - t0) * 1000.0, 1))
+
+            room_ids = [int(i.get("id")) for i in items if isinstance(i, dict) and i.get("typeName") == "room" and str(i.get("id") or "").isdigit()]
+            favoured = [r for r in _SESSION_HISTORY.top("rooms", max_rooms) if r in set(room_ids)]
+            rooms = (favoured + [r for r in room_ids if r not in set(favoured)])[: max(0, int(max_rooms))]
+            self._step("rooms", total=len(rooms), done=0, favoured=len(favoured))
+            t0 = time.perf_counter()
+
+            def _warm_room(rid: int) -> None:
+                _room_commands(rid)
+                _ROOM_STATUS.read(rid, "watch")
+                _ROOM_STATUS.read(rid, "listen")
+                with self._lock:
+                    self.state["steps"]["rooms"]["done"] += 1
+
+            for rid, row in zip(rooms, _fan_out(_warm_room, rooms, concurrency)):
+                if not row.get("ok"):
+                    self._error(f"room:{rid}", row.get("error"))
+            self._step("rooms", ms=round((time.perf_counter() - t0) * 1000.0, 1))
+
+            devices = [d for d in _SESSION_HISTORY.top("devices", max_devices) if d in drivers]
+            self._step("commands", total=len(devices), done=0)
+            t0 = time.perf_counter()
+
+            def _warm_device(did: int) -> None:
+                _item_commands(did)
+                with self._lock:
+                    self.state["steps"]["commands"]["done"] += 1
+
+            for did, row in zip(devices, _fan_out(_warm_device, devices, concurrency)):
+                if not row.get("ok"):
+                    self._error(f"device:{did}", row.get("error"))
+            self._step("commands", ms=round((time.perf_counter() - t0) * 1000.0, 1))
+            status = "ready"
+        except Exception as e:
+            self._error("prewarm", repr(e))
+            status = "failed"
+        with self._lock:
+            self.state.update({"status": status, "finished_at": time.time(), "duration_ms": round((time.perf_counter() - started) * 1000.0, 1)})
+        _log.info(_safe_json({"event": "prewarm_finished", **self.view()}))
+
+    def start(self, mode: str) -> None:
+        mode = str(mode or "").strip().lower() or "background"
+        with self._lock:
+            if self.state.get("status") != "idle":
+                return  # already started
+            if mode in {"0", "off", "false", "no", "none"}:
+                self.state["status"] = "disabled"
+                return
+            if mode != "blocking":
+                self.state["status"] = "scheduled"
+        kwargs = {
+            "max_rooms": int(os.getenv("C4_PREWARM_MAX_ROOMS", "30") or "30"),
+            "max_devices": int(os.getenv("C4_PREWARM_MAX_DEVICES", "40") or "40"),
+            "concurrency": int(os.getenv("C4_PREWARM_CONCURRENCY", "4") or "4"),
+        }
+        if mode == "blocking":
+            self.run(**kwargs)
+            return
+        threading.Thread(target=self.run, kwargs=kwargs, name="c4-prewarm", daemon=True).start()
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return self.state.get("status") in {"idle", "ready", "failed", "disabled"}
+
+    def view(self) -> dict:
+        with self._lock:
+            return json.loads(_safe_json(self.state))
+
+
+_PREWARM = _Prewarm()
+
+
+def _mcp_ready_view():
+    body = {"ready": _PREWARM.ready, "prewarm": _PREWARM.view(), "request_id": getattr(g, "request_id", None)}
+    return jsonify(body), (200 if body["ready"] else 503)
+
+
+app.add_url_rule("/mcp/ready", "c4_mcp_ready", _mcp_ready_view, methods=["GET"])
+
+
 def main() -> None:
     host = (os.getenv("C4_BIND_HOST") or "127.0.0.1").strip() or "127.0.0.1"
     port_raw = (os.getenv("C4_PORT") or "3333").strip() or "3333"
@@ -3874,6 +9147,8 @@ def main() -> None:
     except Exception:
         port = 3333
 
+    # Background prewarm starts before binding but does not delay it; blocking mode finishes first.
+    _PREWARM.start(os.getenv("C4_PREWARM", "background"))
     app.run(host=host, port=port, debug=False, use_reloader=False, threaded=True)
 
 
@@ -0,0 +1,32 @@
+"""/mcp/batch: per-item success follows the tool's own ok flag inside the /mcp/call result envelope."""
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("flask_mcp_server")
+pytest.importorskip("control4_adapter")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "overrides"))
+
+import app as c4  # noqa: E402
+
+
+def test_batch_reports_tool_level_failures():
+    resp = c4.app.test_client().post(
+        "/mcp/batch",
+        json={
+            "calls": [
+                {"name": "c4_thermostat_apply", "args": {"device_id": "1"}},  # no changes requested -> ok false
+                {"name": "c4_lock_engine_status", "args": {}},
+            ]
+        },
+    )
+    body = resp.get_json()
+
+    assert body["ok"] is False
+    assert body["failed_indexes"] == [0]
+    assert body["results"][0]["ok"] is False
+    assert body["results"][0]["response"]["result"]["ok"] is False
+    assert body["results"][1]["ok"] is True
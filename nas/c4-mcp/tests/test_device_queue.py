@@ -0,0 +1,99 @@
+"""Device write queue: last-write-wins coalescing and busy lanes (adapter stubbed)."""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("flask_mcp_server")
+pytest.importorskip("control4_adapter")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "overrides"))
+
+import app as c4  # noqa: E402
+
+
+def _wait_for(predicate, timeout_s: float = 3.0) -> bool:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def _queue_depth(engine, key) -> int:
+    return sum(r["queue_depth"] for r in engine.stats()["lanes"] if r["device_id"] == str(key))
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    engine = c4._DeviceLaneExecutor("device", max_queue_per_device=2)
+    monkeypatch.setattr(c4, "_DEVICE_QUEUE", engine)
+    return engine
+
+
+def test_newer_level_replaces_queued_level(queue):
+    gate = threading.Event()
+    sent: list[int] = []
+    replies: dict[int, tuple] = {}
+
+    def _set_level(device_id: int, level: int) -> dict:
+        sent.append(level)
+        return {"ok": True, "level": level}
+
+    def _write(level: int) -> None:
+        replies[level] = c4._device_write(5, _set_level, 5, level, coalesce="level", detail={"level": level})
+
+    blocker = queue.submit(5, gate.wait, 3.0)
+    threads = []
+    for level in (20, 40, 60):
+        t = threading.Thread(target=_write, args=(level,))
+        t.start()
+        threads.append(t)
+        assert _wait_for(lambda: _queue_depth(queue, 5) == 1)
+    gate.set()
+    blocker.future.result(timeout=2.0)
+    for t in threads:
+        t.join(2.0)
+
+    assert sent == [60]
+    for level in (20, 40):
+        result, reply = replies[level]
+        assert result is None
+        assert reply["coalesced"] is True and reply["accepted"] is False
+        assert reply["requested"] == {"level": level}
+        assert reply["superseded_by"]["level"] == level + 20  # each write is replaced by the next one
+    assert replies[60] == ({"ok": True, "level": 60}, None)
+    assert queue.stats()["totals"]["coalesced"] == 2
+
+
+def test_lock_and_unlock_are_not_coalesced_with_each_other():
+    engine = c4._DeviceLaneExecutor("lock")
+    gate = threading.Event()
+    blocker = engine.submit(9, gate.wait, 3.0)
+    lock = engine.submit(9, lambda: "locked", coalesce_key=c4._lock_coalesce_key(True))
+    unlock = engine.submit(9, lambda: "unlocked", coalesce_key=c4._lock_coalesce_key(False))
+    gate.set()
+    blocker.future.result(timeout=2.0)
+
+    assert lock.future.result(timeout=2.0) == "locked"
+    assert unlock.future.result(timeout=2.0) == "unlocked"
+    assert engine.stats()["totals"].get("coalesced", 0) == 0
+
+
+def test_full_lane_returns_device_busy(queue):
+    gate = threading.Event()
+    blocker = queue.submit(3, gate.wait, 3.0)
+    queued = [queue.submit(3, gate.wait, 3.0) for _ in range(2)]
+    try:
+        assert _wait_for(lambda: _queue_depth(queue, 3) == 2)
+        result, reply = c4._device_write(3, lambda: {"ok": True})
+        assert result is None
+        assert reply["error"] == "device_busy" and reply["busy"] is True
+    finally:
+        gate.set()
+    for job in [blocker, *queued]:
+        job.future.result(timeout=2.0)
@@ -0,0 +1,100 @@
+"""Change-event watcher and /mcp/events stream, driven by the simulated Director (no Control4 needed)."""
+
+import os
+import sys
+import time
+
+import pytest
+
+pytest.importorskip("flask_mcp_server")
+pytest.importorskip("control4_adapter")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "overrides"))
+
+import app as c4  # noqa: E402
+
+
+def _wait_for(predicate, timeout_s: float = 3.0) -> bool:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+@pytest.fixture
+def sim():
+    director = c4._SimulatedDirector()
+    c4._EVENTS.set_source(director)
+    yield director
+    c4._EVENTS.set_source(None)
+
+
+def test_watcher_reports_simulated_changes(sim):
+    sim.set(101, "LIGHT_LEVEL", 0)
+    sub = c4._EVENTS.subscribe({101})
+    try:
+        c4._EVENTS.poll_once()  # first sight is the baseline
+        sim.set(101, "LIGHT_LEVEL", 40)
+        c4._EVENTS.poll_once()
+        events = sub.pop_all(2.0)
+    finally:
+        c4._EVENTS.unsubscribe(sub)
+
+    assert [(e["device_id"], e["variable"], e["old"], e["new"]) for e in events] == [("101", "LIGHT_LEVEL", 0, 40)]
+
+
+def test_events_stream_delivers_changes_and_unsubscribes(sim):
+    sim.set(202, "LIGHT_LEVEL", 10)
+    client = c4.app.test_client()
+    resp = client.get("/mcp/events?device_ids=202&heartbeat_s=1", buffered=False)
+    assert resp.status_code == 200
+    chunks = iter(resp.response)
+
+    first = next(chunks)
+    assert b"event: ready" in (first if isinstance(first, bytes) else first.encode())
+    assert _wait_for(lambda: c4._EVENTS.stats()["subscribers"] >= 1)
+
+    c4._EVENTS.poll_once()  # baseline
+    sim.set(202, "LIGHT_LEVEL", 75)
+    c4._EVENTS.poll_once()
+
+    body = b""
+    for _ in range(5):
+        chunk = next(chunks)
+        body += chunk if isinstance(chunk, bytes) else chunk.encode()
+        if b"event: change" in body:
+            break
+    assert b"event: change" in body
+    assert b'"new": 75' in body
+
+    resp.close()
+    assert _wait_for(lambda: c4._EVENTS.stats()["subscribers"] == 0)
+
+
+def test_events_stream_never_read_does_not_subscribe(sim):
+    before = c4._EVENTS.stats()["subscribers"]
+    resp = c4.app.test_client().get("/mcp/events?device_ids=303", buffered=False)
+    resp.close()
+    assert c4._EVENTS.stats()["subscribers"] == before
+
+
+def test_prime_does_not_swallow_other_subscribers_changes(sim):
+    sim.set(404, "LIGHT_LEVEL", 0)
+    watcher = c4._EVENTS.subscribe({404})
+    tracer = c4._EVENTS.subscribe({404})
+    try:
+        c4._EVENTS.poll_once()  # shared baseline
+        sim.set(404, "LIGHT_LEVEL", 20)  # a change the watcher has not been told about yet
+        c4._EVENTS.prime(404, tracer)
+        sim.set(404, "LIGHT_LEVEL", 60)
+        c4._EVENTS.poll_once()
+        seen = [(e["old"], e["new"]) for e in watcher.pop_all(2.0)]
+        traced = [(e["old"], e["new"]) for e in tracer.pop_all(2.0)]
+    finally:
+        c4._EVENTS.unsubscribe(watcher)
+        c4._EVENTS.unsubscribe(tracer)
+
+    assert seen == [(0, 60)]
+    assert traced == [(20, 60)]
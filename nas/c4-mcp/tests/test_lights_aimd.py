@@ -0,0 +1,74 @@
+"""AIMD limiter behaviour and the adaptive room-lights default path, with the adapter stubbed out."""
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("flask_mcp_server")
+pytest.importorskip("control4_adapter")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "overrides"))
+
+import app as c4  # noqa: E402
+
+
+def _sample(limiter, latency_ms, ok=True):
+    assert limiter.acquire(timeout_s=1.0)
+    limiter.release(latency_ms, ok)
+
+
+def test_limit_grows_on_fast_successes():
+    limiter = c4._AimdLimiter(initial=2, max_limit=6, latency_target_ms=100.0)
+    for _ in range(20):
+        _sample(limiter, 10.0)
+    assert limiter.limit > 2
+    assert limiter.limit <= 6
+
+
+def test_limit_backs_off_on_slow_or_failed_commands():
+    limiter = c4._AimdLimiter(initial=8, max_limit=8, latency_target_ms=100.0)
+    _sample(limiter, 500.0)
+    assert limiter.limit == 4
+    # Only one cut per latency window, so a burst of slow replies does not collapse the limit.
+    _sample(limiter, 500.0)
+    assert limiter.limit == 4
+
+    failing = c4._AimdLimiter(initial=6, max_limit=8, latency_target_ms=100.0)
+    _sample(failing, 10.0, ok=False)
+    assert failing.limit == 3
+
+
+def test_release_without_sample_leaves_limit_alone():
+    limiter = c4._AimdLimiter(initial=3, max_limit=8, latency_target_ms=100.0)
+    before = limiter.snapshot()["limit_raw"]
+    _sample(limiter, None)
+    assert limiter.snapshot()["limit_raw"] == before
+    assert limiter.snapshot()["in_flight"] == 0
+
+
+def test_acquire_times_out_at_the_limit():
+    limiter = c4._AimdLimiter(initial=1, max_limit=1)
+    assert limiter.acquire(timeout_s=0.1)
+    assert not limiter.acquire(timeout_s=0.05)
+    limiter.release(None, True)
+
+
+def test_room_lights_default_path_is_adaptive(monkeypatch):
+    levels = {}
+
+    def _set_level(did, level):
+        levels[did] = level
+        return True
+
+    monkeypatch.setattr(c4, "find_devices", lambda **_: {"ok": True, "devices": [{"id": 11, "name": "Cans"}, {"id": 12, "name": "Lamp"}]})
+    monkeypatch.setattr(c4, "light_set_level", _set_level)
+    monkeypatch.setattr(c4, "light_get_level", lambda did: levels.get(did, 0))
+
+    out = c4.c4_room_lights_set_tool(room_id=5, level=30, concurrency=4)
+
+    assert out["ok"] is True
+    assert out["effective_concurrency"]["mode"] == "adaptive"
+    assert out["effective_concurrency"]["ceiling"] == 4
+    assert levels == {11: 30, 12: 30}
+    assert all(r["execute"]["confirmed"] for r in out["execute"]["results"])
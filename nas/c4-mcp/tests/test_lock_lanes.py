@@ -0,0 +1,101 @@
+"""Per-lock execution lanes: serialization, cancel on timeout and abandoned jobs (adapter stubbed)."""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import pytest
+
+pytest.importorskip("flask_mcp_server")
+pytest.importorskip("control4_adapter")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "overrides"))
+
+import app as c4  # noqa: E402
+
+
+def _wait_for(predicate, timeout_s: float = 3.0) -> bool:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_lane_serializes_one_device_but_not_others():
+    engine = c4._DeviceLaneExecutor("test")
+    gate = threading.Event()
+    order: list[str] = []
+
+    def _slow(tag: str) -> str:
+        gate.wait(3.0)
+        order.append(tag)
+        return tag
+
+    def _fast(tag: str) -> str:
+        order.append(tag)
+        return tag
+
+    first = engine.submit(1, _slow, "a1")
+    second = engine.submit(1, _fast, "a2")
+    other = engine.submit(2, _fast, "b1")
+    try:
+        assert other.future.result(timeout=2.0) == "b1"
+        assert not second.future.done()  # still queued behind a1
+        assert engine.stats()["totals"]["submitted"] == 3
+    finally:
+        gate.set()
+    assert first.future.result(timeout=2.0) == "a1"
+    assert second.future.result(timeout=2.0) == "a2"
+    assert order == ["b1", "a1", "a2"]
+
+
+def test_run_timeout_cancels_a_job_that_never_started():
+    engine = c4._DeviceLaneExecutor("test")
+    gate = threading.Event()
+    calls: list[str] = []
+    blocker = engine.submit(1, gate.wait, 3.0)
+    try:
+        with pytest.raises(FutureTimeout):
+            engine.run(1, calls.append, "late", timeout_s=0.05)
+        assert engine.stats()["totals"]["cancelled"] == 1
+    finally:
+        gate.set()
+    blocker.future.result(timeout=2.0)
+    assert _wait_for(lambda: engine.stats()["active_lanes"] == 0)
+    assert calls == []
+
+
+def test_run_timeout_marks_a_running_job_abandoned():
+    engine = c4._DeviceLaneExecutor("test")
+    gate = threading.Event()
+    try:
+        with pytest.raises(FutureTimeout):
+            engine.run(1, gate.wait, 3.0, timeout_s=0.05, op="lock_lock")
+        stats = engine.stats()
+        assert stats["totals"]["abandoned"] == 1
+        assert stats["lanes"][0]["running"][0]["op"] == "lock_lock"
+        assert stats["lanes"][0]["running"][0]["abandoned"] is True
+    finally:
+        gate.set()
+
+
+def test_lock_tool_reports_timeout_and_busy(monkeypatch):
+    engine = c4._DeviceLaneExecutor("lock", max_queue_per_device=1)
+    gate = threading.Event()
+    monkeypatch.setattr(c4, "_LOCK_ENGINE", engine)
+    monkeypatch.setattr(c4, "_LOCK_TIMEOUT_S", 0.05)
+    monkeypatch.setattr(c4, "lock_lock", lambda device_id: gate.wait(3.0) and {"ok": True, "accepted": True})
+    monkeypatch.setattr(c4, "lock_unlock", lambda device_id: {"ok": True, "accepted": True})
+    try:
+        out = c4.c4_lock_lock_tool("7")
+        assert out["ok"] is False and out["error"].startswith("tool timeout")
+
+        engine.submit(7, gate.wait, 3.0)  # fills the single queue slot behind the abandoned lock
+        busy = c4.c4_lock_unlock_tool("7")
+        assert busy["ok"] is False and busy["error"] == "device_busy"
+    finally:
+        gate.set()
@@ -0,0 +1,102 @@
+"""c4_execute_plan: dependency ordering, failure propagation and the plan deadline (dispatch stubbed)."""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("flask_mcp_server")
+pytest.importorskip("control4_adapter")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "overrides"))
+
+import app as c4  # noqa: E402
+
+
+def _row(result: dict, status: int = 200) -> dict:
+    return {
+        "ok": status < 400 and result.get("ok") is not False,
+        "status": status,
+        "request_id": "t",
+        "elapsed_ms": 1.0,
+        "response": {"result": result},
+    }
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    seen: list[tuple[str, dict]] = []
+    handlers: dict = {}
+
+    def _dispatch(name, args, **_kwargs):
+        seen.append((name, dict(args)))
+        return handlers[name](args)
+
+    monkeypatch.setattr(c4, "_dispatch_tool_call", _dispatch)
+    return seen, handlers
+
+
+def test_failed_step_skips_its_dependents_only(calls):
+    seen, handlers = calls
+    handlers["find"] = lambda args: _row({"ok": True, "room_id": 12})
+    handlers["off"] = lambda args: _row({"ok": True, "room": args["room_id"]})
+    handlers["broken"] = lambda args: _row({"ok": False, "error": "nope"})
+    handlers["after_broken"] = lambda args: _row({"ok": True})
+
+    out = c4.c4_execute_plan_tool(
+        [
+            {"id": "off", "tool": "off", "args": {"room_id": "${find.room_id}"}},
+            {"id": "find", "tool": "find"},
+            {"id": "broken", "tool": "broken"},
+            {"id": "after", "tool": "after_broken", "depends_on": "broken"},
+        ]
+    )
+
+    assert out["ok"] is False
+    assert out["order"].index("find") < out["order"].index("off")
+    assert out["succeeded"] == ["off", "find"]
+    assert out["failed"] == ["broken"]
+    assert out["skipped"] == ["after"]
+    after = out["steps"][3]
+    assert after["skipped_because"] == "broken"
+    assert ("off", {"room_id": 12}) in seen  # a lone reference keeps the int type
+    assert all(name != "after_broken" for name, _ in seen)
+
+
+def test_cycle_is_rejected_before_anything_runs(calls):
+    seen, _ = calls
+    out = c4.c4_execute_plan_tool(
+        [{"id": "a", "tool": "x", "depends_on": "b"}, {"id": "b", "tool": "x", "depends_on": "a"}]
+    )
+    assert out["ok"] is False and "cycle" in out["error"]
+    assert seen == []
+
+
+def test_deadline_reports_running_steps_as_still_running(calls):
+    _, handlers = calls
+    gate = threading.Event()
+    handlers["slow"] = lambda args: (gate.wait(3.0), _row({"ok": True}))[1]
+    handlers["fast"] = lambda args: _row({"ok": True})
+
+    t0 = time.monotonic()
+    try:
+        out = c4.c4_execute_plan_tool(
+            [
+                {"id": "slow", "tool": "slow"},
+                {"id": "next", "tool": "fast", "depends_on": ["slow"]},
+                {"id": "quick", "tool": "fast"},
+            ],
+            deadline_s=0.2,
+        )
+    finally:
+        gate.set()
+
+    assert time.monotonic() - t0 < 2.0
+    assert out["ok"] is False
+    assert out["still_running"] == ["slow"]
+    assert out["succeeded"] == ["quick"]
+    assert out["skipped"] == ["next"]
+    slow = out["steps"][0]
+    assert slow["ok"] is None and slow["outcome"] == "unknown"